@@ -0,0 +1,116 @@
+# benchmarks/bench_services.py
+"""
+Hot service methods.
+
+Each benchmark is a pair: a setup that picks its inputs (untimed) and a call
+that runs the service in a fresh session (timed). Inputs come from Targets,
+sampled once from the generated dataset with a seeded RNG. Benchmarks that
+change data (claims, sold listings) draw a fresh input every run.
+"""
+from sqlalchemy import func, select
+from src.database.models import Card, MarketListing, PlayerBase, User
+from src.services.gacha_service import GachaService
+from src.services.match_service import MatchService
+from src.services.team_service import TeamService
+from src.services.transfer_service import TransferService
+from src.utils.synthetic_data import role_of
+
+ROLE_SLOTS = {"GK": "GK", "D": "D1", "M": "M1", "F": "F1"}
+
+class Targets:
+    """Benchmark inputs sampled from the dataset (profiles, heavy collectors, listings, bench cards)."""
+    def __init__(self, session, rng, sample_size=200):
+        self.rng = rng
+        users = session.execute(select(User.id, User.discord_id, User.guild_id)).all()
+        self.users = rng.sample(users, min(sample_size, len(users)))
+
+        # The slow cases are big collections: the top collectors by card count
+        heavy = session.execute(
+            select(User.id, User.discord_id, User.guild_id, func.count(Card.id).label("cards"))
+            .join(Card, Card.user_id == User.id).group_by(User.id, User.discord_id, User.guild_id)
+            .order_by(func.count(Card.id).desc()).limit(sample_size)
+        ).all()
+        self.heavy = [(row.id, row.discord_id, row.guild_id) for row in heavy]
+
+        self.listings = session.execute(
+            select(User.discord_id, User.guild_id).join(MarketListing, MarketListing.user_id == User.id)
+        ).all()
+        rng.shuffle(self.listings)
+
+        # Bench cards of heavy collectors, with the slot they can play in
+        heavy_ids = [row[0] for row in self.heavy]
+        bench = session.execute(
+            select(User.discord_id, User.guild_id, PlayerBase.name, PlayerBase.positions)
+            .join(Card, Card.user_id == User.id).join(PlayerBase, PlayerBase.id == Card.player_base_id)
+            .where(User.id.in_(heavy_ids), Card.position_in_xi.is_(None))
+        ).all()
+        self.lineup_moves = [(d, g, ROLE_SLOTS[role_of(pos)], name) for d, g, name, pos in bench if role_of(pos)]
+
+        # Unowned players per guild, for claims
+        players = [row[0] for row in session.execute(select(PlayerBase.id)).all()]
+        owned = {}
+        for guild_id, player_id in session.execute(select(User.guild_id, Card.player_base_id).join(Card, Card.user_id == User.id)):
+            owned.setdefault(guild_id, set()).add(player_id)
+        self.unowned = {guild: [p for p in players if p not in ids] for guild, ids in owned.items()}
+        for free in self.unowned.values():
+            rng.shuffle(free)
+        self.claimers = list(self.users)
+
+        self.clubs = [row[0] for row in session.execute(select(PlayerBase.club).distinct()).all()]
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+    def heavy_user(self):
+        return self.rng.choice(self.heavy)
+
+    def claim(self):
+        """A profile that has not claimed yet and a player its guild does not own; None once either runs out."""
+        if not self.claimers:
+            return None
+        _, discord_id, guild_id = self.claimers.pop()
+        free = self.unowned.get(guild_id)
+        return (discord_id, guild_id, free.pop()) if free else None
+
+    def listing(self):
+        return self.listings.pop() if self.listings else None
+
+BENCHMARKS = {} # name -> (setup(targets) -> args, run(session, *args))
+
+def benchmark(name, setup):
+    def decorator(run):
+        BENCHMARKS[name] = (setup, run)
+        return run
+    return decorator
+
+@benchmark("roll_card", lambda t: t.user()[1:])
+def bench_roll_card(session, discord_id, guild_id):
+    GachaService(session).roll_card(discord_id, guild_id, "bench")
+
+@benchmark("claim_card", lambda t: t.claim())
+def bench_claim_card(session, discord_id, guild_id, player_id):
+    GachaService(session).claim_card(discord_id, guild_id, player_id)
+
+@benchmark("get_user_collection", lambda t: t.heavy_user()[1:])
+def bench_get_user_collection(session, discord_id, guild_id):
+    GachaService(session).get_user_collection(discord_id, guild_id, page=1)
+
+@benchmark("sort_collection", lambda t: t.heavy_user()[1:])
+def bench_sort_collection(session, discord_id, guild_id):
+    GachaService(session).sort_collection(discord_id, guild_id)
+
+@benchmark("get_club_checklist", lambda t: t.heavy_user()[1:] + (t.rng.choice(t.clubs),))
+def bench_get_club_checklist(session, discord_id, guild_id, club):
+    GachaService(session).get_club_checklist(discord_id, guild_id, club)
+
+@benchmark("set_lineup_player", lambda t: t.rng.choice(t.lineup_moves))
+def bench_set_lineup_player(session, discord_id, guild_id, slot, player_name):
+    TeamService(session).set_lineup_player(discord_id, guild_id, slot, player_name)
+
+@benchmark("get_team_power", lambda t: t.heavy_user()[1:])
+def bench_get_team_power(session, discord_id, guild_id):
+    MatchService(session).get_team_power(discord_id, guild_id)
+
+@benchmark("check_transfer_status", lambda t: t.listing())
+def bench_check_transfer_status(session, discord_id, guild_id):
+    TransferService(session).check_transfer_status(discord_id, guild_id)
@@ -0,0 +1,120 @@
+# benchmarks/fakes.py
+"""
+Stand-ins for the discord.py objects a cog callback touches.
+
+They implement just enough of Interaction, User, Guild, the interaction
+response, the followup webhook and messages for the real callbacks to run
+without a gateway connection. Everything a callback sends is kept on the
+interaction (`sent`), so the load generator can tell how the call ended and
+pick up the views (ClaimView, CollectionView) to click next.
+"""
+import itertools
+from types import SimpleNamespace
+
+_ids = itertools.count(1_000_000_000)
+
+class FakeUser:
+    def __init__(self, discord_id, name=None):
+        self.id = int(discord_id)
+        self.name = name or f"user{discord_id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = False
+        self.display_avatar = SimpleNamespace(url=f"https://cdn.example/avatars/{self.id}.png")
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = int(guild_id)
+        self.name = f"guild{guild_id}"
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None, view=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.view = view
+
+    async def edit(self, content=None, embed=None, view=None, **kwargs):
+        self.content = content if content is not None else self.content
+        self.embed = embed if embed is not None else self.embed
+        self.view = view if view is not None else self.view
+        return self
+
+class FakeChannel:
+    def __init__(self, interaction):
+        self.id = next(_ids)
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        return self.interaction._record("channel", content, embed, view)
+
+class FakeResponse:
+    """InteractionResponse: one initial response per interaction, like Discord enforces."""
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    def _respond(self):
+        if self.done:
+            raise RuntimeError("This interaction has already been responded to before")
+        self.done = True
+
+    async def defer(self, ephemeral=False, thinking=False):
+        self._respond()
+
+    async def send_message(self, content=None, embed=None, view=None, ephemeral=False, **kwargs):
+        self._respond()
+        self.interaction._record("response", content, embed, view)
+
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        self._respond()
+        self.interaction._record("edit", content, embed, view)
+
+class FakeFollowup:
+    """The interaction webhook. Only valid once the interaction was responded to or deferred."""
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, view=None, ephemeral=False, **kwargs):
+        if not self.interaction.response.done:
+            raise RuntimeError("Followup sent before the interaction was responded to")
+        return self.interaction._record("followup", content, embed, view)
+
+    async def edit_message(self, message_id, content=None, embed=None, view=None, **kwargs):
+        return self.interaction._record("edit", content, embed, view)
+
+class FakeInteraction:
+    def __init__(self, client, user, guild, command=None, message=None):
+        self.id = next(_ids)
+        self.client = client
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.command = command
+        self.message = message
+        self.extras = {}
+        self.channel = FakeChannel(self)
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.sent = [] # (kind, content, embed, view) in send order
+
+    def _record(self, kind, content, embed, view):
+        self.sent.append((kind, content, embed, view))
+        return FakeMessage(self.channel, content, embed, view)
+
+    def texts(self):
+        return [content for _, content, _, _ in self.sent if content]
+
+    def last_view(self, view_type):
+        return next((view for _, _, _, view in reversed(self.sent) if isinstance(view, view_type)), None)
+
+class FakeBot:
+    """What the cogs read from `self.bot` / `interaction.client`."""
+    def __init__(self, tutorial_bus):
+        self.tutorial_bus = tutorial_bus
+        self.user = FakeUser(1, "Touchline")
+        self.user.bot = True
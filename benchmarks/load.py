@@ -0,0 +1,358 @@
+# benchmarks/load.py
+"""
+Interaction load generator.
+
+    python -m benchmarks.load                                         # SQLite, "small" scale, 20 workers for 30s
+    python -m benchmarks.load --concurrency 50 --duration 60 --mix roll=50,collection=30,team_view=20
+    python -m benchmarks.load --database-url postgresql://localhost/touchline_load --scale full --reuse
+
+Runs the real cog callbacks (GachaCog.roll, ClaimView.claim_button,
+CollectionView paging, /sort, /team view, /team set) with the stand-in Discord
+objects from benchmarks/fakes.py, so rate limits, user locks, units of work and
+the tutorial bus all take part exactly as they do in the bot. `--concurrency`
+workers each pick a scenario from the mix, run it and start the next one.
+
+Reports throughput, p50/p95/p99 latency and outcomes per operation, how full
+the DB pool got and the worst event loop lag. The pool is sampled from a thread:
+the callbacks run their SQL on the loop, so a sampler on the loop would only
+ever look at it between queries.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from benchmarks.run import DEFAULT_OUTPUT, percentile, save_json
+
+DEFAULT_MIX = {"roll": 35, "collection": 20, "sort": 5, "team_view": 25, "team_set": 15}
+DEFAULT_LOAD_OUTPUT = os.path.join(os.path.dirname(DEFAULT_OUTPUT), "load_results.json")
+UNLIMITED = {group: {"user": (10**9, 10**9), "guild": (10**9, 10**9)} for group in ("roll", "browse", "default")}
+
+def parse_mix(text):
+    """"roll=50,collection=30" -> {"roll": 50.0, "collection": 30.0}."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The mix needs at least one scenario with a positive weight")
+    return mix
+
+def classify(interaction):
+    """How a callback ended, from what it sent back: ok, rejected (a game rule said no), rate_limited or error."""
+    texts = " ".join(interaction.texts())
+    if "Slow down" in texts:
+        return "rate_limited"
+    if "error" in texts.lower() or "Failed" in texts:
+        return "error"
+    if "❌" in texts or "⏳" in texts:
+        return "rejected"
+    return "ok"
+
+@contextmanager
+def rate_limits_disabled():
+    from src.utils.rate_limit import rate_limiter
+
+    saved = rate_limiter.limits
+    rate_limiter.limits = UNLIMITED
+    try:
+        yield
+    finally:
+        rate_limiter.limits = saved
+
+class PoolSampler:
+    """Polls the engine's pool from a daemon thread: peak and mean connections checked out."""
+    def __init__(self, pool, interval=0.005):
+        self.pool = pool
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="pool-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append(self.pool.checkedout())
+
+    def summary(self, capacity):
+        samples = self.samples or [0]
+        return {
+            "capacity": capacity,
+            "peak_checked_out": max(samples),
+            "mean_checked_out": round(sum(samples) / len(samples), 3),
+            "at_capacity": round(sum(1 for s in samples if capacity and s >= capacity) / len(samples), 4),
+        }
+
+class LoadTest:
+    def __init__(self, bot, targets, mix=None, concurrency=20, duration=30.0, max_requests=None,
+                 claim_rate=0.3, pages=3, think=0.0, seed=42):
+        from src.cogs.gacha import GachaCog
+        from src.cogs.team import TeamCog
+
+        self.bot = bot
+        self.targets = targets
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.duration = duration
+        self.max_requests = max_requests
+        self.claim_rate = claim_rate
+        self.pages = pages
+        self.think = think
+        self.rng = random.Random(seed)
+        self.gacha = GachaCog(bot)
+        self.team = TeamCog(bot)
+
+        self.members = {} # guild -> discord IDs, for someone else to click Claim
+        for _, discord_id, guild_id in targets.users:
+            self.members.setdefault(guild_id, []).append(discord_id)
+        self.latencies = {}  # op -> [seconds]
+        self.outcomes = {}   # op -> {outcome: count}
+        self.exceptions = {} # "op: ExceptionType" -> count
+        self.started = 0
+        self.elapsed = 0.0
+
+    # --- FAKE INTERACTIONS ---
+
+    def interaction(self, discord_id, guild_id, command=None, message=None):
+        from benchmarks.fakes import FakeGuild, FakeInteraction, FakeUser
+        return FakeInteraction(self.bot, FakeUser(discord_id), FakeGuild(guild_id), command, message)
+
+    async def invoke(self, op, interaction, callback, *args):
+        start = time.perf_counter()
+        try:
+            await callback(*args)
+            outcome = classify(interaction)
+        except Exception as e:
+            outcome = "error"
+            key = f"{op}: {type(e).__name__}"
+            self.exceptions[key] = self.exceptions.get(key, 0) + 1
+        self.latencies.setdefault(op, []).append(time.perf_counter() - start)
+        counts = self.outcomes.setdefault(op, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    # --- SCENARIOS ---
+
+    async def roll(self):
+        from benchmarks.fakes import FakeMessage
+        from src.cogs.gacha import ClaimView
+
+        _, discord_id, guild_id = self.targets.user()
+        interaction = self.interaction(discord_id, guild_id, self.gacha.roll)
+        await self.invoke("roll", interaction, self.gacha.roll.callback, self.gacha, interaction)
+
+        view = interaction.last_view(ClaimView)
+        if view and self.rng.random() < self.claim_rate:
+            claimer = self.rng.choice(self.members.get(guild_id) or [discord_id])
+            click = self.interaction(claimer, guild_id, message=FakeMessage(interaction.channel, view=view))
+            await self.invoke("claim", click, view.claim_button.callback, click)
+
+    async def collection(self):
+        from src.cogs.gacha import CollectionView
+
+        _, discord_id, guild_id = self.targets.user()
+        interaction = self.interaction(discord_id, guild_id, self.gacha.collection)
+        await self.invoke("collection", interaction, self.gacha.collection.callback, self.gacha, interaction)
+
+        view = interaction.last_view(CollectionView)
+        for _ in range(self.pages):
+            if view is None or view.children[1].disabled:
+                break
+            click = self.interaction(discord_id, guild_id)
+            await self.invoke("browse", click, view.next_button.callback, click)
+
+    async def sort(self):
+        _, discord_id, guild_id = self.targets.heavy_user()
+        interaction = self.interaction(discord_id, guild_id, self.gacha.sort)
+        await self.invoke("sort", interaction, self.gacha.sort.callback, self.gacha, interaction)
+
+    async def team_view(self):
+        _, discord_id, guild_id = self.targets.user()
+        interaction = self.interaction(discord_id, guild_id, self.team.view_team)
+        await self.invoke("team_view", interaction, self.team.view_team.callback, self.team, interaction)
+
+    async def team_set(self):
+        if not self.targets.lineup_moves:
+            return await self.team_view()
+        discord_id, guild_id, slot, player_name = self.rng.choice(self.targets.lineup_moves)
+        interaction = self.interaction(discord_id, guild_id, self.team.set_player)
+        await self.invoke("team_set", interaction, self.team.set_player.callback, self.team, interaction, slot, player_name)
+
+    # --- RUN ---
+
+    def _more(self, deadline):
+        if self.max_requests is not None:
+            return self.started < self.max_requests
+        return time.perf_counter() < deadline
+
+    async def _worker(self, deadline):
+        names, weights = zip(*self.mix.items())
+        while self._more(deadline):
+            self.started += 1
+            await SCENARIOS[self.rng.choices(names, weights=weights)[0]](self)
+            await asyncio.sleep(self.think) # Also yields, so workers interleave even when nothing awaits
+
+    async def run(self):
+        start = time.perf_counter()
+        deadline = start + self.duration
+        await asyncio.gather(*(self._worker(deadline) for _ in range(self.concurrency)))
+        self.elapsed = time.perf_counter() - start
+        return self.results()
+
+    def results(self):
+        ops = {}
+        for op, latencies in self.latencies.items():
+            ms = sorted(s * 1000 for s in latencies)
+            ops[op] = {
+                "count": len(ms),
+                "outcomes": self.outcomes.get(op, {}),
+                "p50_ms": round(percentile(ms, 0.50), 3),
+                "p95_ms": round(percentile(ms, 0.95), 3),
+                "p99_ms": round(percentile(ms, 0.99), 3),
+                "max_ms": round(ms[-1], 3),
+            }
+        total = sum(op["count"] for op in ops.values())
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "interactions": total,
+            "throughput_per_s": round(total / self.elapsed, 2) if self.elapsed else 0.0,
+            "ops": ops,
+            "exceptions": self.exceptions,
+        }
+
+SCENARIOS = {
+    "roll": LoadTest.roll,             # /r, then sometimes a guild member clicks Claim
+    "collection": LoadTest.collection, # /collection, then a few ▶ clicks
+    "sort": LoadTest.sort,
+    "team_view": LoadTest.team_view,
+    "team_set": LoadTest.team_set,
+}
+
+def format_report(results):
+    lines = [f"{'op':<12} {'count':>7} {'ok':>6} {'reject':>6} {'limit':>6} {'error':>6} "
+             f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    for op, r in sorted(results["ops"].items(), key=lambda item: -item[1]["count"]):
+        o = r["outcomes"]
+        lines.append(f"{op:<12} {r['count']:>7} {o.get('ok', 0):>6} {o.get('rejected', 0):>6} {o.get('rate_limited', 0):>6} "
+                     f"{o.get('error', 0):>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+    lines.append(f"Throughput: {results['throughput_per_s']:.1f} interactions/s "
+                 f"({results['interactions']} in {results['elapsed_s']:.1f}s)")
+
+    pool = results.get("pool")
+    if pool:
+        lines.append(f"Pool: peak {pool['peak_checked_out']}/{pool['capacity']} checked out, "
+                     f"mean {pool['mean_checked_out']:.2f}, at capacity {pool['at_capacity']:.1%} of samples; "
+                     f"checkout wait max {pool['max_wait_ms']:.1f} ms, {pool['timeouts']} timeouts")
+    if "max_loop_lag_ms" in results:
+        lines.append(f"Event loop: worst lag {results['max_loop_lag_ms']:.0f} ms")
+    for key, count in sorted(results["exceptions"].items()):
+        lines.append(f"  ❌ {key}: {count}")
+    return "\n".join(lines)
+
+async def run_load(args, engine):
+    from benchmarks.bench_services import Targets
+    from benchmarks.fakes import FakeBot
+    from src.database.db import SessionLocal, get_pool_status, pool_stats
+    from src.services.tutorial_events import TutorialEventBus
+    from src.utils.metrics import LoopLagMonitor
+
+    session = SessionLocal()
+    try:
+        targets = Targets(session, random.Random(args.seed), sample_size=args.users)
+    finally:
+        session.close()
+
+    bot = FakeBot(TutorialEventBus())
+    await bot.tutorial_bus.start()
+    lag = LoopLagMonitor(interval=0.05)
+    await lag.start()
+
+    test = LoadTest(bot, targets, parse_mix(args.mix) if args.mix else None, args.concurrency, args.duration,
+                    args.requests, args.claim_rate, args.pages, args.think_ms / 1000, args.seed)
+    capacity = get_pool_status().get("capacity") # None: not a queue pool (in-memory SQLite)
+    sampler = PoolSampler(engine.pool) if capacity else None
+    timeouts_before = pool_stats.timeouts
+    pool_stats.max_wait = 0.0
+
+    if sampler:
+        sampler.start()
+    try:
+        results = await test.run()
+    finally:
+        if sampler:
+            sampler.stop()
+        await lag.close()
+        await bot.tutorial_bus.close()
+
+    if sampler:
+        results["pool"] = dict(sampler.summary(capacity), max_wait_ms=round(pool_stats.max_wait * 1000, 3),
+                               timeouts=pool_stats.timeouts - timeouts_before)
+    results["max_loop_lag_ms"] = round(lag.max_lag * 1000, 1)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive the real cog callbacks with fake interactions.")
+    parser.add_argument("--database-url", default=None, help="Target database (default: a SQLite file in /tmp). It is wiped unless --reuse.")
+    parser.add_argument("--scale", default="small", choices=["tiny", "small", "full", "xl"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="Skip building the dataset (it must exist already).")
+    parser.add_argument("--concurrency", type=int, default=20, help="Workers running scenarios at the same time.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many scenarios instead.")
+    parser.add_argument("--mix", default=None, help=f"Scenario weights, e.g. roll=50,collection=30 (default {DEFAULT_MIX}).")
+    parser.add_argument("--users", type=int, default=2000, help="Profiles the workers act as.")
+    parser.add_argument("--claim-rate", type=float, default=0.3, help="Share of claimable rolls someone clicks Claim on.")
+    parser.add_argument("--pages", type=int, default=3, help="▶ clicks after each /collection.")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a worker's scenarios.")
+    parser.add_argument("--no-rate-limits", action="store_true", help="Lift the per-user and per-guild limits.")
+    parser.add_argument("--output", default=DEFAULT_LOAD_OUTPUT)
+    args = parser.parse_args(argv)
+    if args.mix:
+        try:
+            parse_mix(args.mix)
+        except ValueError as e:
+            parser.error(str(e))
+
+    url = args.database_url or f"sqlite:////tmp/touchline_load_{args.scale}.db"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("DISCORD_TOKEN", "loadtest")
+    os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+
+    from src.database.db import engine
+    from src.services.catalog_cache import catalog_cache
+    from src.utils.synthetic_data import build, resolve_spec
+
+    print(f"--- Load test: {engine.dialect.name}, scale {args.scale}, {args.concurrency} workers ---")
+    if not args.reuse:
+        build(engine, resolve_spec(args.scale), args.seed)
+    random.seed(args.seed)
+    catalog_cache.load()
+
+    if args.no_rate_limits:
+        with rate_limits_disabled():
+            results = asyncio.run(run_load(args, engine))
+    else:
+        results = asyncio.run(run_load(args, engine))
+
+    print(format_report(results))
+    results["meta"] = {"dialect": engine.dialect.name, "scale": args.scale, "seed": args.seed,
+                       "concurrency": args.concurrency, "mix": parse_mix(args.mix) if args.mix else DEFAULT_MIX,
+                       "rate_limits": not args.no_rate_limits}
+    save_json(args.output, results)
+    print(f"Results written to {args.output}")
+    return 1 if results["exceptions"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
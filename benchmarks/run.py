@@ -0,0 +1,183 @@
+# benchmarks/run.py
+"""
+Benchmark runner.
+
+    python -m benchmarks.run                                   # SQLite, "small" scale
+    python -m benchmarks.run --scale full
+    python -m benchmarks.run --database-url postgresql://localhost/touchline_bench
+    python -m benchmarks.run --save-baseline                   # Store these results as the baseline
+
+Builds the synthetic dataset (src/utils/synthetic_data.py) into the target database,
+times every service benchmark (benchmarks/bench_services.py), writes the results
+as JSON and compares them with the stored baseline for the same database and
+scale. Exits with status 1 on a regression: a median slower than the tolerance
+allows, or more SQL statements per call than the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.json")
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(durations, query_counts):
+    ms = sorted(d * 1000 for d in durations)
+    return {
+        "runs": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(percentile(ms, 0.95), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "queries": max(query_counts), # Worst case: the count should not depend on the input at all
+    }
+
+def run_benchmarks(session_factory, query_log, targets, names=None, runs=30, warmup=3, log=print):
+    """Times each benchmark `runs` times (after `warmup` untimed runs). Returns {name: summary}."""
+    from benchmarks.bench_services import BENCHMARKS
+
+    results = {}
+    for name, (setup, run) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        durations, query_counts = [], []
+        for i in range(warmup + runs):
+            args = setup(targets)
+            if args is None:
+                break # Inputs used up (e.g. every listing already sold)
+            session = session_factory()
+            try:
+                with query_log.trace(name) as trace:
+                    start = time.perf_counter()
+                    run(session, *args)
+                    elapsed = time.perf_counter() - start
+            finally:
+                session.close()
+            if i >= warmup:
+                durations.append(elapsed)
+                query_counts.append(len(trace.queries))
+
+        if not durations:
+            log(f"  {name:<24} skipped (no inputs)")
+            continue
+        results[name] = summarize(durations, query_counts)
+        r = results[name]
+        log(f"  {name:<24} median {r['median_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  {r['queries']:3} queries")
+    return results
+
+def compare(results, baseline, tolerance=0.25):
+    """Regressions against a baseline: [(name, what, baseline value, current value)]."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if current["median_ms"] > before["median_ms"] * (1 + tolerance):
+            regressions.append((name, "median_ms", before["median_ms"], current["median_ms"]))
+        if current["queries"] > before["queries"]:
+            regressions.append((name, "queries", before["queries"], current["queries"]))
+    return regressions
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot service methods on a synthetic dataset.")
+    parser.add_argument("--database-url", default=None, help="Target database (default: a SQLite file in /tmp). It is wiped.")
+    parser.add_argument("--scale", default="small", choices=["tiny", "small", "full", "xl"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--only", action="append", help="Run just this benchmark (repeatable).")
+    parser.add_argument("--reuse", action="store_true", help="Skip building the dataset (it must exist already).")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown before it counts as a regression.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline for this database and scale.")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or f"sqlite:////tmp/touchline_bench_{args.scale}.db"
+    # src.config reads these at import: the bot's own engine and caches point at the benchmark DB
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+    os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+
+    from benchmarks.bench_services import Targets
+    from src.database.db import SessionLocal, engine
+    from src.services.catalog_cache import catalog_cache
+    from src.utils.query_log import QueryLog
+    from src.utils.synthetic_data import build, resolve_spec
+
+    dialect = engine.dialect.name
+    print(f"--- Benchmarks: {dialect}, scale {args.scale}, seed {args.seed} ---")
+    if not args.reuse:
+        build(engine, resolve_spec(args.scale), args.seed)
+
+    random.seed(args.seed) # Rolls use the module RNG
+    catalog_cache.load()   # Rolls in production come from the in-memory catalog
+    session = SessionLocal()
+    try:
+        targets = Targets(session, random.Random(args.seed))
+    finally:
+        session.close()
+
+    # Counts statements per call; thresholds so high that nothing is ever reported
+    query_log = QueryLog(enabled=True, slow_ms=float("inf"), max_queries=sys.maxsize, repeat_threshold=sys.maxsize)
+    query_log.install(engine)
+    results = run_benchmarks(SessionLocal, query_log, targets, names=args.only, runs=args.runs)
+
+    key = f"{dialect}/{args.scale}"
+    output = {
+        "key": key,
+        "meta": {
+            "dialect": dialect, "scale": args.scale, "seed": args.seed, "runs": args.runs,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+    save_json(args.output, output)
+    print(f"Results written to {args.output}")
+
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        baselines[key] = output
+        save_json(args.baseline, baselines)
+        print(f"Baseline for {key} saved to {args.baseline}")
+        return 0
+
+    if key not in baselines:
+        print(f"No baseline for {key} yet (run with --save-baseline).")
+        return 0
+
+    regressions = compare(results, baselines[key]["results"], args.tolerance)
+    if not regressions:
+        print(f"✅ No regressions against the {key} baseline (tolerance {args.tolerance:.0%}).")
+        return 0
+    print(f"❌ {len(regressions)} regression(s) against the {key} baseline:")
+    for name, what, before, now in regressions:
+        print(f"  {name}: {what} {before} -> {now}")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
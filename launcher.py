@@ -0,0 +1,113 @@
+"""
+Cluster launcher: runs the bot as N processes, each owning a range of shards.
+
+    python launcher.py --clusters 4                 # Discord's recommended shard count
+    python launcher.py --clusters 4 --shards 32
+
+Every cluster runs main.py with CLUSTER_ID / SHARD_IDS / SHARD_COUNT set. Crashed
+clusters are restarted with backoff; Ctrl+C / SIGTERM stops them all. On Postgres
+the clusters keep cross-guild caches coherent through LISTEN/NOTIFY.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from src.config import DISCORD_TOKEN
+from src.utils.cluster import cluster_env, shard_ranges
+
+STAGGER_SECONDS = 5      # Between cluster starts (identify rate limit)
+MAX_BACKOFF_SECONDS = 60
+HEALTHY_AFTER_SECONDS = 300 # A cluster up this long gets its backoff reset
+
+def recommended_shards(token):
+    request = urllib.request.Request(
+        "https://discord.com/api/v10/gateway/bot",
+        headers={"Authorization": f"Bot {token}", "User-Agent": "DiscordBot (touchline, 1.0)"}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+class Cluster:
+    def __init__(self, cluster_id, shard_ids, env):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.env = env
+        self.process = None
+        self.started_at = 0.0
+        self.backoff = 1
+        self.restart_at = None
+
+    def start(self):
+        print(f"[Launcher] Starting cluster {self.cluster_id} (shards {self.shard_ids[0]}-{self.shard_ids[-1]})")
+        self.process = subprocess.Popen([sys.executable, "main.py"], env=self.env)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+
+    def check(self):
+        """Restarts the process (after its backoff) if it exited."""
+        now = time.monotonic()
+        if self.process is None or self.process.poll() is None:
+            if self.process and now - self.started_at > HEALTHY_AFTER_SECONDS:
+                self.backoff = 1
+            return
+
+        if self.restart_at is None:
+            print(f"[Launcher] Cluster {self.cluster_id} exited with {self.process.returncode}; restarting in {self.backoff}s")
+            self.restart_at = now + self.backoff
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF_SECONDS)
+        elif now >= self.restart_at:
+            self.start()
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Touchline as several shard clusters.")
+    parser.add_argument("--clusters", type=int, default=int(os.getenv("CLUSTER_COUNT", "1")))
+    parser.add_argument("--shards", type=int, default=None, help="Total shards (default: Discord's recommendation)")
+    args = parser.parse_args()
+
+    shard_count = args.shards or (int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None)
+    if shard_count is None:
+        shard_count = recommended_shards(DISCORD_TOKEN)
+    ranges = shard_ranges(shard_count, args.clusters)
+    print(f"[Launcher] {shard_count} shards over {len(ranges)} clusters")
+
+    clusters = [
+        Cluster(cluster_id, shard_ids, cluster_env(cluster_id, shard_ids, shard_count, len(ranges), os.environ))
+        for cluster_id, shard_ids in enumerate(ranges)
+    ]
+
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for i, cluster in enumerate(clusters):
+        if stopping:
+            break
+        if i:
+            time.sleep(STAGGER_SECONDS)
+        cluster.start()
+
+    while not stopping:
+        time.sleep(1)
+        for cluster in clusters:
+            cluster.check()
+
+    print("[Launcher] Stopping clusters...")
+    for cluster in clusters:
+        cluster.stop()
+    for cluster in clusters:
+        if cluster.process:
+            cluster.process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,252 @@
 import asyncio
 import os
+import time
+# First import: starts the boot clock and (unless disabled) times every import after it
+from src.utils.startup_profiler import profiler
+if os.getenv("STARTUP_PROFILE_IMPORTS", "true").lower() == "true":
+    profiler.start_import_timing()
+
 import discord
+from discord import app_commands
 from discord.ext import commands
-from src.config import DISCORD_TOKEN
+from src.config import CLUSTER_COUNT, CLUSTER_ID, DISCORD_TOKEN, SHARD_COUNT, SHARD_IDS
 from src.database.db import init_db
+from src.database.user_state import user_state_cache
+from src.services.catalog_cache import catalog_cache
+from src.services.cluster_bus import cluster_bus
+from src.services.tutorial_events import TutorialEventBus
+from src.utils.ack_deadline import ack_time_left, received_at
+from src.utils.bot_metrics import register_bot
+from src.utils.cluster import CATALOG_RELOAD, USER_STATE_INVALIDATE
+from src.utils.command_sync import sync_tree
+from src.utils.gateway_cache import bot_options, resolve_policy
+from src.utils.loop_watchdog import loop_watchdog
+from src.utils.metrics import command_errors, command_seconds, loop_lag
+from src.utils.query_log import query_log
+
+profiler.mark("startup", "main.py imports", profiler.elapsed(), started_at=0.0)
+
+# Intents and cache sizes come from MEMORY_PROFILE (see src/utils/gateway_cache.py)
+cache_policy = resolve_policy()
+
+CRITICAL_WARMUP_ATTEMPTS = 3      # Jobs the bot cannot serve commands without are retried, then fail the boot
+CRITICAL_WARMUP_RETRY_SECONDS = 2 # Backoff step between attempts
+
+def command_name(interaction):
+    return interaction.command.qualified_name if interaction.command else "unknown"
+
+def record_command(interaction, status):
+    started = interaction.extras.get("started_at")
+    if started is not None:
+        command_seconds.observe(time.perf_counter() - started, command_name(interaction), status)
+    query_log.end(interaction.extras.get("query_trace"))
+
+class ReadinessGatedTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        """Slash commands wait for warmup (DB, caches) instead of running against a half-started bot."""
+        # Latency is measured from here; the bot's on_app_command_completion and on_error below record it
+        interaction.extras["started_at"] = time.perf_counter()
+        received_at(interaction) # Starts the ack budget that rate limits and user locks also wait from
+        # Records this command's SQL (the trace follows it into asyncio.to_thread)
+        interaction.extras["query_trace"] = query_log.begin(f"/{command_name(interaction)}")
+        ready = self.client.ready_event
+        if ready.is_set():
+            return True
+        try:
+            # Interactions must be answered within 3s: wait for warmup only as long as the ack budget allows
+            await asyncio.wait_for(ready.wait(), ack_time_left(interaction))
+            return True
+        except asyncio.TimeoutError:
+            record_command(interaction, "not_ready")
+            await interaction.response.send_message("🔄 Touchline is still starting up. Try again in a few seconds!", ephemeral=True)
+            return False
 
-# Setup Intents
-intents = discord.Intents.default()
-intents.message_content = True 
-intents.members = True
+    async def on_error(self, interaction, error):
+        original = getattr(error, "original", error)
+        command_errors.inc(command_name(interaction), type(original).__name__)
+        record_command(interaction, "error")
+        await super().on_error(interaction, error)
 
-class SoccerBot(commands.Bot):
+class SoccerBot(commands.AutoShardedBot):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents, help_command=None)
+        # Mentioning the bot works as a prefix too: without the message content intent that is how owner commands arrive
+        # Shards: SHARD_COUNT/SHARD_IDS come from launcher.py; unset = Discord's recommended count, all in this process
+        super().__init__(
+            command_prefix=commands.when_mentioned_or("!"), help_command=None, tree_cls=ReadinessGatedTree,
+            shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **bot_options(cache_policy)
+        )
+        # Cogs publish tutorial step events here instead of writing to the DB inline
+        self.tutorial_bus = TutorialEventBus()
+        self.cache_policy = cache_policy
+        register_bot(self) # Gauges for /metrics (served by the vote cog's web server)
+
+        # Set once warmup finished; slash commands are gated on it
+        self.ready_event = asyncio.Event()
+        self.warmup_jobs = [] # (name, coroutine) registered by cogs via add_warmup
+        self.warmup_task = None
+        self.background_tasks = set() # The loop only keeps weak references to tasks
+        self._gateway_marked = False
+
+    def add_warmup(self, name, coro):
+        """Runs `coro` with the startup warmup (concurrently, timed). After warmup it just runs now."""
+        if self.warmup_task is None:
+            self.warmup_jobs.append((name, coro))
+        else:
+            task = asyncio.create_task(profiler.timed("warmup", name, coro))
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+
+    async def login(self, token):
+        with profiler.phase("startup", "login"):
+            await super().login(token)
 
     async def setup_hook(self):
-        # 1. Initialize Database
-        print("--- Initializing Database ---")
-        # init_db() # Ensure this import is correct based on your file structure
-        
-        # 2. Load Cogs
+        # 1. Load Cogs (no DB access here; cogs register slow work with add_warmup)
         extensions = [
             "src.cogs.gacha", "src.cogs.team", "src.cogs.upgrade",
             "src.cogs.market", "src.cogs.trade", "src.cogs.match",
-            "src.cogs.tutorial", "src.cogs.vote", "src.cogs.general"
+            "src.cogs.tutorial", "src.cogs.vote", "src.cogs.general",
+            "src.cogs.admin"
         ]
         for ext in extensions:
-            await self.load_extension(ext)
+            with profiler.phase("extension", ext):
+                await self.load_extension(ext)
+        profiler.stop_import_timing()
         print("--- Cogs Loaded ---")
 
-        # 3. Sync Commands
+        # 2. Everything else warms up while discord.py connects to the gateway
+        self.warmup_task = asyncio.create_task(self.warmup())
+        print(f"--- Cluster {CLUSTER_ID + 1}/{CLUSTER_COUNT}, shards {SHARD_IDS or 'all'} of {SHARD_COUNT or 'auto'} ---")
+        print(f"--- Memory profile: {self.cache_policy['profile']} "
+              f"(members intent {self.cache_policy['members_intent']}, member cache {self.cache_policy['member_cache']}, "
+              f"message cache {self.cache_policy['message_cache_size']}) ---")
+
+    async def warmup(self):
+        # 1. Initialize Database first: everything below reads it
+        print("--- Initializing Database ---")
+        try:
+            with profiler.phase("warmup", "database connect + migrations"):
+                await asyncio.to_thread(init_db)
+        except Exception as e:
+            print(f"FATAL ERROR: Database initialization failed: {e}")
+            # Never awaited otherwise ("coroutine was never awaited" warnings)
+            for _, coro in self.warmup_jobs:
+                coro.close()
+            self.warmup_jobs = []
+            await self.close()
+            return
+
+        # 2. Independent jobs run concurrently. Critical ones are retried; the rest are logged and skipped.
+        critical = [
+            # Starts the step event consumer, then warms the veteran cache
+            ("tutorial bus", self.tutorial_bus.start),
+            # Rolls pick from it; reloads itself after `python -m src.utils.catalog_sync`
+            ("catalog cache", catalog_cache.start),
+        ]
+        jobs = [
+            ("command sync", self.sync_commands()),
+            ("cluster bus", self.start_cluster_bus()),
+            ("loop lag monitor", loop_lag.start()),
+            # Captures the stack of whatever blocks the loop past LOOP_BLOCK_THRESHOLD_MS
+            ("loop watchdog", loop_watchdog.start()),
+        ] + self.warmup_jobs
+        self.warmup_jobs = []
+        results = await asyncio.gather(
+            *(self.start_critical(name, start) for name, start in critical),
+            *(profiler.timed("warmup", name, coro) for name, coro in jobs)
+        )
+        if not all(results[:len(critical)]):
+            # Never report ready without them (the launcher restarts the cluster)
+            print("FATAL ERROR: A critical startup step failed, shutting down")
+            await self.close()
+            return
+
+        profiler.finish()
+        self.ready_event.set()
+        print(profiler.report())
+
+    async def start_critical(self, name, start):
+        """Runs `start()` as a warmup phase, retrying with backoff. Returns False if every attempt failed."""
+        for attempt in range(1, CRITICAL_WARMUP_ATTEMPTS + 1):
+            try:
+                with profiler.phase("warmup", name):
+                    await start()
+                return True
+            except Exception as e:
+                print(f"❌ Startup step {name} failed (attempt {attempt}/{CRITICAL_WARMUP_ATTEMPTS}): {e}")
+                if attempt < CRITICAL_WARMUP_ATTEMPTS:
+                    await asyncio.sleep(CRITICAL_WARMUP_RETRY_SECONDS * attempt)
+        return False
+
+    async def start_cluster_bus(self):
+        # Invalidation from other clusters (or scripts) for state that spans guilds
+        cluster_bus.subscribe(USER_STATE_INVALIDATE, lambda m: user_state_cache.invalidate_discord_ids(m["discord_ids"]))
+        cluster_bus.subscribe(CATALOG_RELOAD, lambda m: asyncio.to_thread(catalog_cache.load))
+        await cluster_bus.start()
+
+    async def sync_commands(self):
+        # Commands are per application, not per shard: one cluster is enough
+        if CLUSTER_ID != 0:
+            return
+
+        # Skipped when the command tree hash matches the last sync
         # If ENV is 'dev', sync to specific guild. If 'prod', sync globally.
-        import os
         env = os.getenv("ENV", "prod") # Default to prod if missing
         
         if env == "dev":
             DEV_GUILD_ID = discord.Object(id=775442968177541150)
-            print(f"--- Syncing to Development Guild ({DEV_GUILD_ID.id}) ---")
             self.tree.copy_global_to(guild=DEV_GUILD_ID)
-            await self.tree.sync(guild=DEV_GUILD_ID)
+            synced = await sync_tree(self.tree, guild=DEV_GUILD_ID)
+            scope = f"Development Guild ({DEV_GUILD_ID.id})"
+        else:
+            synced = await sync_tree(self.tree)
+            scope = "Global (may take up to 1 hour to propagate)"
+
+        if synced is None:
+            print(f"--- Commands unchanged, skipped {scope} sync ---")
         else:
-            print("--- Syncing Globally (This may take up to 1 hour) ---")
-            await self.tree.sync()
-            
-        print("--- Sync Complete ---")
+            print(f"--- Synced {synced} commands: {scope} ---")
+
+    async def on_app_command_completion(self, interaction, command):
+        record_command(interaction, "ok")
 
     async def on_ready(self):
+        if not self._gateway_marked:
+            # on_ready fires again after reconnects; only the first one is part of startup
+            self._gateway_marked = True
+            profiler.mark("startup", "gateway ready", 0.0)
         print(f"Logged in as {self.user} (ID: {self.user.id})")
         print("------")
         await self.change_presence(activity=discord.Game(name="Start your journey with /tutorial"))
+
+    async def close(self):
+        # A shutdown during warmup (but not one requested by warmup itself) stops it
+        if self.warmup_task and self.warmup_task is not asyncio.current_task():
+            self.warmup_task.cancel()
+        # Flush pending tutorial events before the loop goes away
+        await self.tutorial_bus.close()
+        await catalog_cache.close()
+        await cluster_bus.close()
+        await loop_watchdog.close()
+        await loop_lag.close()
+        await super().close()
+
 async def main():
     bot = SoccerBot()
 
     @bot.command(name="sync")
     @commands.is_owner()
-    async def sync(ctx):
+    async def sync(ctx, scope: str = "guild"):
+        # Always syncs, even if the command hash says nothing changed
+        if scope == "global":
+            synced = await sync_tree(bot.tree, force=True)
+            await ctx.send(f"✅ Synced {synced} commands globally (may take up to 1 hour to show up).")
+            return
+
         # This syncs to the specific server (guild) immediately
         bot.tree.copy_global_to(guild=ctx.guild)
-        synced = await bot.tree.sync(guild=ctx.guild)
-        await ctx.send(f"✅ Synced {len(synced)} commands to this server!")
+        synced = await sync_tree(bot.tree, guild=ctx.guild, force=True)
+        await ctx.send(f"✅ Synced {synced} commands to this server!")
 
     @bot.command(name="fix_duplicates")
     @commands.is_owner()
@@ -67,7 +255,8 @@ async def main():
         bot.tree.clear_commands(guild=ctx.guild)
         
         # 2. Sync this empty queue to the guild (effectively deleting the guild commands on Discord's side)
-        await bot.tree.sync(guild=ctx.guild)
+        # Through sync_tree so the stored hash matches the now-empty guild
+        await sync_tree(bot.tree, guild=ctx.guild, force=True)
         
         await ctx.send("✅ Guild-specific commands cleared! You should now only see the Global commands (updates might take 1 hour).")
         
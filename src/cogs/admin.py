@@ -0,0 +1,150 @@
+import discord
+from discord.ext import commands
+from src.database.db import get_pool_status
+from src.database.user_state import user_state_cache
+from src.utils.user_locks import user_locks
+from src.utils.rate_limit import rate_limiter
+from src.utils.startup_profiler import profiler
+from src.utils.gateway_cache import memory_report
+from src.utils.query_log import query_log
+from src.utils.loop_watchdog import loop_watchdog
+
+class AdminCog(commands.Cog):
+    """Owner-only diagnostics. Prefix commands so they never show up in the slash menu."""
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="pool")
+    @commands.is_owner()
+    async def pool(self, ctx):
+        """Shows database connection pool usage and checkout waits."""
+        status = get_pool_status()
+
+        embed = discord.Embed(title="🛢️ Database Pool", color=discord.Color.dark_grey())
+        if "size" in status:
+            embed.add_field(name="Checked Out", value=f"{status['checked_out']} / {status['capacity']}", inline=True)
+            embed.add_field(name="Overflow", value=str(status["overflow"]), inline=True)
+            embed.add_field(name="Saturation", value=f"{status['saturation']:.0%}", inline=True)
+        else:
+            embed.description = "Engine is not using a queue pool (SQLite)."
+
+        embed.add_field(name="Checkouts", value=f"{status['checkouts']:,}", inline=True)
+        embed.add_field(name="Avg Wait", value=f"{status['avg_wait_ms']:.1f} ms", inline=True)
+        embed.add_field(name="Max Wait", value=f"{status['max_wait_ms']:.1f} ms", inline=True)
+        embed.add_field(name="Timeouts", value=str(status["timeouts"]), inline=True)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="cache")
+    @commands.is_owner()
+    async def cache(self, ctx):
+        """Shows user state cache size and hit ratio."""
+        stats = user_state_cache.snapshot()
+
+        embed = discord.Embed(title="🧠 User State Cache", color=discord.Color.dark_grey())
+        embed.add_field(name="Entries", value=f"{stats['size']:,} / {user_state_cache.max_size:,}", inline=True)
+        embed.add_field(name="Hit Ratio", value=f"{stats['hit_ratio']:.1%}", inline=True)
+        embed.add_field(name="Hits / Misses", value=f"{stats['hits']:,} / {stats['misses']:,}", inline=True)
+        embed.add_field(name="Evictions", value=f"{stats['evictions']:,}", inline=True)
+        embed.add_field(name="Expired", value=f"{stats['expired']:,}", inline=True)
+        embed.add_field(name="Invalidations", value=f"{stats['invalidations']:,}", inline=True)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="locks")
+    @commands.is_owner()
+    async def locks(self, ctx):
+        """Shows per-user lock usage and wait times."""
+        stats = user_locks.snapshot()
+
+        embed = discord.Embed(title="🔒 User Locks", color=discord.Color.dark_grey())
+        embed.add_field(name="Live Locks", value=f"{stats['live_locks']:,}", inline=True)
+        embed.add_field(name="Acquired", value=f"{stats['acquired']:,}", inline=True)
+        embed.add_field(name="Contended", value=f"{stats['contended']:,}", inline=True)
+        embed.add_field(name="Busy Replies", value=f"{stats['timeouts']:,}", inline=True)
+        embed.add_field(name="Avg Wait", value=f"{stats['avg_wait_ms']:.1f} ms", inline=True)
+        embed.add_field(name="Max Wait", value=f"{stats['max_wait'] * 1000:.1f} ms", inline=True)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="throttle")
+    @commands.is_owner()
+    async def throttle(self, ctx):
+        """Shows rate limiter counts per command group."""
+        embed = discord.Embed(title="⏳ Rate Limits", color=discord.Color.dark_grey())
+        for group, counts in sorted(rate_limiter.stats.items()):
+            embed.add_field(
+                name=group,
+                value=f"Allowed: **{counts['allowed']:,}**\nQueued: **{counts['queued']:,}**\nRejected: **{counts['rejected']:,}**",
+                inline=True
+            )
+        if not rate_limiter.stats:
+            embed.description = "No throttled commands used yet."
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="startup")
+    @commands.is_owner()
+    async def startup(self, ctx):
+        """Shows where boot time went: imports, extensions, DB, warmup jobs."""
+        report = profiler.report()
+        if len(report) > 1900:
+            report = report[:1900] + "\n..."
+        await ctx.send(f"```\n{report}\n```")
+
+    @commands.command(name="memory")
+    @commands.is_owner()
+    async def memory(self, ctx):
+        """Shows process memory and the size of every cache (discord.py's and ours)."""
+        report = memory_report(self.bot)
+        policy = getattr(self.bot, "cache_policy", None)
+
+        embed = discord.Embed(title="🧮 Memory", color=discord.Color.dark_grey())
+        rss = report["rss_bytes"]
+        embed.description = f"RSS: **{rss / 1024 / 1024:,.1f} MiB**" if rss else "RSS: unavailable"
+        if policy:
+            embed.description += f"\nProfile: **{policy['profile']}** (member cache: {policy['member_cache']}, message cache: {policy['message_cache_size']})"
+
+        embed.add_field(name="Guilds", value=f"{report['guilds']:,}", inline=True)
+        embed.add_field(name="Members", value=f"{report['members']:,} cached / {report['member_counts']:,}", inline=True)
+        embed.add_field(name="Users", value=f"{report['users']:,}", inline=True)
+        embed.add_field(name="Messages", value=f"{report['messages']:,}", inline=True)
+        embed.add_field(name="Channels", value=f"{report['channels']:,}", inline=True)
+        embed.add_field(name="Roles", value=f"{report['roles']:,}", inline=True)
+        embed.add_field(name="Emojis / Stickers", value=f"{report['emojis']:,} / {report['stickers']:,}", inline=True)
+        embed.add_field(name="DM Channels", value=f"{report['private_channels']:,}", inline=True)
+        embed.add_field(name="Persistent Views", value=f"{report['views']:,}", inline=True)
+        embed.add_field(name="User State Cache", value=f"{report['user_state_cache']:,}", inline=True)
+        embed.add_field(name="Catalog Players", value=f"{report['catalog_players']:,}", inline=True)
+        embed.add_field(name="Rate Buckets / Locks", value=f"{report['rate_limit_buckets']:,} / {report['user_locks']:,}", inline=True)
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name="queries")
+    @commands.is_owner()
+    async def queries(self, ctx, limit: int = 3):
+        """Shows the latest interactions the query log flagged (slow, too many queries, N+1)."""
+        if not query_log.enabled:
+            await ctx.send("Query log is off. Set `QUERY_LOG=true` to record SQL per interaction.")
+            return
+        reports = list(query_log.recent)[-max(1, limit):]
+        if not reports:
+            await ctx.send("✅ No flagged interactions yet.")
+            return
+
+        text = "\n\n".join(query_log.format_report(report, shape_chars=100) for report in reversed(reports))
+        if len(text) > 1900:
+            text = text[:1900] + "\n..."
+        await ctx.send(f"```\n{text}\n```")
+
+    @commands.command(name="blocking")
+    @commands.is_owner()
+    async def blocking(self, ctx):
+        """Shows which commands blocked the event loop recently, and the worst stack."""
+        report = loop_watchdog.report()
+        if len(report) > 1900:
+            report = report[:1900] + "\n..."
+        await ctx.send(f"```\n{report}\n```")
+
+async def setup(bot):
+    await bot.add_cog(AdminCog(bot))
@@ -1,10 +1,16 @@
 import discord
+import functools
 from discord.ext import commands
 from discord import app_commands
 from src.services.gacha_service import GachaService
-from src.database.db import get_session
+from src.database.db import get_session, session_scope
+from src.database.unit_of_work import UnitOfWork
 from datetime import datetime, timedelta
 from src.views.free_claim_view import FreeClaimView
+from src.utils.user_locks import serialized
+from src.utils.query_log import traced
+from src.utils.rate_limit import rate_limited
+from src.database.user_state import user_state_cache
 
 class ClaimView(discord.ui.View):
     def __init__(self, service, guild_id, player_id):
@@ -25,6 +31,8 @@ class ClaimView(discord.ui.View):
             await self.message.edit(view=self)
 
     @discord.ui.button(label="Claim!", style=discord.ButtonStyle.green, emoji="⚽")
+    @serialized
+    @traced("claim button")
     async def claim_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # 1. Defer/Acknowledge the interaction
         await interaction.response.defer() 
@@ -61,17 +69,7 @@ class ClaimView(discord.ui.View):
                     ephemeral=False
                 )
 
-                try:
-                    from src.services.tutorial_service import TutorialService
-
-                    tut_service = TutorialService(session) 
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "1_claim")
-
-                    if tut_msg:
-                        await interaction.followup.send(tut_msg)
-    
-                except Exception as e:
-                    print(f"Tutorial Error: {e}")
+                interaction.client.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "1_claim", interaction.followup.send)
 
                 self.stop() 
             else:
@@ -89,9 +87,8 @@ class ClaimView(discord.ui.View):
             session.close()
 
 class CollectionView(discord.ui.View):
-    def __init__(self, service, discord_id, guild_id, username, target_user_id=None):
+    def __init__(self, discord_id, guild_id, username, target_user_id=None):
         super().__init__(timeout=60)
-        self.service = service
         self.discord_id = discord_id
         self.guild_id = guild_id
         self.username = username
@@ -99,13 +96,15 @@ class CollectionView(discord.ui.View):
         self.page = 1 
 
     async def update_embed(self, interaction):
-        data = self.service.get_user_collection(
-            self.discord_id, 
-            self.guild_id, 
-            page=self.page, 
-            per_page=1,
-            target_user_id=self.target_user_id
-        )
+        # The command's session is closed by now: reusing it would check out a connection nobody returns
+        with session_scope() as session:
+            data = GachaService(session).get_user_collection(
+                self.discord_id, 
+                self.guild_id, 
+                page=self.page, 
+                per_page=1,
+                target_user_id=self.target_user_id
+            )
         
         if data["total"] == 0:
             await interaction.response.send_message("You don't have any players yet!", ephemeral=True)
@@ -138,8 +137,8 @@ class CollectionView(discord.ui.View):
         embed.add_field(name="Rarity", value=p.rarity, inline=True)
         
         # SHOW THE IMAGE
-        if p.image_url and p.image_url != "N/A":
-            embed.set_image(url=p.image_url)
+        if p.display_image:
+            embed.set_image(url=p.display_image)
 
         # Footer: Card X of Y
         embed.set_footer(text=f"Player {self.page} of {data['total']} | Obtained: {card.obtained_at.strftime('%Y-%m-%d')}")
@@ -151,11 +150,13 @@ class CollectionView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    @rate_limited("browse")
     async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         self.page -= 1
         await self.update_embed(interaction)
 
     @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    @rate_limited("browse")
     async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         self.page += 1
         await self.update_embed(interaction)
@@ -165,17 +166,26 @@ class GachaCog(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="r", description="Roll for a random player.")
+    @rate_limited("roll")
+    @serialized
     async def roll(self, interaction: discord.Interaction):
+        # 0. Out of rolls? Answer from the cached state without deferring or opening a session
+        state = user_state_cache.get(interaction.user.id, interaction.guild_id)
+        if state:
+            rules = GachaService(None)
+            if rules.available_rolls(state) <= 0:
+                reset_in = rules.get_next_reset_time(state.last_roll_reset, rules.ROLL_RESET_MINUTES)
+                await interaction.response.send_message(f"❌ ⏳ You are out of rolls! Reset in: **{reset_in}**")
+                return
+
         # Defer the interaction response immediately for long-running processes
         await interaction.response.defer() 
         
-        # 1. Setup Database Session
-        session = get_session()
-        service = GachaService(session)
-
         try:
-            # 2. Call the Business Logic
-            result = service.roll_card(str(interaction.user.id), str(interaction.guild_id), interaction.user.name)
+            # 1-2. One unit of work: the user is loaded once and everything commits together
+            with UnitOfWork() as uow:
+                service = GachaService(uow.session)
+                result = service.roll_card(str(interaction.user.id), str(interaction.guild_id), interaction.user.name)
 
             if not result["success"]:
                 await interaction.followup.send(f"❌ {result['message']}")
@@ -195,8 +205,8 @@ class GachaCog(commands.Cog):
             embed.add_field(name="Position", value=player.positions, inline=True)
             embed.add_field(name="Value", value=f"{player.value} 💠", inline=True)
             
-            if player.image_url and player.image_url != "N/A":
-                embed.set_image(url=player.image_url)
+            if player.display_image:
+                embed.set_image(url=player.display_image)
             
             embed.set_footer(text=f"Rolls: {result['rolls_remaining']} | ID: {player.id}")
 
@@ -228,25 +238,14 @@ class GachaCog(commands.Cog):
                     f"🔔 **Scout Alert!** {mentions} — **{result['player'].name}** just appeared!"
                 )
         
-            try:
-                from src.services.tutorial_service import TutorialService
-
-                tut_service = TutorialService(session) 
-                tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "1_roll")
-
-                if tut_msg:
-                    await interaction.followup.send(tut_msg)
-    
-            except Exception as e:
-                print(f"Tutorial Error: {e}")
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "1_roll", interaction.followup.send)
 
         except Exception as e:
             await interaction.followup.send("An unexpected error occurred during the roll.")
             print(f"Error in roll slash command: {e}")
-        finally:
-            session.close()
 
     @app_commands.command(name="collection", description="View your collection.")
+    @rate_limited("browse")
     async def collection(self, interaction: discord.Interaction, user: discord.User = None, page: int = 1):
         await interaction.response.defer()
         
@@ -300,13 +299,13 @@ class GachaCog(commands.Cog):
             embed.add_field(name="Position", value=p.positions, inline=True)
             embed.add_field(name="Rarity", value=p.rarity, inline=True)
 
-            if p.image_url and p.image_url != "N/A":
-                embed.set_image(url=p.image_url)
+            if p.display_image:
+                embed.set_image(url=p.display_image)
 
             embed.set_footer(text=f"Player {start_page} of {data['total']} | Obtained: {card.obtained_at.strftime('%Y-%m-%d')}")
 
             # 3. Create View
-            view = CollectionView(service, str(interaction.user.id), str(interaction.guild_id), interaction.user.display_name, target_user_id=target_id_str)
+            view = CollectionView(str(interaction.user.id), str(interaction.guild_id), interaction.user.display_name, target_user_id=target_id_str)
             view.page = start_page
 
             view.children[0].disabled = (start_page == 1)
@@ -316,23 +315,9 @@ class GachaCog(commands.Cog):
             await interaction.followup.send(embed=embed, view=view)
 
             # --- TUTORIAL HOOK ---
-            try:
-                from src.services.tutorial_service import TutorialService
-                tut_service = TutorialService(session) 
-                
-                # Check if viewing self or other
-                if not user or user.id == interaction.user.id:
-                    # Tutorial 3: View Collection
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "3_view")
-                else:
-                    # Tutorial 3: View Other
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "3_view_other")
-
-                if tut_msg:
-                    await interaction.followup.send(tut_msg)
-        
-            except Exception as e:
-                print(f"Tutorial Error: {e}")
+            # Check if viewing self (3_view) or other (3_view_other)
+            step_key = "3_view" if not user or user.id == interaction.user.id else "3_view_other"
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, step_key, interaction.followup.send)
             # ---------------------
             
         except Exception as e:
@@ -342,6 +327,8 @@ class GachaCog(commands.Cog):
             session.close()
 
     @app_commands.command(name="sell", description="Sell a player for coins.")
+    @rate_limited("default")
+    @serialized
     async def sell(self, interaction: discord.Interaction, player_name: str):
         await interaction.response.defer(ephemeral=True)
         session = get_session()
@@ -354,12 +341,7 @@ class GachaCog(commands.Cog):
                 await interaction.followup.send(f"Sold **{result['player_name']}** for **{result['coins']}** 💠.\n New Balance: {result['new_balance']} 💠", ephemeral=True)
                 
                 # --- TUTORIAL HOOK ---
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "3_sell")
-                    if tut_msg: await interaction.followup.send(tut_msg, ephemeral=True)
-                except Exception as e: print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "3_sell", functools.partial(interaction.followup.send, ephemeral=True))
                 # ---------------------
 
             else:
@@ -368,6 +350,8 @@ class GachaCog(commands.Cog):
             session.close()
 
     @app_commands.command(name="sort", description="Sort your collection by highest value.")
+    @rate_limited("default")
+    @serialized
     async def sort(self, interaction: discord.Interaction):
         await interaction.response.defer()
         session = get_session()
@@ -379,23 +363,15 @@ class GachaCog(commands.Cog):
             if result["success"]:
                 await interaction.followup.send(f"Collection sorted! Your **{result['count']}** cards are now ordered by Value (Highest to Lowest). Check `/collection`.")
 
-                try:
-                    from src.services.tutorial_service import TutorialService
-
-                    tut_service = TutorialService(session) 
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "3_sort")
-
-                    if tut_msg:
-                        await interaction.followup.send(tut_msg)
-            
-                except Exception as e:
-                    print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "3_sort", interaction.followup.send)
             else:
                 await interaction.followup.send(f"❌ {result['message']}")
         finally:
             session.close()
 
     @app_commands.command(name="move", description="Move a player to a specific page number.")
+    @rate_limited("default")
+    @serialized
     async def move(self, interaction: discord.Interaction, player_name: str, page: int):
         await interaction.response.defer()
         session = get_session()
@@ -408,12 +384,7 @@ class GachaCog(commands.Cog):
                 await interaction.followup.send(f"Moved **{result['player']}** to Page **{result['page']}**.")
 
                 # --- TUTORIAL HOOK ---
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "3_move")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except Exception as e: print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "3_move", interaction.followup.send)
                 # ---------------------
 
             else:
@@ -422,6 +393,8 @@ class GachaCog(commands.Cog):
             session.close()
 
     @app_commands.command(name="daily", description="Claim your daily reward")
+    @rate_limited("default")
+    @serialized
     async def daily(self, interaction: discord.Interaction):
         await interaction.response.defer()
         session = get_session()
@@ -443,23 +416,14 @@ class GachaCog(commands.Cog):
                 
                 await interaction.followup.send(embed=embed)
 
-                try:
-                    from src.services.tutorial_service import TutorialService
-
-                    tut_service = TutorialService(session) 
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "2_daily")
-
-                    if tut_msg:
-                        await interaction.followup.send(tut_msg)
-            
-                except Exception as e:
-                    print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "2_daily", interaction.followup.send)
             else:
                 await interaction.followup.send(result["message"], ephemeral=True)
         finally:
             session.close()
 
     @app_commands.command(name="setclub", description="Set your favorite football club.")
+    @serialized
     async def setclub(self, interaction: discord.Interaction, club_name: str):
         await interaction.response.defer()
         session = get_session()
@@ -472,17 +436,7 @@ class GachaCog(commands.Cog):
                 # Success Case
                 await interaction.followup.send(f"Your favorite club has been set to **{result['club']}**!")
 
-                try:
-                    from src.services.tutorial_service import TutorialService
-
-                    tut_service = TutorialService(session) 
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "2_setclub")
-
-                    if tut_msg:
-                        await interaction.followup.send(tut_msg)
-            
-                except Exception as e:
-                    print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "2_setclub", interaction.followup.send)
             
             elif result["reason"] == "multiple":
                 # Multiple Matches Case
@@ -506,6 +460,7 @@ class GachaCog(commands.Cog):
             session.close()
 
     @app_commands.command(name="profile", description="View your profile.")
+    @rate_limited("browse")
     async def profile(self, interaction: discord.Interaction):
         await interaction.response.defer()
         
@@ -513,22 +468,22 @@ class GachaCog(commands.Cog):
         service = GachaService(session)
 
         try:
-            user = service.get_or_create_user(str(interaction.user.id), str(interaction.guild_id), interaction.user.name)
+            # Cached state: the user row is only read when the cache misses
+            user = service.get_user_state(str(interaction.user.id), str(interaction.guild_id), interaction.user.name)
             
-            # Fetch collection count
-            # We can use the service helper if you added it, or just a quick query
-            from src.database.models import Card
-            total_cards = session.query(Card).filter_by(user_id=user.id).count()
+            # Cached too: kept current by the same write-through as the user state
+            total_cards = service.get_card_count(user.user_id)
             
-            # Rolls Display
-            if user.rolls_remaining >= user.max_rolls:
-                rolls_display = f"**{user.rolls_remaining}** (Max)"
+            # Rolls Display (refills are derived from the timers, nothing is written here)
+            rolls = service.available_rolls(user)
+            if rolls >= user.max_rolls:
+                rolls_display = f"**{rolls}** (Max)"
             else:
                 roll_timer = service.get_next_reset_time(user.last_roll_reset, service.ROLL_RESET_MINUTES)
-                rolls_display = f"**{user.rolls_remaining}** left\nRefill: **{roll_timer}**"
+                rolls_display = f"**{rolls}** left\nRefill: **{roll_timer}**"
 
             # Claims Display
-            if user.claims_remaining >= service.MAX_CLAIMS:
+            if service.available_claims(user) >= service.MAX_CLAIMS:
                 claims_display = "✅ **Ready!**"
             else:
                 claim_timer = service.get_next_reset_time(user.last_claim_reset, service.CLAIM_RESET_MINUTES)
@@ -573,17 +528,7 @@ class GachaCog(commands.Cog):
 
             await interaction.followup.send(embed=embed)
         
-            try:
-                from src.services.tutorial_service import TutorialService
-
-                tut_service = TutorialService(session) 
-                tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "2_profile")
-
-                if tut_msg:
-                    await interaction.followup.send(tut_msg)
-        
-            except Exception as e:
-                print(f"Tutorial Error: {e}")
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "2_profile", interaction.followup.send)
 
         except Exception as e:
             print(f"Error in profile: {e}")
@@ -594,6 +539,7 @@ class GachaCog(commands.Cog):
             session.close()
     
     @app_commands.command(name="view", description="View a player card.")
+    @rate_limited("browse")
     async def view(self, interaction: discord.Interaction, player_name: str):
         await interaction.response.defer()
         session = get_session()
@@ -625,8 +571,8 @@ class GachaCog(commands.Cog):
                 embed.add_field(name="Position", value=p.positions, inline=True)
                 embed.add_field(name="Rarity", value=p.rarity, inline=True)
 
-                if p.image_url and p.image_url != "N/A":
-                    embed.set_image(url=p.image_url)
+                if p.display_image:
+                    embed.set_image(url=p.display_image)
 
                 if owner:
                     embed.set_footer(text=f"Owned by {owner} | ID: {p.id}")
@@ -636,12 +582,7 @@ class GachaCog(commands.Cog):
                 await interaction.followup.send(embed=embed)
 
                 # --- TUTORIAL HOOK ---
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "4_view")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except Exception as e: print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "4_view", interaction.followup.send)
                 # ---------------------
             
             elif result["reason"] == "multiple":
@@ -654,6 +595,7 @@ class GachaCog(commands.Cog):
             session.close()
 
     @app_commands.command(name="listclub", description="List players from a specific club.")
+    @rate_limited("browse")
     async def club_checklist(self, interaction: discord.Interaction, club_name: str):
         await interaction.response.defer()
         session = get_session()
@@ -696,12 +638,7 @@ class GachaCog(commands.Cog):
             await interaction.followup.send(embed=embed)
 
             # --- TUTORIAL HOOK ---
-            try:
-                from src.services.tutorial_service import TutorialService
-                tut_service = TutorialService(session)
-                tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "4_listclub")
-                if tut_msg: await interaction.followup.send(tut_msg)
-            except Exception as e: print(f"Tutorial Error: {e}")
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "4_listclub", interaction.followup.send)
             # ---------------------
             
         except Exception as e:
@@ -711,6 +648,7 @@ class GachaCog(commands.Cog):
             session.close()
 
     @app_commands.command(name="freeclaim", description="Use a Free Claim ticket to instantly refresh your claim.")
+    @serialized
     async def free_claim(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True) # Ephemeral so only they see the confirm prompt
         
@@ -757,6 +695,7 @@ class GachaCog(commands.Cog):
         app_commands.Choice(name="➕ Add Player", value="add"),
         app_commands.Choice(name="➖ Remove Player", value="remove")
     ])
+    @serialized
     async def shortlist(self, interaction: discord.Interaction, action: app_commands.Choice[str], player_name: str = None):
         await interaction.response.defer()
         session = get_session()
@@ -792,12 +731,7 @@ class GachaCog(commands.Cog):
                     await interaction.followup.send(f"✅ Added **{result['player']}** to shortlist! ({result['slots']})")
                     
                     # --- TUTORIAL HOOK ---
-                    try:
-                        from src.services.tutorial_service import TutorialService
-                        tut_service = TutorialService(session)
-                        tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "4_shortlist")
-                        if tut_msg: await interaction.followup.send(tut_msg)
-                    except Exception as e: print(f"Tutorial Error: {e}")
+                    self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "4_shortlist", interaction.followup.send)
                     # ---------------------
 
                 else:
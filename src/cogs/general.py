@@ -4,6 +4,7 @@ from discord import app_commands
 from datetime import datetime, timezone
 from src.database.db import get_session
 from src.database.models import User
+from src.services.gacha_service import GachaService
 
 class GeneralCog(commands.Cog):
     def __init__(self, bot):
@@ -201,10 +202,11 @@ class GeneralCog(commands.Cog):
                 return
 
             # 2. Check if they are already full (Prevent Waste)
-            # using 'rolls_remaining' based on your screenshot
-            if user.rolls_remaining >= user.max_rolls:
+            # Refills are derived from the timer, so a passed window also counts as full
+            rolls = GachaService(session).available_rolls(user)
+            if rolls >= user.max_rolls:
                 await interaction.response.send_message(
-                    f"❌ Your rolls are already full (**{user.rolls_remaining}/{user.max_rolls}**)! \nSave your ticket for later.", 
+                    f"❌ Your rolls are already full (**{rolls}/{user.max_rolls}**)! \nSave your ticket for later.", 
                     ephemeral=True
                 )
                 return
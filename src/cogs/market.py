@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 from src.database.db import get_session
 from src.services.transfer_service import TransferService
+from src.utils.user_locks import serialized
 
 class MarketCog(commands.Cog):
     def __init__(self, bot):
@@ -15,6 +16,7 @@ class MarketCog(commands.Cog):
         app_commands.Choice(name="➕ Add Player", value="add"),
         app_commands.Choice(name="➖ Remove Player", value="remove"),
     ])
+    @serialized
     async def market(self, interaction: discord.Interaction, action: str, player_name: str = None):
         await interaction.response.defer()
         session = get_session()
@@ -39,12 +41,7 @@ class MarketCog(commands.Cog):
                     await interaction.followup.send(embed=embed)
 
                     # --- TUTORIAL HOOK: 7_tm_add ---
-                    try:
-                        from src.services.tutorial_service import TutorialService
-                        tut_service = TutorialService(session)
-                        tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "7_tm_add")
-                        if tut_msg: await interaction.channel.send(f"{interaction.user.mention}\n{tut_msg}")
-                    except Exception as e: print(f"Tutorial Error: {e}")
+                    self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "7_tm_add", lambda msg: interaction.channel.send(f"{interaction.user.mention}\n{msg}"))
                     # -------------------------------
 
                 else:
@@ -71,12 +68,7 @@ class MarketCog(commands.Cog):
                     await interaction.followup.send(embed=embed)
 
                     # --- TUTORIAL HOOK: 7_tm_sold ---
-                    try:
-                        from src.services.tutorial_service import TutorialService
-                        tut_service = TutorialService(session)
-                        tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "7_tm_sold")
-                        if tut_msg: await interaction.channel.send(f"{interaction.user.mention}\n{tut_msg}")
-                    except Exception as e: print(f"Tutorial Error: {e}")
+                    self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "7_tm_sold", lambda msg: interaction.channel.send(f"{interaction.user.mention}\n{msg}"))
                     # --------------------------------
                     
                 elif status["status"] == "waiting":
@@ -2,13 +2,15 @@ import discord
 import asyncio
 from discord.ext import commands
 from discord import app_commands
-from src.database.db import get_session
+from src.database.db import session_scope
 from src.services.match_service import MatchService
 from src.views.match_view import MatchChallengeView
+from src.utils.user_locks import user_locks
 
 class MatchCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.live_matches = 0 # Matches between wager and payout, for /metrics
 
     @app_commands.command(name="match", description="Challenge another player to a match (30 mins).")
     @app_commands.describe(opponent="The user you want to play against", wager="Amount of coins to bet")
@@ -23,13 +25,14 @@ class MatchCog(commands.Cog):
             await interaction.followup.send("Minimum wager is **500** 💠.", ephemeral=True)
             return
 
-        session = get_session()
-        service = MatchService(session)
-
+        live = False
         try:
             # 1. Validate
-            home_stats = service.get_team_power(interaction.user.id, interaction.guild_id)
-            away_stats = service.get_team_power(opponent.id, interaction.guild_id)
+            # Short session: the connection goes back to the pool before we wait on the opponent
+            with session_scope() as session:
+                service = MatchService(session)
+                home_stats = service.get_team_power(interaction.user.id, interaction.guild_id)
+                away_stats = service.get_team_power(opponent.id, interaction.guild_id)
 
             if not home_stats["valid"]:
                 await interaction.followup.send(f"❌ You cannot play: {home_stats['message']}", ephemeral=True)
@@ -63,30 +66,26 @@ class MatchCog(commands.Cog):
                 return
 
             # 3. Start Match Logic
-            if not service.process_wager(home_stats["user"].id, away_stats["user"].id, wager):
+            # Both players' locks: no /sell or /r of theirs can interleave with the wager
+            async with user_locks.hold(interaction.guild_id, interaction.user.id, opponent.id):
+                with session_scope() as session:
+                    wager_taken = MatchService(session).process_wager(home_stats["user"].id, away_stats["user"].id, wager)
+            if not wager_taken:
                 await interaction.edit_original_response(content="Transaction failed (balance changed). Match cancelled.", view=None)
                 return
+            live = True
+            self.live_matches += 1
             
-            try:
-                from src.services.tutorial_service import TutorialService
-                tut_service = TutorialService(session) 
-                
-                # 1. Challenger
-                msg_challenger = tut_service.complete_step(interaction.user.id, interaction.guild_id, "8_match")
-                
-                # 2. Opponent
-                msg_opponent = tut_service.complete_step(opponent.id, interaction.guild_id, "8_match")
-
-                # 3. Send Notifications
-                # We use channel.send because we don't want to mess up the match embed
-                if msg_challenger:
-                    await interaction.channel.send(f"{interaction.user.mention}\n{msg_challenger}")
-                
-                if msg_opponent:
-                    await interaction.channel.send(f"{opponent.mention}\n{msg_opponent}")
-
-            except Exception as e:
-                print(f"Tutorial Error: {e}")
+            # Tutorial step for both players.
+            # We use channel.send because we don't want to mess up the match embed
+            self.bot.tutorial_bus.publish(
+                interaction.user.id, interaction.guild_id, "8_match",
+                lambda msg: interaction.channel.send(f"{interaction.user.mention}\n{msg}")
+            )
+            self.bot.tutorial_bus.publish(
+                opponent.id, interaction.guild_id, "8_match",
+                lambda msg: interaction.channel.send(f"{opponent.mention}\n{msg}")
+            )
 
             # Pre-calculate the entire match script
             match_data = service.simulate_match(home_stats, away_stats)
@@ -144,7 +143,11 @@ class MatchCog(commands.Cog):
                 await asyncio.sleep(remaining_time)
 
             # 6. Payout
-            service.payout(home_stats["user"].id, away_stats["user"].id, match_data["winner"], wager)
+            async with user_locks.hold(interaction.guild_id, interaction.user.id, opponent.id):
+                with session_scope() as session:
+                    MatchService(session).payout(home_stats["user"].id, away_stats["user"].id, match_data["winner"], wager)
+            live = False
+            self.live_matches -= 1
             
             winner_text = "Draw!"
             if match_data["winner"] == "home":
@@ -168,7 +171,8 @@ class MatchCog(commands.Cog):
             print(f"Error in match command: {e}")
             await interaction.followup.send("An error occurred.", ephemeral=True)
         finally:
-            session.close()
+            if live:
+                self.live_matches -= 1
 
 async def setup(bot):
     await bot.add_cog(MatchCog(bot))
\ No newline at end of file
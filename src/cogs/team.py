@@ -3,6 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 from src.services.team_service import TeamService
 from src.database.db import get_session
+from src.database.unit_of_work import UnitOfWork
+from src.utils.user_locks import serialized
 
 class TeamCog(commands.Cog):
     def __init__(self, bot):
@@ -22,6 +24,7 @@ class TeamCog(commands.Cog):
         app_commands.Choice(name="5-3-2 (Defensive)", value="5-3-2"),
         app_commands.Choice(name="4-5-1 (Control)", value="4-5-1"),
     ])
+    @serialized
     async def set_formation(self, interaction: discord.Interaction, style: app_commands.Choice[str]):
         await interaction.response.defer()
         session = get_session()
@@ -94,12 +97,7 @@ class TeamCog(commands.Cog):
 
             # Tutorial Hook (Only for self)
             if target_user.id == interaction.user.id:
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "5_view_team")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except: pass
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "5_view_team", interaction.followup.send)
 
         finally:
             session.close()
@@ -107,57 +105,38 @@ class TeamCog(commands.Cog):
     # --- SUBCOMMAND: SET (Arguments are REQUIRED here) ---
     @team_group.command(name="set", description="Add a player to your starting XI.")
     @app_commands.describe(position="Position (GK, D1-D4, M1-M3, F1-F3)", player_name="Name of the player")
+    @serialized
     async def set_player(self, interaction: discord.Interaction, position: str, player_name: str):
         await interaction.response.defer()
-        session = get_session()
-        service = TeamService(session)
-        
-        try:
-            result = service.set_lineup_player(interaction.user.id, interaction.guild_id, position, player_name)
-            await interaction.followup.send(result["message"])
+        with UnitOfWork() as uow:
+            result = TeamService(uow.session).set_lineup_player(interaction.user.id, interaction.guild_id, position, player_name)
+        await interaction.followup.send(result["message"])
 
-            # --- TUTORIAL HOOK: 5_set ---
-            # Only trigger if action was successful
-            if result.get("success"):
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "5_set")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except Exception as e: print(f"Tutorial Error: {e}")
-            # ----------------------------
-
-        finally:
-            session.close()
+        # --- TUTORIAL HOOK: 5_set ---
+        # Only trigger if action was successful
+        if result.get("success"):
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "5_set", interaction.followup.send)
+        # ----------------------------
 
     # --- SUBCOMMAND: BENCH (Argument is REQUIRED here) ---
     @team_group.command(name="bench", description="Remove a player from your starting XI.")
     @app_commands.describe(player_name="Name of the player to remove")
+    @serialized
     async def bench_player(self, interaction: discord.Interaction, player_name: str):
         await interaction.response.defer()
-        session = get_session()
-        service = TeamService(session)
-        
-        try:
-            result = service.remove_from_lineup(interaction.user.id, interaction.guild_id, player_name)
-            await interaction.followup.send(result["message"])
+        with UnitOfWork() as uow:
+            result = TeamService(uow.session).remove_from_lineup(interaction.user.id, interaction.guild_id, player_name)
+        await interaction.followup.send(result["message"])
 
-            # --- TUTORIAL HOOK: 5_bench ---
-            if result.get("success"):
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "5_bench")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except Exception as e: print(f"Tutorial Error: {e}")
-            # ------------------------------
-
-        finally:
-            session.close()
+        # --- TUTORIAL HOOK: 5_bench ---
+        if result.get("success"):
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "5_bench", interaction.followup.send)
+        # ------------------------------
 
     # --- SUBCOMMAND: RENAME ---
     @team_group.command(name="rename", description="Change your club's name.")
     @app_commands.describe(new_name="The new name for your club")
+    @serialized
     async def rename_club(self, interaction: discord.Interaction, new_name: str):
         await interaction.response.defer()
         session = get_session()
@@ -169,12 +148,7 @@ class TeamCog(commands.Cog):
 
             # --- TUTORIAL HOOK: 5_rename ---
             if result.get("success"):
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "5_rename")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except Exception as e: print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "5_rename", interaction.followup.send)
             # -------------------------------
 
         finally:
@@ -213,12 +187,7 @@ class TeamCog(commands.Cog):
             await interaction.followup.send(embed=embed)
 
             # --- TUTORIAL HOOK: 5_rewards ---
-            try:
-                from src.services.tutorial_service import TutorialService
-                tut_service = TutorialService(session)
-                tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "5_rewards")
-                if tut_msg: await interaction.followup.send(tut_msg)
-            except Exception as e: print(f"Tutorial Error: {e}")
+            self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "5_rewards", interaction.followup.send)
             # --------------------------------
 
         finally:
@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 from src.services.upgrade_service import UpgradeService
 from src.database.db import get_session
+from src.utils.user_locks import serialized
 
 class UpgradeCog(commands.Cog):
     def __init__(self, bot):
@@ -18,6 +19,7 @@ class UpgradeCog(commands.Cog):
         app_commands.Choice(name="📜 Buy: Transfer Market", value="transfer"),
         app_commands.Choice(name="🔭 Buy: Scout Network", value="scout"),
     ])
+    @serialized
     async def upgrades(self, interaction: discord.Interaction, action: app_commands.Choice[str]):
         # 1. Defer response (db ops might take a moment)
         await interaction.response.defer()
@@ -63,12 +65,7 @@ class UpgradeCog(commands.Cog):
                 await interaction.followup.send(embed=embed)
 
                 # --- TUTORIAL HOOK: 6_info ---
-                try:
-                    from src.services.tutorial_service import TutorialService
-                    tut_service = TutorialService(session)
-                    tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "6_info")
-                    if tut_msg: await interaction.followup.send(tut_msg)
-                except Exception as e: print(f"Tutorial Error: {e}")
+                self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "6_info", interaction.followup.send)
                 # -----------------------------
 
             # --- OPTION 2: BUY AN UPGRADE ---
@@ -93,12 +90,7 @@ class UpgradeCog(commands.Cog):
                         await interaction.followup.send(result["reward"])
 
                     # --- TUTORIAL HOOK: 6_buy ---
-                    try:
-                        from src.services.tutorial_service import TutorialService
-                        tut_service = TutorialService(session)
-                        tut_msg = tut_service.complete_step(interaction.user.id, interaction.guild_id, "6_buy")
-                        if tut_msg: await interaction.followup.send(tut_msg)
-                    except Exception as e: print(f"Tutorial Error: {e}")
+                    self.bot.tutorial_bus.publish(interaction.user.id, interaction.guild_id, "6_buy", interaction.followup.send)
                     # ----------------------------
 
                 else:
@@ -1,30 +1,108 @@
+import asyncio
+from collections import OrderedDict
 import discord
 from discord import app_commands
 from discord.ext import commands
 import topgg
+from aiohttp import web
+from src.config import CLUSTER_ID, METRICS_HOST, METRICS_PORT, WEBHOOK_PORT
 from src.database.db import get_session
-from src.database.models import User
+from src.services.cluster_bus import cluster_bus
+from src.services.vote_service import VoteService, RecentVotes
+from src.utils.bot_metrics import add_metrics_route, can_serve_on
+from src.utils.cluster import USER_STATE_INVALIDATE
 
 # CONFIGURATION
 WEBHOOK_PASSWORD = "jersey123"
+VOTE_BATCH_SIZE = 100        # Max votes applied per bulk UPDATE
+VOTE_DEDUP_SECONDS = 3600    # Top.gg only allows one vote per 12h, so repeats inside this window are retries
+DM_INTERVAL_SECONDS = 0.5    # Spacing between vote DMs to stay well under Discord's rate limits
+USER_CACHE_SIZE = 1000       # Recently fetched discord.User objects kept for DMs
+VOTE_RETRY_SECONDS = 30      # Delay before a failed vote is applied again
+VOTE_MAX_ATTEMPTS = 5        # After this many failures the vote is logged for a manual re-credit
+DM_DRAIN_SECONDS = 10        # How long shutdown waits for queued vote DMs
+
+_STOP = object() # Queued on unload: the worker finishes what it holds and exits
 
 class VoteCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         # Initialize the webhook manager
         self.webhook_manager = topgg.WebhookManager(bot).dbl_webhook("/vote", WEBHOOK_PASSWORD)
-        
-        # Start the server in the background
-        self.bot.loop.create_task(self.start_webhook())
+        self.metrics_runner = None
+
+        # Votes are queued by the listener and applied by a background worker
+        self.vote_queue = asyncio.Queue()
+        self.dm_queue = asyncio.Queue()
+        self.recent_votes = RecentVotes(window_seconds=VOTE_DEDUP_SECONDS)
+        self.user_cache = OrderedDict()
+        self.vote_attempts = {} # vote -> failed attempts so far
+        self.retries = {}       # vote -> TimerHandle that re-queues it
+        self.workers = []
+
+    async def cog_load(self):
+        self.workers = [
+            asyncio.create_task(self.vote_worker()),
+            asyncio.create_task(self.dm_worker())
+        ]
+        # The webhook server starts with the rest of the warmup, while the gateway connects.
+        # Only one cluster can bind the port; rewards reach the others through the cluster bus.
+        if CLUSTER_ID == 0:
+            self.bot.add_warmup("topgg webhook", self.start_webhook())
+        self.bot.add_warmup("metrics server", self.start_metrics_server())
+
+    async def cog_unload(self):
+        """
+        The webhook already answered 200 for every queued vote, so Top.gg will not
+        send them again: apply them (and send their DMs) before the workers stop.
+        """
+        if self.workers:
+            vote_worker, dm_worker = self.workers
+            self.vote_queue.put_nowait(_STOP)
+            await vote_worker
+
+            pending = []
+            for vote, handle in self.retries.items():
+                handle.cancel()
+                pending.append(vote)
+            self.retries.clear()
+            while not self.vote_queue.empty():
+                vote = self.vote_queue.get_nowait()
+                if vote is not _STOP:
+                    pending.append(vote)
+            for i in range(0, len(pending), VOTE_BATCH_SIZE):
+                await self.process_votes(pending[i:i + VOTE_BATCH_SIZE], retry=False)
+
+            self.dm_queue.put_nowait(_STOP)
+            try:
+                await asyncio.wait_for(dm_worker, DM_DRAIN_SECONDS)
+            except asyncio.TimeoutError:
+                print(f"[Vote] Shutdown: {self.dm_queue.qsize()} vote DMs were not sent")
+            self.workers = []
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
 
     async def start_webhook(self):
-        """Starts the webhook server on port 5000."""
+        """Starts the public webhook server on WEBHOOK_PORT."""
         try:
-            await self.webhook_manager.run(5000)
-            print("[System] Top.gg Webhook running on port 5000")
+            await self.webhook_manager.run(WEBHOOK_PORT)
+            print(f"[System] Top.gg Webhook running on port {WEBHOOK_PORT}")
         except Exception as e:
             print(f"[Error] Failed to start webhook: {e}")
 
+    async def start_metrics_server(self):
+        """Serves /metrics on its own port, kept off the public webhook server."""
+        port = METRICS_PORT + CLUSTER_ID
+        if not can_serve_on(METRICS_HOST):
+            print(f"[Error] Not serving /metrics on {METRICS_HOST}: set METRICS_TOKEN to expose it beyond localhost")
+            return
+        app = web.Application()
+        add_metrics_route(app)
+        self.metrics_runner = web.AppRunner(app)
+        await self.metrics_runner.setup()
+        await web.TCPSite(self.metrics_runner, METRICS_HOST, port).start()
+        print(f"[System] Metrics running on {METRICS_HOST}:{port}")
+
     # --- NEW: The /vote Command ---
     @app_commands.command(name="vote", description="Get the link to vote and earn rewards.")
     async def vote(self, interaction: discord.Interaction):
@@ -50,41 +128,137 @@ class VoteCog(commands.Cog):
     # --- Webhook Listener ---
     @commands.Cog.listener()
     async def on_dbl_vote(self, data):
-        """Triggered automatically when someone votes on Top.gg"""
+        """Triggered automatically when someone votes on Top.gg. Only enqueues; the worker does the DB work."""
         user_id = int(data["user"])
+        key = (user_id, data.get("type"))
+
+        if not self.recent_votes.begin(key):
+            print(f"[Vote] Ignoring duplicate delivery for User ID: {user_id}")
+            return
+
         print(f"[Vote] Received from User ID: {user_id}")
-        
+        self.vote_queue.put_nowait(key)
+
+    # --- Background Workers ---
+    def apply_batch(self, user_ids):
         session = get_session()
         try:
-            # Get ALL instances of this user across all servers
-            user_profiles = session.query(User).filter_by(discord_id=str(user_id)).all()
-            
-            if not user_profiles:
-                print(f"[Vote] User {user_id} voted but has no profile in database.")
+            return VoteService(session).apply_rewards(user_ids)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def apply_votes(self, votes):
+        """
+        Applies (user_id, type) votes in one bulk UPDATE, or one voter at a time if that fails.
+        Returns ({discord_id: profiles_rewarded}, applied votes, failed votes). Applied votes are marked
+        done; failed ones stay in flight for process_votes to retry.
+        """
+        try:
+            # Off the event loop so a burst of votes never blocks the gateway
+            rewarded = await asyncio.to_thread(self.apply_batch, [user_id for user_id, _ in votes])
+            applied, failed = list(votes), []
+        except Exception as e:
+            print(f"[Error] Vote batch of {len(votes)} failed ({e}); applying one by one")
+            rewarded, applied, failed = {}, [], []
+            for vote in votes:
+                try:
+                    rewarded.update(await asyncio.to_thread(self.apply_batch, [vote[0]]))
+                    applied.append(vote)
+                except Exception as e:
+                    print(f"[Error] Vote for User {vote[0]} failed: {e}")
+                    failed.append(vote)
+
+        for vote in applied:
+            self.recent_votes.done(vote)
+            self.vote_attempts.pop(vote, None)
+        return rewarded, applied, failed
+
+    def retry_later(self, vote, retry=True):
+        """Re-queues a failed vote after VOTE_RETRY_SECONDS; past VOTE_MAX_ATTEMPTS (or with retry=False) gives up."""
+        attempts = self.vote_attempts.get(vote, 0) + 1
+        if retry and attempts < VOTE_MAX_ATTEMPTS:
+            self.vote_attempts[vote] = attempts
+            self.retries[vote] = asyncio.get_running_loop().call_later(VOTE_RETRY_SECONDS, self.requeue, vote)
+            return
+        # Top.gg will not resend it: this line is the only record of the vote
+        print(f"[Vote] LOST vote {vote[1]} for User {vote[0]} after {attempts} attempts; re-credit it manually")
+        self.vote_attempts.pop(vote, None)
+        self.recent_votes.failed(vote)
+
+    def requeue(self, vote):
+        self.retries.pop(vote, None)
+        self.vote_queue.put_nowait(vote)
+
+    async def vote_worker(self):
+        stopping = False
+        while not stopping:
+            batch = [await self.vote_queue.get()]
+            if batch[0] is _STOP:
                 return
+            while not self.vote_queue.empty() and len(batch) < VOTE_BATCH_SIZE:
+                vote = self.vote_queue.get_nowait()
+                if vote is _STOP:
+                    stopping = True
+                    break
+                batch.append(vote)
+            await self.process_votes(batch)
+
+    async def process_votes(self, batch, retry=True):
+        """Applies one batch, then invalidates other clusters, queues the DMs and schedules retries."""
+        rewarded, applied, failed = await self.apply_votes(batch)
+        for vote in failed:
+            self.retry_later(vote, retry)
+
+        # Other clusters may have these users' profiles (in their guilds) cached
+        if rewarded:
+            try:
+                await cluster_bus.publish(USER_STATE_INVALIDATE, "discord_ids", list(rewarded))
+            except Exception as e:
+                print(f"[Error] Cluster invalidation failed: {e}")
 
-            # Reward EVERY profile they have
-            for profile in user_profiles:
-                profile.coins += 250
-                profile.roll_refreshes += 1
-            
-            session.commit()
-            print(f"[Vote] Rewarded {len(user_profiles)} profiles for User {user_id}")
+        for user_id, _ in applied:
+            profiles = rewarded.get(str(user_id))
+            if not profiles:
+                print(f"[Vote] User {user_id} voted but has no profile in database.")
+                continue
+            print(f"[Vote] Rewarded {profiles} profiles for User {user_id}")
+            self.dm_queue.put_nowait(user_id)
+
+    async def resolve_user(self, user_id):
+        """Gateway cache first, then our own LRU, then the API."""
+        user = self.bot.get_user(user_id) or self.user_cache.get(user_id)
+        if user is None:
+            user = await self.bot.fetch_user(user_id)
+            self.user_cache[user_id] = user
+            if len(self.user_cache) > USER_CACHE_SIZE:
+                self.user_cache.popitem(last=False)
+        else:
+            self.user_cache.pop(user_id, None)
+            self.user_cache[user_id] = user
+        return user
+
+    async def dm_worker(self):
+        while True:
+            user_id = await self.dm_queue.get()
+            if user_id is _STOP:
+                return
 
             # Notify the user (DM) - Clean text, no emojis
             try:
-                discord_user = await self.bot.fetch_user(user_id)
+                discord_user = await self.resolve_user(user_id)
                 embed = discord.Embed(title="Vote Successful", color=discord.Color.green())
                 embed.description = "Thank you for voting. You have received **250 Coins** and **1 Roll Refill** in all your servers."
                 await discord_user.send(embed=embed)
-            except discord.Forbidden:
+            except (discord.Forbidden, discord.NotFound):
                 pass # User has DMs off
+            except Exception as e:
+                # Network errors and timeouts included: one bad DM must not stop the worker
+                print(f"[Vote] DM to {user_id} failed: {e}")
 
-        except Exception as e:
-            print(f"[Error] Processing vote failed: {e}")
-            session.rollback()
-        finally:
-            session.close()
+            await asyncio.sleep(DM_INTERVAL_SECONDS)
 
 async def setup(bot):
-    await bot.add_cog(VoteCog(bot))
\ No newline at end of file
+    await bot.add_cog(VoteCog(bot))
@@ -10,4 +10,53 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DISCORD_TOKEN:
     raise ValueError("Missing DISCORD_TOKEN in .env file")
 if not DATABASE_URL:
-    raise ValueError("Missing DATABASE_URL in .env file")
\ No newline at end of file
+    raise ValueError("Missing DATABASE_URL in .env file")
+# Connection pool (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))       # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # Seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Binary catalog snapshot (src/utils/catalog_snapshot.py); empty disables it
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "src/data/catalog.snapshot")
+
+# Last synced app command tree hashes (src/utils/command_sync.py)
+COMMAND_HASH_PATH = os.getenv("COMMAND_HASH_PATH", "src/data/command_tree_hash.json")
+
+# Gateway cache policy (src/utils/gateway_cache.py). MEMORY_PROFILE picks the defaults
+# ("default" keeps discord.py's caching, "low" is for slash-command-only shards);
+# each GATEWAY_* variable overrides one setting of the chosen profile.
+MEMORY_PROFILE = os.getenv("MEMORY_PROFILE", "default").lower()
+GATEWAY_MEMBERS_INTENT = os.getenv("GATEWAY_MEMBERS_INTENT")             # true / false
+GATEWAY_MESSAGE_CONTENT = os.getenv("GATEWAY_MESSAGE_CONTENT")           # true / false
+GATEWAY_MEMBER_CACHE = os.getenv("GATEWAY_MEMBER_CACHE")                 # all / joined / voice / none
+GATEWAY_CHUNK_AT_STARTUP = os.getenv("GATEWAY_CHUNK_AT_STARTUP")         # true / false
+GATEWAY_MESSAGE_CACHE_SIZE = os.getenv("GATEWAY_MESSAGE_CACHE_SIZE")     # 0 disables the message cache
+
+# Sharding / clusters (launcher.py sets these for each cluster process)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None   # None = Discord's recommendation
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+CLUSTER_COUNT = int(os.getenv("CLUSTER_COUNT", "1"))
+
+# Top.gg vote webhook (cluster 0 only)
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "5000"))
+
+# /metrics (src/utils/bot_metrics.py): cluster N serves it on METRICS_HOST:METRICS_PORT + N.
+# Loopback only by default. Binding any other interface requires METRICS_TOKEN
+# (scrapes then need "Authorization: Bearer <token>").
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Per-interaction SQL recorder (src/utils/query_log.py): on by default in dev.
+# Interactions slower than QUERY_LOG_SLOW_MS, with QUERY_LOG_MAX_QUERIES or more statements,
+# or repeating one statement shape QUERY_LOG_REPEAT_THRESHOLD times (N+1) are logged.
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG", "true" if os.getenv("ENV", "prod") == "dev" else "false").lower() == "true"
+QUERY_LOG_SLOW_MS = float(os.getenv("QUERY_LOG_SLOW_MS", "500"))
+QUERY_LOG_MAX_QUERIES = int(os.getenv("QUERY_LOG_MAX_QUERIES", "25"))
+QUERY_LOG_REPEAT_THRESHOLD = int(os.getenv("QUERY_LOG_REPEAT_THRESHOLD", "3"))
+
+# Event loop watchdog (src/utils/loop_watchdog.py): a stall longer than this captures the loop's stack
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "250"))
@@ -1,19 +1,121 @@
 # src/database/db.py
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, exc
 from sqlalchemy.orm import sessionmaker
-from src.config import DATABASE_URL
-from src.database.models import Base
+from sqlalchemy.pool import QueuePool
+from src.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
+from src.database.migrations import run_migrations
+from src.utils.metrics import instrument_engine
+from src.utils.query_log import query_log
+import src.database.user_state # Registers the user state write-through listeners
+
+class PoolStats:
+    """Checkout wait times recorded by TimedQueuePool."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited, timed_out=False):
+        with self.lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if timed_out:
+                self.timeouts += 1
+
+pool_stats = PoolStats()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that measures how long each checkout waits for a connection."""
+    _depth = threading.local() # _do_get retries by calling itself; only time the outer call
+
+    def _do_get(self):
+        if getattr(self._depth, "active", False):
+            return super()._do_get()
+
+        self._depth.active = True
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._depth.active = False
+            pool_stats.record(time.perf_counter() - start, timed_out)
+
+def _engine_options(url):
+    # SQLite (tests, local dev) keeps SQLAlchemy's own pool choice
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+instrument_engine(engine) # Query counts and durations for /metrics
+query_log.install(engine) # Per-interaction statements when QUERY_LOG is on
 
 # Create Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db():
-    """Creates tables if they don't exist"""
-    Base.metadata.create_all(bind=engine)
+    """Creates missing tables and applies pending schema migrations"""
+    run_migrations(engine)
 
 def get_session():
     """Returns a new DB session"""
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal()
+
+@contextmanager
+def session_scope():
+    """
+    Session for one block of work. Rolls back on error and always returns the
+    connection to the pool on exit, so close the block before any long await
+    (view.wait(), asyncio.sleep) and open a new one afterwards.
+    """
+    session = SessionLocal()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+def get_pool_status():
+    """Snapshot of pool usage and checkout waits, for the owner command and metrics."""
+    pool = engine.pool
+    with pool_stats.lock:
+        checkouts = pool_stats.checkouts
+        status = {
+            "checkouts": checkouts,
+            "timeouts": pool_stats.timeouts,
+            "avg_wait_ms": (pool_stats.total_wait / checkouts * 1000) if checkouts else 0.0,
+            "max_wait_ms": pool_stats.max_wait * 1000,
+        }
+
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "saturation": pool.checkedout() / capacity if capacity else 0.0,
+        })
+    return status
@@ -0,0 +1,55 @@
+# src/database/flags.py
+"""
+Registry of every bit stored in the integer flag columns.
+
+`tutorial_flags` (users + global_tutorials) and `users.team_rewards_flags` are
+bitmasks. A key's bit position is its index in the lists below, and those
+positions are persisted. Only ever APPEND new keys; never reorder or remove.
+"""
+
+TUTORIAL_STEP_KEYS = [
+    "1_roll", "1_claim",
+    "2_profile", "2_setclub", "2_daily",
+    "3_view", "3_sort", "3_move", "3_sell", "3_view_other",
+    "4_view", "4_listclub", "4_shortlist",
+    "5_view_team", "5_set", "5_bench", "5_rewards", "5_rename",
+    "6_info", "6_buy",
+    "7_trade", "7_tm_add", "7_tm_sold",
+    "8_match",
+]
+
+# Same order as TeamService.MILESTONES
+TEAM_MILESTONE_KEYS = [
+    "full_team", "ovl_300", "ovl_400", "ovl_500", "ovl_600", "ovl_700", "ovl_800",
+]
+
+TUTORIAL_BITS = {key: 1 << i for i, key in enumerate(TUTORIAL_STEP_KEYS)}
+MILESTONE_BITS = {key: 1 << i for i, key in enumerate(TEAM_MILESTONE_KEYS)}
+
+def mask_of(bits, keys):
+    """Combined mask for several keys, e.g. every step of one tutorial."""
+    mask = 0
+    for key in keys:
+        mask |= bits[key]
+    return mask
+
+def has_bit(flags, bit):
+    return bool((flags or 0) & bit)
+
+# --- LEGACY JSON CONVERSION (used by the flag migration) ---
+
+def tutorial_flags_from_json(raw):
+    """{"1_roll": true, ...} -> bitmask. Unknown keys are dropped."""
+    if not isinstance(raw, dict):
+        return 0
+    return mask_of(TUTORIAL_BITS, [k for k, done in raw.items() if done and k in TUTORIAL_BITS])
+
+def team_flags_from_json(raw):
+    """[true, false, ...] -> bitmask, index i maps to milestone i."""
+    if not isinstance(raw, list):
+        return 0
+    mask = 0
+    for i, claimed in enumerate(raw[:len(TEAM_MILESTONE_KEYS)]):
+        if claimed:
+            mask |= 1 << i
+    return mask
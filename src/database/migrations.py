@@ -0,0 +1,197 @@
+# src/database/migrations.py
+"""
+Versioned schema migrations.
+
+Applied versions are recorded in `schema_version`. Every migration is written
+to be idempotent, so a database that was patched by hand (or built by
+`create_all`) can run the full list safely and simply gets stamped. On
+PostgreSQL the runner holds an advisory lock, so clusters starting together
+apply each migration once instead of racing on the same DDL.
+
+Usage:
+    python -m src.database.migrations            # apply pending migrations
+    python -m src.database.migrations --status   # list applied / pending
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import inspect, text
+from src.database.models import Base
+from src.utils.migrate_flags_to_bits import migrate_flags
+
+# (index name, table, columns). Names match what `index=True` generates on the models.
+HOT_PATH_INDEXES = [
+    ("ix_cards_user_id", "cards", "user_id"),
+    ("ix_cards_player_base_id", "cards", "player_base_id"),
+    ("ix_cards_position_in_xi", "cards", "position_in_xi"),
+    ("ix_shortlists_player_base_id", "shortlists", "player_base_id"),
+    ("ix_market_listings_user_id", "market_listings", "user_id"),
+    ("ix_market_listings_available_at", "market_listings", "available_at"),
+    ("ix_player_base_rarity", "player_base", "rarity"),
+    ("ix_player_base_club", "player_base", "club"),
+    # users.discord_id alone is already served by _user_guild_uc (discord_id, guild_id):
+    # Postgres and SQLite both use the leading column of a composite index.
+]
+
+# Postgres only: GIN trigram indexes make the `ilike('%name%')` searches indexable
+TRIGRAM_INDEXES = [
+    ("ix_player_base_name_trgm", "player_base", "name"),
+    ("ix_player_base_club_trgm", "player_base", "club"),
+]
+
+def _is_postgres(conn):
+    return conn.dialect.name == "postgresql"
+
+def _drop_invalid_index(conn, name):
+    """A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that IF NOT EXISTS would keep."""
+    invalid = conn.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def _create_index(conn, name, table, columns, using=None):
+    if _is_postgres(conn):
+        # Online build: does not block writes, but cannot run inside a transaction
+        _drop_invalid_index(conn, name)
+        method = f" USING {using}" if using else ""
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({columns})"))
+    else:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+# --- MIGRATIONS ---
+
+def _add_formation(conn):
+    columns = [c["name"] for c in inspect(conn).get_columns("users")]
+    if "formation" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN formation VARCHAR DEFAULT '4-3-3'"))
+
+def _flag_bitmasks(conn):
+    migrate_flags(conn)
+
+def _hot_path_indexes(conn):
+    for name, table, columns in HOT_PATH_INDEXES:
+        _create_index(conn, name, table, columns)
+
+def _trigram_indexes(conn):
+    if not _is_postgres(conn):
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, table, column in TRIGRAM_INDEXES:
+        _create_index(conn, name, table, f"{column} gin_trgm_ops", using="gin")
+
+def _catalog_sync_columns(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("player_base")}
+    if "content_hash" not in columns:
+        conn.execute(text("ALTER TABLE player_base ADD COLUMN content_hash VARCHAR(32)"))
+    if "retired" not in columns:
+        conn.execute(text("ALTER TABLE player_base ADD COLUMN retired BOOLEAN NOT NULL DEFAULT false"))
+    # catalog_meta is a new table, so create_all has already built it
+
+def _image_status_columns(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("player_base")}
+    if "image_status" not in columns:
+        conn.execute(text("ALTER TABLE player_base ADD COLUMN image_status VARCHAR(16)"))
+    if "image_checked_at" not in columns:
+        conn.execute(text("ALTER TABLE player_base ADD COLUMN image_checked_at TIMESTAMP"))
+
+# (version, name, upgrade, online)
+# `online` migrations run in autocommit on Postgres so they can use CONCURRENTLY.
+# Only ever APPEND to this list; versions are persisted.
+MIGRATIONS = [
+    (1, "users.formation column", _add_formation, False),
+    (2, "flag columns to bitmasks", _flag_bitmasks, False),
+    (3, "hot-path indexes", _hot_path_indexes, True),
+    (4, "trigram search indexes", _trigram_indexes, True),
+    (5, "catalog sync columns", _catalog_sync_columns, False),
+    (6, "image status columns", _image_status_columns, False),
+]
+
+# --- RUNNER ---
+
+MIGRATION_LOCK_KEY = 7_203_114_501 # pg_advisory_lock key shared by every process that migrates
+
+@contextmanager
+def _migration_lock(engine):
+    """Serializes run_migrations across processes. SQLite has a single writer anyway."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    # Session-level lock on its own connection: held across the per-migration transactions below
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+def _ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+
+def get_applied_versions(engine):
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_version"))}
+
+def _stamp(conn, version, name):
+    conn.execute(
+        text("INSERT INTO schema_version (version, name, applied_at) VALUES (:v, :n, :t)"),
+        {"v": version, "n": name, "t": datetime.utcnow()}
+    )
+
+def run_migrations(engine):
+    """Creates missing tables, then applies every pending migration in order. Returns the versions applied."""
+    # Waiting processes see the versions the first one applied and skip them
+    with _migration_lock(engine):
+        return _run_pending(engine)
+
+def _run_pending(engine):
+    # 1. Missing tables come straight from the models (fresh database, or a newly added model)
+    Base.metadata.create_all(bind=engine)
+
+    # 2. Apply pending versions
+    applied = get_applied_versions(engine)
+    newly_applied = []
+    for version, name, upgrade, online in MIGRATIONS:
+        if version in applied:
+            continue
+
+        print(f"⚙️ Migration {version}: {name}...")
+        if online and engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                upgrade(conn)
+                _stamp(conn, version, name)
+        else:
+            # Schema change and stamp commit together
+            with engine.begin() as conn:
+                upgrade(conn)
+                _stamp(conn, version, name)
+        newly_applied.append(version)
+
+    return newly_applied
+
+def print_status(engine):
+    applied = get_applied_versions(engine)
+    for version, name, _, _ in MIGRATIONS:
+        status = "✅" if version in applied else "⬜"
+        print(f"{status} {version:>3}  {name}")
+
+if __name__ == "__main__":
+    import sys
+    from src.database.db import engine
+
+    print("🔌 Connecting to database...")
+    if "--status" in sys.argv:
+        print_status(engine)
+    else:
+        try:
+            done = run_migrations(engine)
+            print(f"✅ Success! Applied {len(done)} migrations." if done else "✅ Database is up to date.")
+        except Exception as e:
+            print(f"❌ Error running migrations: {e}")
+            sys.exit(1)
@@ -1,6 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, UniqueConstraint, BigInteger, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, UniqueConstraint, BigInteger
 from sqlalchemy.orm import relationship, declarative_base
-from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 
 Base = declarative_base()
@@ -35,10 +34,10 @@ class User(Base):
     upgrade_transfer = Column(Integer, default=0)
     upgrade_scout = Column(Integer, default=0)
 
-    # JSON with variant for SQLite/Postgres compatibility
-    tutorial_flags = Column(JSON().with_variant(JSONB, "postgresql"), default=dict)
+    # Bitmasks, see src/database/flags.py for the bit registry
+    tutorial_flags = Column(BigInteger, default=0, nullable=False)
     tutorial_progress = Column(Integer, default=0)
-    team_rewards_flags = Column(JSON().with_variant(JSONB, "postgresql"), default=list)
+    team_rewards_flags = Column(BigInteger, default=0, nullable=False)
 
     redeemed_referral = Column(Boolean, default=False)
     roll_refreshes = Column(Integer, default=0)
@@ -56,9 +55,9 @@ class Card(Base):
     __tablename__ = 'cards'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    player_base_id = Column(Integer, ForeignKey('player_base.id'))
-    position_in_xi = Column(String, nullable=True) 
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    player_base_id = Column(Integer, ForeignKey('player_base.id'), index=True)
+    position_in_xi = Column(String, nullable=True, index=True)
     obtained_at = Column(DateTime, default=datetime.utcnow)
     sort_priority = Column(BigInteger, default=0)
 
@@ -73,25 +72,40 @@ class PlayerBase(Base):
     
     id = Column(Integer, primary_key=True) 
     name = Column(String, nullable=False)
-    club = Column(String, nullable=False)
+    club = Column(String, nullable=False, index=True)
     nationality = Column(String, nullable=False)
     positions = Column(String, nullable=False)
     rating = Column(Integer, nullable=False)
-    rarity = Column(String, nullable=False) 
+    rarity = Column(String, nullable=False, index=True)
     image_url = Column(String, nullable=True)
+
+    # Catalog sync bookkeeping (see src/utils/catalog_sync.py)
+    content_hash = Column(String(32), nullable=True)
+    retired = Column(Boolean, default=False, nullable=False) # No longer in the data files; owned cards stay
+
+    # Image validation (see src/utils/check_images.py): None = unchecked, "ok", "broken" or "error"
+    image_status = Column(String(16), nullable=True)
+    image_checked_at = Column(DateTime, nullable=True)
     
     @property
     def value(self):
         return self.rating 
 
+    @property
+    def display_image(self):
+        """The image URL to put in an embed, or None if there is none or it is known to be broken."""
+        if not self.image_url or self.image_url == "N/A" or self.image_status == "broken":
+            return None
+        return self.image_url
+
 class MarketListing(Base):
     __tablename__ = 'market_listings'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
     card_id = Column(Integer, ForeignKey('cards.id'))
     listed_price = Column(Integer, nullable=False)
-    available_at = Column(DateTime, nullable=False)
+    available_at = Column(DateTime, nullable=False, index=True)
     listed_at = Column(DateTime, default=datetime.utcnow)
 
 class Shortlist(Base):
@@ -99,7 +113,7 @@ class Shortlist(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'))
-    player_base_id = Column(Integer, ForeignKey('player_base.id'))
+    player_base_id = Column(Integer, ForeignKey('player_base.id'), index=True)
     
     # Link back to User explicitly
     user = relationship("User", back_populates="shortlist_items")
@@ -111,5 +125,13 @@ class GlobalTutorial(Base):
     __tablename__ = 'global_tutorials'
     
     discord_id = Column(String, primary_key=True)
-    tutorial_flags = Column(JSON().with_variant(JSONB, "postgresql"), default=dict)
-    tutorial_progress = Column(Integer, default=0)
\ No newline at end of file
+    tutorial_flags = Column(BigInteger, default=0, nullable=False)
+    # Indexed so "who has not finished tutorial N" is a range scan (progress < N)
+    tutorial_progress = Column(Integer, default=0, index=True)
+
+class CatalogMeta(Base):
+    __tablename__ = 'catalog_meta'
+
+    # e.g. "catalog_version" -> "12"; the bot polls it to know when to reload its catalog cache
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
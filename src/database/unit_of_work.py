@@ -0,0 +1,68 @@
+# src/database/unit_of_work.py
+"""
+Per-interaction unit of work.
+
+Every service built on `uow.session` shares one session, sees the same User
+object for a given (discord_id, guild_id), and the block commits once on exit.
+Inside a unit of work the services' own `commit(session)` calls only flush, so
+SQL still runs in order (and new rows get IDs) without expiring loaded objects.
+"""
+from src.database.db import SessionLocal
+from src.database.models import User
+from src.database.user_state import UserState, user_state_cache
+
+USER_CACHE_KEY = "user_identity"
+DEFERRED_COMMIT_KEY = "deferred_commit"
+
+class UnitOfWork:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.session = None
+
+    def __enter__(self):
+        # Objects stay readable after the final commit (embeds are built afterwards)
+        self.session = self.session_factory(expire_on_commit=False)
+        self.session.info[DEFERRED_COMMIT_KEY] = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.session.commit()
+            else:
+                self.session.rollback()
+        finally:
+            self.session.close()
+        return False
+
+def commit(session):
+    """What services call instead of session.commit(): a flush inside a UnitOfWork, a real commit otherwise."""
+    if session.info.get(DEFERRED_COMMIT_KEY):
+        session.flush()
+    else:
+        session.commit()
+
+def get_user(session, discord_id, guild_id):
+    """Loads a guild profile once per session; later calls return the same object without a query."""
+    key = (str(discord_id), str(guild_id))
+    cache = session.info.setdefault(USER_CACHE_KEY, {})
+
+    user = cache.get(key)
+    if user is not None and user in session:
+        return user
+
+    user = session.query(User).filter_by(discord_id=key[0], guild_id=key[1]).first()
+    if user is not None:
+        cache[key] = user
+    return user
+
+def get_user_state(session, discord_id, guild_id):
+    """Cached UserState for a profile. Only touches the DB on a cache miss; None if there is no profile."""
+    state = user_state_cache.get(discord_id, guild_id)
+    if state is None:
+        user = get_user(session, discord_id, guild_id)
+        if user is None:
+            return None
+        state = UserState.from_user(user)
+        user_state_cache.put(state)
+    return state
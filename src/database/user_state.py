@@ -0,0 +1,217 @@
+# src/database/user_state.py
+"""
+Process-wide cache of hot per-user state, keyed by (discord_id, guild_id).
+
+Entries are compact UserState records, not ORM objects, so they are safe to
+share across sessions and threads. The cache is kept current by session
+events: every committed change to a User row is written through (or the entry
+dropped if the new value is not known in Python, e.g. an SQL expression).
+Bulk UPDATEs bypass the ORM and must call `invalidate_discord_ids`.
+
+Each profile's card count (for /profile) is cached next to it, keyed by
+users.id. Committed Card inserts, deletes and owner changes adjust it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from src.database.models import Card, User
+
+class UserState:
+    __slots__ = (
+        "user_id", "discord_id", "guild_id", "coins", "formation", "favorite_club",
+        "rolls_remaining", "max_rolls", "claims_remaining", "free_claims", "roll_refreshes",
+        "last_roll_reset", "last_claim_reset", "last_daily_claim",
+        "upgrade_stadium", "upgrade_board", "upgrade_training", "upgrade_transfer", "upgrade_scout",
+    )
+
+    # Every slot except the key maps 1:1 to a User column of the same name
+    COLUMNS = ("id",) + __slots__[1:]
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_user(cls, user):
+        values = {name: getattr(user, name) for name in cls.__slots__[1:]}
+        return cls(user_id=user.id, **values)
+
+    @property
+    def key(self):
+        return (self.discord_id, self.guild_id)
+
+class UserStateCache:
+    """Bounded LRU with a TTL. Thread-safe: the vote worker writes from a thread."""
+    def __init__(self, max_size=10000, ttl_seconds=300, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (expires_at, UserState)
+        self._card_counts = OrderedDict() # users.id -> (expires_at, number of cards)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0,
+                      "card_count_hits": 0, "card_count_misses": 0}
+
+    def get(self, discord_id, guild_id):
+        key = (str(discord_id), str(guild_id))
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, state = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return state
+
+    def put(self, state):
+        with self.lock:
+            self._entries[state.key] = (self.clock() + self.ttl_seconds, state)
+            self._entries.move_to_end(state.key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, discord_id, guild_id):
+        with self.lock:
+            if self._entries.pop((str(discord_id), str(guild_id)), None) is not None:
+                self.stats["invalidations"] += 1
+
+    def invalidate_discord_ids(self, discord_ids):
+        """Drops every guild profile of these users (bulk UPDATEs across guilds)."""
+        ids = {str(i) for i in discord_ids}
+        with self.lock:
+            for key in [k for k in self._entries if k[0] in ids]:
+                del self._entries[key]
+                self.stats["invalidations"] += 1
+
+    def get_card_count(self, user_id):
+        with self.lock:
+            entry = self._card_counts.get(user_id)
+            if entry is None or self.clock() >= entry[0]:
+                self._card_counts.pop(user_id, None)
+                self.stats["card_count_misses"] += 1
+                return None
+            self._card_counts.move_to_end(user_id)
+            self.stats["card_count_hits"] += 1
+            return entry[1]
+
+    def put_card_count(self, user_id, count):
+        with self.lock:
+            self._card_counts[user_id] = (self.clock() + self.ttl_seconds, count)
+            self._card_counts.move_to_end(user_id)
+            while len(self._card_counts) > self.max_size:
+                self._card_counts.popitem(last=False)
+
+    def apply_card_deltas(self, deltas):
+        """{users.id: +n/-n} from committed Card writes. A None delta drops that count; a None key drops them all."""
+        with self.lock:
+            if None in deltas:
+                self._card_counts.clear()
+                return
+            for user_id, delta in deltas.items():
+                entry = self._card_counts.get(user_id)
+                if entry is None:
+                    continue
+                if delta is None:
+                    del self._card_counts[user_id]
+                else:
+                    self._card_counts[user_id] = (entry[0], entry[1] + delta)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._card_counts.clear()
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, size=len(self._entries),
+                        hit_ratio=self.stats["hits"] / lookups if lookups else 0.0)
+
+user_state_cache = UserStateCache()
+
+# --- WRITE-THROUGH ---
+# after_flush: remember which User rows this flush wrote
+# after_flush_postexec: snapshot them (None = new value not known in Python, drop the entry)
+# after_commit: publish the snapshots. Rollbacks and close() discard them.
+
+TOUCHED_KEY = "user_state_touched"
+PENDING_KEY = "user_state_pending"
+CARD_DELTAS_KEY = "user_state_card_deltas"
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_writes(session, flush_context):
+    touched = session.info.setdefault(TOUCHED_KEY, [])
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, User):
+            touched.append(obj)
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending[(obj.discord_id, obj.guild_id)] = None
+
+@event.listens_for(Session, "after_flush")
+def _collect_card_writes(session, flush_context):
+    # Runs before the flush resets attribute history, so an owner change still shows its old user_id
+    deltas = session.info.setdefault(CARD_DELTAS_KEY, {})
+
+    def add(user_id, delta):
+        if deltas.get(user_id, 0) is not None:
+            deltas[user_id] = deltas.get(user_id, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Card):
+            add(obj.user_id, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Card):
+            add(inspect(obj).dict.get("user_id"), -1) # Not loaded: None drops every count
+        elif isinstance(obj, User):
+            deltas[obj.id] = None
+    for obj in session.dirty:
+        if isinstance(obj, Card):
+            history = inspect(obj).attrs.user_id.history
+            if history.added and not history.deleted:
+                add(None, 0) # Old owner was never loaded: drop every count
+            for user_id in history.deleted:
+                add(user_id, -1)
+            for user_id in history.added:
+                add(user_id, 1)
+
+@event.listens_for(Session, "after_flush_postexec")
+def _snapshot_user_writes(session, flush_context):
+    touched = session.info.pop(TOUCHED_KEY, [])
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for obj in touched:
+        unloaded = inspect(obj).unloaded.intersection(UserState.COLUMNS)
+        pending[(obj.discord_id, obj.guild_id)] = None if unloaded else UserState.from_user(obj)
+
+@event.listens_for(Session, "after_commit")
+def _publish_user_writes(session):
+    deltas = session.info.pop(CARD_DELTAS_KEY, None)
+    if deltas:
+        user_state_cache.apply_card_deltas(deltas)
+
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    for key, state in pending.items():
+        if state is None:
+            user_state_cache.invalidate(*key)
+        else:
+            user_state_cache.put(state)
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_user_writes(session, transaction):
+    # Runs after after_commit, and also on rollback / close(): anything left was never committed
+    if transaction.parent is None:
+        session.info.pop(TOUCHED_KEY, None)
+        session.info.pop(PENDING_KEY, None)
+        session.info.pop(CARD_DELTAS_KEY, None)
@@ -0,0 +1,120 @@
+# src/services/catalog_cache.py
+import asyncio
+import random
+from src.config import CATALOG_SNAPSHOT_PATH
+from src.database.db import get_session
+from src.database.models import PlayerBase
+from src.utils.catalog_snapshot import open_snapshot, rows_from_db, write_snapshot
+from src.utils.catalog_sync import get_catalog_version
+
+class CatalogCache:
+    """
+    Rollable players (not retired) kept in memory per rarity, so a roll picks an ID
+    with random.choice instead of an ORDER BY random() scan of player_base.
+    A background task polls `catalog_version` and reloads after a catalog sync.
+
+    With a snapshot path, a snapshot of the current catalog version is mapped
+    instead of querying player_base, and a stale one is rewritten after a DB load.
+    """
+    def __init__(self, session_factory=get_session, poll_interval=60, snapshot_path=None):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.snapshot_path = snapshot_path
+
+        self.version = None
+        self.ids_by_rarity = {}
+        self.clubs_by_rarity = {} # rarity -> [(id, lowercase club)] for the stadium upgrade
+        self.stats = {"reloads": 0, "snapshot_loads": 0, "picks": 0}
+        self._task = None
+
+    @property
+    def loaded(self):
+        return self.version is not None
+
+    def _read_snapshot(self, version):
+        """Rollable rows from the snapshot, or None if there is none for this catalog version."""
+        snapshot = open_snapshot(self.snapshot_path)
+        if snapshot is None:
+            return None
+        with snapshot:
+            # Version 0 means "never synced"; a snapshot built from the data files cannot vouch for the DB
+            if version == 0 or snapshot.catalog_version != version:
+                return None
+            self.stats["snapshot_loads"] += 1
+            return list(snapshot.iter_rollable())
+
+    def _read_db(self, session, version):
+        if not self.snapshot_path:
+            rows = session.query(PlayerBase.id, PlayerBase.rarity, PlayerBase.club)\
+                .filter(PlayerBase.retired == False)\
+                .all()
+            return [tuple(row) for row in rows]
+
+        full_rows = rows_from_db(session.connection())
+        try:
+            write_snapshot(self.snapshot_path, full_rows, version)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not write catalog snapshot: {e}")
+        return [(row["id"], row["rarity"], row["club"]) for row in full_rows if not row["retired"]]
+
+    def load(self):
+        session = self.session_factory()
+        try:
+            version = get_catalog_version(session.connection())
+            rows = self._read_snapshot(version)
+            if rows is None:
+                rows = self._read_db(session, version)
+        finally:
+            session.close()
+
+        ids_by_rarity, clubs_by_rarity = {}, {}
+        for player_id, rarity, club in rows:
+            ids_by_rarity.setdefault(rarity, []).append(player_id)
+            clubs_by_rarity.setdefault(rarity, []).append((player_id, (club or "").lower()))
+
+        # Swap in whole structures so a roll never sees a half-built catalog
+        self.ids_by_rarity = ids_by_rarity
+        self.clubs_by_rarity = clubs_by_rarity
+        self.version = version
+        self.stats["reloads"] += 1
+        print(f"📚 Catalog cache loaded: {len(rows)} players (version {version})")
+
+    def pick(self, rarity, club=None):
+        """Random player ID of this rarity (optionally from a club matching `club`), or None."""
+        if club:
+            needle = club.lower()
+            candidates = [pid for pid, club_name in self.clubs_by_rarity.get(rarity, []) if needle in club_name]
+        else:
+            candidates = self.ids_by_rarity.get(rarity)
+
+        if not candidates:
+            return None
+        self.stats["picks"] += 1
+        return random.choice(candidates)
+
+    def current_version(self):
+        session = self.session_factory()
+        try:
+            return get_catalog_version(session.connection())
+        finally:
+            session.close()
+
+    async def start(self):
+        await asyncio.to_thread(self.load)
+        self._task = asyncio.create_task(self._watch())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if await asyncio.to_thread(self.current_version) != self.version:
+                    await asyncio.to_thread(self.load)
+            except Exception as e:
+                print(f"❌ Catalog cache refresh failed: {e}")
+
+catalog_cache = CatalogCache(snapshot_path=CATALOG_SNAPSHOT_PATH)
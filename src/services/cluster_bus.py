@@ -0,0 +1,131 @@
+# src/services/cluster_bus.py
+import asyncio
+from sqlalchemy import text
+from src.config import CLUSTER_ID
+from src.database.db import engine
+from src.utils.cluster import NOTIFY_CHANNEL, decode_message, encode_messages
+
+RECONNECT_SECONDS = 5
+
+class ClusterBus:
+    """
+    Cross-cluster invalidation messages.
+
+    On Postgres every cluster LISTENs on one channel through a dedicated
+    (non-pooled) connection and publishes with pg_notify, so other processes,
+    including one-off scripts like catalog_sync, reach every running cluster.
+    Elsewhere (SQLite, a single process) messages are only dispatched locally.
+    A cluster ignores its own messages: it already applied the change.
+    """
+    def __init__(self, engine=engine, cluster_id=CLUSTER_ID):
+        self.engine = engine
+        self.cluster_id = cluster_id
+        self.handlers = {} # kind -> [async or sync callable(message)]
+        self.stats = {"published": 0, "received": 0, "handled": 0, "errors": 0, "reconnects": 0}
+        self._conn = None
+        self._loop = None
+        self._reconnect_task = None
+        self._dispatches = set() # The loop only keeps weak references to tasks
+
+    @property
+    def uses_postgres(self):
+        return self.engine.dialect.name == "postgresql"
+
+    def subscribe(self, kind, handler):
+        self.handlers.setdefault(kind, []).append(handler)
+
+    # --- PUBLISH ---
+
+    def _notify(self, payloads):
+        with self.engine.begin() as conn:
+            for payload in payloads:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": payload})
+
+    async def publish(self, kind, key=None, values=None, **fields):
+        payloads = encode_messages(kind, self.cluster_id, key, values, **fields)
+        self.stats["published"] += len(payloads)
+        if self.uses_postgres:
+            await asyncio.to_thread(self._notify, payloads)
+        else:
+            # Nobody else can hear us; deliver to this process as if it came from a peer
+            for payload in payloads:
+                await self._dispatch(payload, local=True)
+
+    # --- RECEIVE ---
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.uses_postgres:
+            await asyncio.to_thread(self._connect)
+
+    def _connect(self):
+        # A raw DBAPI connection outside the pool: LISTEN holds it for the life of the process
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        conn = dialect.loaded_dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        self._conn = conn
+        self._loop.call_soon_threadsafe(self._loop.add_reader, conn.fileno(), self._on_readable)
+        print(f"[Cluster {self.cluster_id}] Listening on {NOTIFY_CHANNEL}")
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except Exception as e:
+            print(f"[Cluster {self.cluster_id}] Listener connection lost: {e}")
+            self._drop_connection()
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+            return
+
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            task = self._loop.create_task(self._dispatch(notify.payload))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    def _drop_connection(self):
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    async def _reconnect(self):
+        while self._conn is None:
+            await asyncio.sleep(RECONNECT_SECONDS)
+            try:
+                await asyncio.to_thread(self._connect)
+                self.stats["reconnects"] += 1
+            except Exception as e:
+                print(f"[Cluster {self.cluster_id}] Reconnect failed: {e}")
+
+    async def _dispatch(self, payload, local=False):
+        message = decode_message(payload)
+        if message is None:
+            return
+        if message.get("origin") == self.cluster_id and not local:
+            return
+
+        self.stats["received"] += 1
+        for handler in self.handlers.get(message["kind"], []):
+            try:
+                result = handler(message)
+                if asyncio.iscoroutine(result):
+                    await result
+                self.stats["handled"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[Cluster {self.cluster_id}] Handler for {message['kind']} failed: {e}")
+
+    async def close(self):
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        if self._conn is not None:
+            self._drop_connection()
+
+cluster_bus = ClusterBus()
@@ -1,7 +1,12 @@
 import random
 from datetime import datetime, timedelta
 from sqlalchemy.sql.expression import func
+from sqlalchemy.orm import contains_eager, joinedload
 from src.database.models import User, PlayerBase, Card, Shortlist
+from src.database.unit_of_work import get_user, commit
+from src.database.user_state import UserState, user_state_cache
+from src.services.catalog_cache import catalog_cache
+from src.utils.metrics import stages
 from sqlalchemy import func, desc
 import time
 import unicodedata
@@ -26,7 +31,7 @@ class GachaService:
         self.DAILY_RESET_HOURS = 24
 
     def get_or_create_user(self, discord_id, guild_id, username):
-        user = self.session.query(User).filter_by(discord_id=discord_id, guild_id=guild_id).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user:
             user = User(
                 discord_id=discord_id,
@@ -34,31 +39,56 @@ class GachaService:
                 username=username
             )
             self.session.add(user)
-            self.session.commit()
-        self.check_refills(user)
+            commit(self.session)
         return user
     
-    def check_refills(self, user):
-        """Checks if enough time has passed to reset rolls or claims."""
-        now = datetime.utcnow()
-        commit = False 
-
-        # Refresh Rolls
-        time_since_roll = (now - user.last_roll_reset).total_seconds() / 60
-        if time_since_roll >= self.ROLL_RESET_MINUTES:
-            user.rolls_remaining = user.max_rolls
+    # --- REFILLS (derived on read, written only when spent) ---
+    # A window starts when the first roll/claim is spent from a full stock. Once it
+    # has passed the stock counts as full again, but nothing is written until the
+    # next spend, so reading a profile never touches the users table.
+
+    def available_rolls(self, user, now=None):
+        now = now or datetime.utcnow()
+        if now - user.last_roll_reset >= timedelta(minutes=self.ROLL_RESET_MINUTES):
+            return user.max_rolls
+        return user.rolls_remaining
+
+    def available_claims(self, user, now=None):
+        now = now or datetime.utcnow()
+        if now - user.last_claim_reset >= timedelta(minutes=self.CLAIM_RESET_MINUTES):
+            return max(user.claims_remaining, self.MAX_CLAIMS)
+        return user.claims_remaining
+
+    def spend_roll(self, user, now):
+        """Materializes any pending refill, then spends one roll."""
+        rolls = self.available_rolls(user, now)
+        if rolls >= user.max_rolls:
             user.last_roll_reset = now
-            commit = True
+        user.rolls_remaining = rolls - 1
 
-        # Refresh Claims
-        time_since_claim = (now - user.last_claim_reset).total_seconds() / 60
-        if time_since_claim >= self.CLAIM_RESET_MINUTES:
-            user.claims_remaining = self.MAX_CLAIMS
+    def spend_claim(self, user, now):
+        """Materializes any pending refill, then spends one claim."""
+        claims = self.available_claims(user, now)
+        if claims >= self.MAX_CLAIMS:
             user.last_claim_reset = now
-            commit = True
-            
-        if commit:
-            self.session.commit()
+        user.claims_remaining = claims - 1
+
+    def get_user_state(self, discord_id, guild_id, username):
+        """Read-only view of the user for display commands. Served from the cache when possible."""
+        state = user_state_cache.get(discord_id, guild_id)
+        if state is None:
+            user = self.get_or_create_user(discord_id, guild_id, username)
+            state = UserState.from_user(user)
+            user_state_cache.put(state)
+        return state
+
+    def get_card_count(self, user_id):
+        """How many cards a profile (users.id) owns. Served from the cache when possible."""
+        count = user_state_cache.get_card_count(user_id)
+        if count is None:
+            count = self.session.query(Card).filter_by(user_id=user_id).count()
+            user_state_cache.put_card_count(user_id, count)
+        return count
 
     def get_next_reset_time(self, last_reset, minutes):
         """Helper to calculate when the next reset happens."""
@@ -86,11 +116,15 @@ class GachaService:
         else: return "Common"
 
     def roll_card(self, discord_id, guild_id, username):
+        timer = stages("roll_card") # Per-stage timings on /metrics
         user = self.get_or_create_user(discord_id, guild_id, username)
+        now = datetime.utcnow()
+        timer.lap("load_user")
 
         # 0. Check Rolls
-        if user.rolls_remaining <= 0:
+        if self.available_rolls(user, now) <= 0:
             reset_in = self.get_next_reset_time(user.last_roll_reset, self.ROLL_RESET_MINUTES)
+            timer.outcome("no_rolls")
             return {"success": False, "message": f"⏳ You are out of rolls! Reset in: **{reset_in}**"}
 
         # 1. Determine Rarity
@@ -106,31 +140,41 @@ class GachaService:
                     force_fav_club = True
 
         # 2. Pick the Player
-        query = self.session.query(PlayerBase).filter_by(rarity=rarity)
         player = None
+        if catalog_cache.loaded:
+            # In-memory pick, then a primary key lookup
+            player_id = None
+            if force_fav_club:
+                player_id = catalog_cache.pick(rarity, user.favorite_club)
+            if player_id is None:
+                player_id = catalog_cache.pick(rarity)
+            if player_id is not None:
+                player = self.session.get(PlayerBase, player_id)
+        else:
+            query = self.session.query(PlayerBase).filter_by(rarity=rarity, retired=False)
 
-        if force_fav_club:
-            fav_matches = query.filter(PlayerBase.club.ilike(f"%{user.favorite_club}%"))
-            if fav_matches.count() > 0:
-                player = fav_matches.order_by(func.random()).first()
+            if force_fav_club:
+                fav_matches = query.filter(PlayerBase.club.ilike(f"%{user.favorite_club}%"))
+                if fav_matches.count() > 0:
+                    player = fav_matches.order_by(func.random()).first()
 
-        if not player:
-            player = query.order_by(func.random()).first()
+            if not player:
+                player = query.order_by(func.random()).first()
+        timer.lap("pick_player")
 
         if not player:
+            timer.outcome("no_players")
             return {"success": False, "message": "Database error: No players found."}
 
         # 3. Pay the Roll Cost
-        if user.rolls_remaining >= user.max_rolls:
-            user.last_roll_reset = datetime.utcnow()
-
-        user.rolls_remaining -= 1
+        self.spend_roll(user, now)
         
         # 4. Duplicate Check
-        existing_card = self.session.query(Card).join(User).filter(
+        existing_card = self.session.query(Card).join(User).options(contains_eager(Card.user)).filter(
             User.guild_id == guild_id,
             Card.player_base_id == player.id
         ).first()
+        timer.lap("duplicate_check")
 
         if existing_card:
             # It's a duplicate. Give coins.
@@ -143,7 +187,9 @@ class GachaService:
             coin_reward = int(base_value * (1 + multiplier))
             
             user.coins += coin_reward
-            self.session.commit()
+            commit(self.session)
+            timer.lap("commit")
+            timer.outcome("duplicate")
             
             return {
                 "success": True,
@@ -164,8 +210,11 @@ class GachaService:
             ).all()
             
             shortlist_pings = [h[0] for h in hits]
+        timer.lap("shortlist")
 
-        self.session.commit()
+        commit(self.session)
+        timer.lap("commit")
+        timer.outcome("new")
         
         return {
             "success": True,
@@ -176,19 +225,25 @@ class GachaService:
         }
 
     def claim_card(self, discord_id, guild_id, player_id):
+        timer = stages("claim_card")
         user = self.get_or_create_user(discord_id, guild_id, "Unknown")
+        now = datetime.utcnow()
+        timer.lap("load_user")
         
         # Check claims
-        if user.claims_remaining <= 0:
+        if self.available_claims(user, now) <= 0:
             reset_in = self.get_next_reset_time(user.last_claim_reset, self.CLAIM_RESET_MINUTES)
+            timer.outcome("no_claims")
             return {"success": False, "message": f"❌ You have no claims left! Reset in: **{reset_in}**"}
 
-        existing = self.session.query(Card).join(User).filter(
+        existing = self.session.query(Card).join(User).options(contains_eager(Card.user)).filter(
             User.guild_id == guild_id, 
             Card.player_base_id == player_id
         ).first()
+        timer.lap("ownership_check")
         
         if existing:
+            timer.outcome("taken")
             # --- FIX 2: Use .user instead of .owner ---
             return {"success": False, "message": f"Too slow! Claimed by {existing.user.username}"}
         
@@ -196,13 +251,12 @@ class GachaService:
         new_card = Card(user_id=user.id, player_base_id=player_id, sort_priority=current_time)
         
         # Deduct claim
-        if user.claims_remaining >= self.MAX_CLAIMS:
-            user.last_claim_reset = datetime.utcnow()
-            
-        user.claims_remaining -= 1
+        self.spend_claim(user, now)
         
         self.session.add(new_card)
-        self.session.commit()
+        commit(self.session)
+        timer.lap("commit")
+        timer.outcome("claimed")
         
         return {"success": True, "card": new_card}
     
@@ -215,6 +269,7 @@ class GachaService:
 
         cards = self.session.query(Card)\
             .join(PlayerBase)\
+            .options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id)\
             .order_by(Card.sort_priority.desc())\
             .offset(offset)\
@@ -232,6 +287,7 @@ class GachaService:
         user = self.get_or_create_user(discord_id, guild_id, "Unknown")
         card_to_sell = self.session.query(Card)\
             .join(PlayerBase)\
+            .options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id)\
             .filter(PlayerBase.name.ilike(f"%{player_name}%"))\
             .first()
@@ -250,7 +306,7 @@ class GachaService:
 
         user.coins += total_refund
         self.session.delete(card_to_sell)
-        self.session.commit()
+        commit(self.session)
         
         return {
             "success": True, 
@@ -263,7 +319,7 @@ class GachaService:
     
     def sort_collection(self, discord_id, guild_id):
         user = self.get_or_create_user(discord_id, guild_id, "Unknown")
-        cards = self.session.query(Card).join(PlayerBase).filter(Card.user_id == user.id).all()
+        cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(Card.user_id == user.id).all()
         
         if not cards:
             return {"success": False, "message": "No cards to sort."}
@@ -274,7 +330,7 @@ class GachaService:
         for i, card in enumerate(cards):
             card.sort_priority = current_time - i
             
-        self.session.commit()
+        commit(self.session)
         return {"success": True, "count": len(cards)}
     
     def move_player(self, discord_id, guild_id, player_name_query, target_page):
@@ -282,6 +338,7 @@ class GachaService:
 
         cards = self.session.query(Card)\
             .join(PlayerBase)\
+            .options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id)\
             .order_by(Card.sort_priority.desc())\
             .all()
@@ -312,7 +369,7 @@ class GachaService:
         for i, card in enumerate(cards):
             card.sort_priority = current_ts - i
             
-        self.session.commit()
+        commit(self.session)
         
         return {
             "success": True, 
@@ -320,18 +377,37 @@ class GachaService:
             "page": new_index + 1
         }
     
+    def _daily_not_ready(self, last_daily_claim, now):
+        """Returns the 'not ready' response, or None if the daily can be claimed."""
+        if not last_daily_claim:
+            return None
+        time_since = (now - last_daily_claim).total_seconds() / 3600
+        if time_since >= self.DAILY_RESET_HOURS:
+            return None
+        next_reset = last_daily_claim + timedelta(hours=self.DAILY_RESET_HOURS)
+        diff = next_reset - now
+        hours, remainder = divmod(int(diff.total_seconds()), 3600)
+        minutes, _ = divmod(remainder, 60)
+        return {"success": False, "message": f"Daily not ready! Wait **{hours}h {minutes}m**."}
+
     def claim_daily(self, discord_id, guild_id, username):
-        user = self.get_or_create_user(discord_id, guild_id, username)
+        timer = stages("claim_daily")
         now = datetime.utcnow()
 
-        if user.last_daily_claim:
-            time_since = (now - user.last_daily_claim).total_seconds() / 3600
-            if time_since < self.DAILY_RESET_HOURS:
-                next_reset = user.last_daily_claim + timedelta(hours=self.DAILY_RESET_HOURS)
-                diff = next_reset - now
-                hours, remainder = divmod(int(diff.total_seconds()), 3600)
-                minutes, _ = divmod(remainder, 60)
-                return {"success": False, "message": f"Daily not ready! Wait **{hours}h {minutes}m**."}
+        # Most /daily calls are early: answer those from the cache without touching the DB
+        state = user_state_cache.get(discord_id, guild_id)
+        if state:
+            not_ready = self._daily_not_ready(state.last_daily_claim, now)
+            if not_ready:
+                timer.outcome("not_ready_cached")
+                return not_ready
+
+        user = self.get_or_create_user(discord_id, guild_id, username)
+        timer.lap("load_user")
+        not_ready = self._daily_not_ready(user.last_daily_claim, now)
+        if not_ready:
+            timer.outcome("not_ready")
+            return not_ready
             
         chance = random.randint(0, 100)
         if chance < 7:
@@ -349,7 +425,9 @@ class GachaService:
 
         user.coins += total_reward
         user.last_daily_claim = now
-        self.session.commit()
+        commit(self.session)
+        timer.lap("commit")
+        timer.outcome("claimed")
 
         return {
             "success": True, 
@@ -382,7 +460,7 @@ class GachaService:
 
         if target_club:
             user.favorite_club = target_club
-            self.session.commit()
+            commit(self.session)
             return {"success": True, "club": target_club}
             
         if len(found_clubs) > 1:
@@ -407,7 +485,7 @@ class GachaService:
         if not target_player:
             return {"success": False, "reason": "multiple", "matches": [p.name for p in matches]}
 
-        card = self.session.query(Card).join(User).filter(
+        card = self.session.query(Card).join(User).options(contains_eager(Card.user)).filter(
             User.guild_id == guild_id,
             Card.player_base_id == target_player.id
         ).first()
@@ -497,11 +575,12 @@ class GachaService:
     
     def use_free_claim(self, discord_id, guild_id):
         user = self.get_or_create_user(discord_id, guild_id, "Unknown")
+        claims = self.available_claims(user)
 
-        if user.claims_remaining > 0:
+        if claims > 0:
             return {
                 "success": False, 
-                "message": f"Your claim is already ready ({user.claims_remaining} left)! No need to use a Free Claim."
+                "message": f"Your claim is already ready ({claims} left)! No need to use a Free Claim."
             }
 
         if user.free_claims <= 0:
@@ -512,7 +591,7 @@ class GachaService:
 
         user.free_claims -= 1
         user.claims_remaining += 1
-        self.session.commit()
+        commit(self.session)
 
         return {
             "success": True,
@@ -547,7 +626,7 @@ class GachaService:
 
         new_item = Shortlist(user_id=user.id, player_base_id=target_player.id)
         self.session.add(new_item)
-        self.session.commit()
+        commit(self.session)
         
         return {
             "success": True, 
@@ -557,7 +636,7 @@ class GachaService:
 
     def remove_from_shortlist(self, discord_id, guild_id, player_name):
         user = self.get_or_create_user(discord_id, guild_id, "Unknown")
-        item = self.session.query(Shortlist).join(PlayerBase)\
+        item = self.session.query(Shortlist).join(PlayerBase).options(contains_eager(Shortlist.player))\
             .filter(Shortlist.user_id == user.id)\
             .filter(PlayerBase.name.ilike(f"%{player_name}%"))\
             .first()
@@ -567,13 +646,13 @@ class GachaService:
             
         removed_name = item.player.name
         self.session.delete(item)
-        self.session.commit()
+        commit(self.session)
         
         return {"success": True, "message": f"Removed **{removed_name}** from shortlist."}
 
     def get_user_shortlist(self, discord_id, guild_id):
         user = self.get_or_create_user(discord_id, guild_id, "Unknown")
-        items = self.session.query(Shortlist).filter_by(user_id=user.id).all()
+        items = self.session.query(Shortlist).options(joinedload(Shortlist.player)).filter_by(user_id=user.id).all()
         max_slots = self.get_shortlist_capacity(user)
         
         return {
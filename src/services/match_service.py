@@ -1,6 +1,7 @@
 import random
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import contains_eager, joinedload
 from src.database.models import User, Card, PlayerBase
+from src.database.unit_of_work import get_user, commit
 
 class MatchService:
     def __init__(self, session):
@@ -30,11 +31,11 @@ class MatchService:
 
     def get_team_power(self, user_id, guild_id):
         """Calculates Attack, Midfield, Defense scores based on the lineup + Training Upgrades."""
-        user = self.session.query(User).filter_by(discord_id=str(user_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, user_id, guild_id)
         if not user: return None
 
         # Fetch Lineup
-        cards = self.session.query(Card).join(PlayerBase)\
+        cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id, Card.position_in_xi.isnot(None))\
             .all()
         
@@ -205,7 +206,7 @@ class MatchService:
         
         user.coins -= amount
         opp.coins -= amount
-        self.session.commit()
+        commit(self.session)
         return True
 
     def payout(self, user_id, opponent_id, result, amount):
@@ -223,4 +224,4 @@ class MatchService:
             user.coins += amount
             opp.coins += amount
             
-        self.session.commit()
\ No newline at end of file
+        commit(self.session)
\ No newline at end of file
@@ -1,7 +1,9 @@
 import unicodedata
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from sqlalchemy import func
 from src.database.models import User, Card, PlayerBase
+from src.database.unit_of_work import get_user, commit
+from src.database.flags import MILESTONE_BITS, TEAM_MILESTONE_KEYS, has_bit
 
 # Helper function at the top, just like in gacha_service.py
 def normalize_text(text):
@@ -54,7 +56,7 @@ class TeamService:
         if new_fmt not in self.FORMATIONS:
             return {"success": False, "message": f"Invalid formation. Available: {', '.join(self.FORMATIONS.keys())}"}
 
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user: return {"success": False, "message": "Register first!"}
 
         if user.formation == new_fmt:
@@ -71,7 +73,7 @@ class TeamService:
             # We are losing slots (e.g. D4). Find who to drop.
             limit = new_config["D"] # e.g. 3
             # Get all defenders currently in XI
-            defenders = self.session.query(Card).join(PlayerBase).filter(
+            defenders = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(
                 Card.user_id == user.id, 
                 Card.position_in_xi.like("D%")
             ).all()
@@ -90,7 +92,7 @@ class TeamService:
 
         # Check Midfielders
         if new_config["M"] < old_config["M"]:
-            mids = self.session.query(Card).join(PlayerBase).filter(Card.user_id == user.id, Card.position_in_xi.like("M%")).all()
+            mids = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(Card.user_id == user.id, Card.position_in_xi.like("M%")).all()
             mids.sort(key=lambda c: c.details.rating)
             for i in range(old_config["M"] - new_config["M"]):
                 if i < len(mids):
@@ -100,7 +102,7 @@ class TeamService:
 
         # Check Forwards
         if new_config["F"] < old_config["F"]:
-            fwds = self.session.query(Card).join(PlayerBase).filter(Card.user_id == user.id, Card.position_in_xi.like("F%")).all()
+            fwds = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(Card.user_id == user.id, Card.position_in_xi.like("F%")).all()
             fwds.sort(key=lambda c: c.details.rating)
             for i in range(old_config["F"] - new_config["F"]):
                 if i < len(fwds):
@@ -116,7 +118,7 @@ class TeamService:
         self.session.flush() # Commit drops first
         
         # Re-fetch everyone remaining
-        all_xi = self.session.query(Card).filter(Card.user_id == user.id, Card.position_in_xi.isnot(None)).all()
+        all_xi = self.session.query(Card).options(joinedload(Card.details)).filter(Card.user_id == user.id, Card.position_in_xi.isnot(None)).all()
         
         # Group by pos type
         d_list = [c for c in all_xi if c.position_in_xi.startswith("D")]
@@ -135,7 +137,7 @@ class TeamService:
         for i, c in enumerate(f_list): c.position_in_xi = f"F{i+1}"
         
         user.formation = new_fmt
-        self.session.commit()
+        commit(self.session)
 
         msg = f"Formation changed to **{new_fmt}**!"
         if dropped_msg:
@@ -144,7 +146,7 @@ class TeamService:
         return {"success": True, "message": msg}
 
     def get_starting_xi(self, discord_id, guild_id):
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user:
             return {"success": False, "message": "User not found."}
 
@@ -153,7 +155,7 @@ class TeamService:
         config = self.FORMATIONS.get(fmt, self.FORMATIONS["4-3-3"])
 
         # Fetch cards
-        lineup_cards = self.session.query(Card).join(PlayerBase)\
+        lineup_cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id, Card.position_in_xi.isnot(None))\
             .all()
         
@@ -180,7 +182,7 @@ class TeamService:
 
     def set_lineup_player(self, discord_id, guild_id, slot_code, player_name_query):
         slot_code = slot_code.upper()
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user: return {"success": False, "message": "Register first!"}
 
         # 1. Validate Slot against CURRENT formation
@@ -192,7 +194,7 @@ class TeamService:
 
         # 2. Find the card using Python filtering (Safe for SQLite & Accents)
         # Fetch all user cards first
-        user_cards = self.session.query(Card).join(PlayerBase).filter(Card.user_id == user.id).all()
+        user_cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(Card.user_id == user.id).all()
         
         target_card = None
         query_norm = normalize_text(player_name_query)
@@ -231,7 +233,7 @@ class TeamService:
              return {"success": False, "message": f"**{target_card.details.name}** is already in {slot_code}."}
 
         # 5. Swap Logic: If someone is already in that slot, remove them
-        existing_card = self.session.query(Card).filter_by(user_id=user.id, position_in_xi=slot_code).first()
+        existing_card = self.session.query(Card).options(joinedload(Card.details)).filter_by(user_id=user.id, position_in_xi=slot_code).first()
         swapped_msg = ""
         if existing_card:
             existing_card.position_in_xi = None
@@ -243,7 +245,7 @@ class TeamService:
 
         # 7. Assign new position
         target_card.position_in_xi = slot_code
-        self.session.commit()
+        commit(self.session)
 
         reward_msg = self.process_milestone_check(user)
     
@@ -256,10 +258,10 @@ class TeamService:
         return {"success": True, "message": final_msg}
 
     def remove_from_lineup(self, discord_id, guild_id, player_name_query):
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         
         # Search specifically among cards IN THE XI
-        xi_cards = self.session.query(Card).join(PlayerBase)\
+        xi_cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id, Card.position_in_xi.isnot(None))\
             .all()
 
@@ -271,24 +273,24 @@ class TeamService:
 
         old_pos = target_card.position_in_xi
         target_card.position_in_xi = None
-        self.session.commit()
+        commit(self.session)
 
         return {"success": True, "message": f"**{target_card.details.name}** removed from **{old_pos}**."}
 
     def rename_club(self, discord_id, guild_id, new_name):
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user: return {"success": False, "message": "Register first!"}
         
         user.club_name = new_name if new_name else "Default FC"
-        self.session.commit()
+        commit(self.session)
         return {"success": True, "message": f"Club renamed to **{user.club_name}**."}
     
     def get_team_stats_and_rewards(self, discord_id, guild_id):
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user: return {"success": False, "message": "User not found"}
         
         # 1. Calculate Base Stats
-        lineup_cards = self.session.query(Card).join(PlayerBase).filter(
+        lineup_cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(
             Card.user_id == user.id, 
             Card.position_in_xi.isnot(None)
         ).all()
@@ -311,14 +313,14 @@ class TeamService:
         ovl_value = int(base_ovl * (1 + multiplier))
         
         # Prepare Display
-        flags = user.team_rewards_flags if user.team_rewards_flags else [False] * 7
+        flags = user.team_rewards_flags or 0
         rewards_display = []
         
-        for i, m in enumerate(self.MILESTONES):
+        for key, m in zip(TEAM_MILESTONE_KEYS, self.MILESTONES):
             rewards_display.append({
                 "desc": m["desc"],
                 "reward": m["reward_text"],
-                "claimed": flags[i] if i < len(flags) else False
+                "claimed": has_bit(flags, MILESTONE_BITS[key])
             })
 
         return {
@@ -332,7 +334,7 @@ class TeamService:
     def process_milestone_check(self, user):
         """Checks milestones, grants rewards, and returns a message if unlocked."""
         # 1. Calculate Base Stats
-        lineup_cards = self.session.query(Card).join(PlayerBase).filter(
+        lineup_cards = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(
             Card.user_id == user.id, 
             Card.position_in_xi.isnot(None)
         ).all()
@@ -352,16 +354,15 @@ class TeamService:
         # Final OVL Value used for checks
         ovl_value = int(base_ovl * (1 + multiplier))
 
-        # --- Initialize Flags ---
-        if not user.team_rewards_flags:
-            user.team_rewards_flags = [False] * 7
-        
-        flags = list(user.team_rewards_flags) # Copy
+        # --- Read Flags (bitmask) ---
+        flags = user.team_rewards_flags or 0
+        bits = MILESTONE_BITS
+        new_bits = 0
         unlocked_msgs = []
 
         # Helper to grant card
         def grant_random_card(min_rating=0, rarity=None):
-            query = self.session.query(PlayerBase)
+            query = self.session.query(PlayerBase).filter(PlayerBase.retired == False)
             if rarity:
                 query = query.filter(PlayerBase.rarity == rarity)
             if min_rating > 0:
@@ -378,51 +379,52 @@ class TeamService:
         
         # 0: Full Team
         if player_count >= 11:
-            if not flags[0]:
-                flags[0] = True
+            if not has_bit(flags, bits["full_team"]):
+                new_bits |= bits["full_team"]
                 user.coins += 1000
                 unlocked_msgs.append("• Full Team: **+1000 💠**")
 
             # 1: 300 OVL
-            if ovl_value >= 300 and not flags[1]:
-                flags[1] = True
+            if ovl_value >= 300 and not has_bit(flags, bits["ovl_300"]):
+                new_bits |= bits["ovl_300"]
                 user.free_claims += 2
                 unlocked_msgs.append("• 300 OVL: **+2 Free Claims**")
 
             # 2: 400 OVL
-            if ovl_value >= 400 and not flags[2]:
-                flags[2] = True
+            if ovl_value >= 400 and not has_bit(flags, bits["ovl_400"]):
+                new_bits |= bits["ovl_400"]
                 user.coins += 2000
                 unlocked_msgs.append("• 400 OVL: **+2000 💠**")
 
             # 3: 500 OVL
-            if ovl_value >= 500 and not flags[3]:
-                flags[3] = True
+            if ovl_value >= 500 and not has_bit(flags, bits["ovl_500"]):
+                new_bits |= bits["ovl_500"]
                 user.max_rolls += 2
                 unlocked_msgs.append("• 500 OVL: **+2 Rolls/Hour Boost Active!**")
 
             # 4: 600 OVL
-            if ovl_value >= 600 and not flags[4]:
-                flags[4] = True
+            if ovl_value >= 600 and not has_bit(flags, bits["ovl_600"]):
+                new_bits |= bits["ovl_600"]
                 user.max_rolls += 3
                 unlocked_msgs.append("• 600 OVL: **+3 Rolls/Hour Boost Active!**")
 
             # 5: 700 OVL
-            if ovl_value >= 700 and not flags[5]:
-                flags[5] = True
+            if ovl_value >= 700 and not has_bit(flags, bits["ovl_700"]):
+                new_bits |= bits["ovl_700"]
                 p_name = grant_random_card(rarity="Ultra Rare")
                 unlocked_msgs.append(f"• 700 OVL: **Unlocked {p_name}!**")
 
             # 6: 800 OVL
-            if ovl_value >= 800 and not flags[6]:
-                flags[6] = True
+            if ovl_value >= 800 and not has_bit(flags, bits["ovl_800"]):
+                new_bits |= bits["ovl_800"]
                 p_name = grant_random_card(rarity="Legend")
                 unlocked_msgs.append(f"• 800 OVL: **Unlocked Legend {p_name}!**")
 
         # Save if changes happened
         if unlocked_msgs:
-            user.team_rewards_flags = flags
-            self.session.commit()
+            # One atomic `team_rewards_flags = team_rewards_flags | new_bits`
+            user.team_rewards_flags = User.team_rewards_flags.op("|")(new_bits)
+            commit(self.session)
             return "\n".join(unlocked_msgs)
         
         return None
\ No newline at end of file
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import joinedload
 from src.database.models import User, Card, PlayerBase, MarketListing
+from src.database.unit_of_work import get_user, commit
 from datetime import datetime
 
 class TradeService:
@@ -7,11 +8,11 @@ class TradeService:
         self.session = session
 
     def get_or_create_user(self, discord_id, guild_id, username):
-        user = self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user:
             user = User(discord_id=str(discord_id), guild_id=str(guild_id), username=username)
             self.session.add(user)
-            self.session.commit()
+            commit(self.session)
         return user
 
     def check_balance(self, discord_id, guild_id, amount):
@@ -71,8 +72,8 @@ class TradeService:
         """
         # Fetch Users
         # We assume IDs are passed as integers or strings, so we convert to match DB
-        user_a = self.session.query(User).filter_by(discord_id=str(user_a_id), guild_id=str(guild_id)).first()
-        user_b = self.session.query(User).filter_by(discord_id=str(user_b_id), guild_id=str(guild_id)).first()
+        user_a = get_user(self.session, user_a_id, guild_id)
+        user_b = get_user(self.session, user_b_id, guild_id)
 
         if not user_a or not user_b:
             return {"success": False, "message": "Trade failed: User not found."}
@@ -120,6 +121,6 @@ class TradeService:
         user_b.coins -= coins_b
         user_a.coins += coins_b
 
-        self.session.commit()
+        commit(self.session)
         
         return {"success": True, "message": "Trade Successful!"}
\ No newline at end of file
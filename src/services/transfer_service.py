@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 from src.database.models import User, Card, PlayerBase, MarketListing
+from src.database.unit_of_work import get_user, commit
 from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 
 class TransferService:
     def __init__(self, session):
@@ -11,7 +13,7 @@ class TransferService:
         self.DURATION_HOURS = [36, 24, 18, 12, 6, 3]
 
     def _get_user(self, discord_id, guild_id):
-        return self.session.query(User).filter_by(discord_id=discord_id, guild_id=guild_id).first()
+        return get_user(self.session, discord_id, guild_id)
 
     def add_to_market(self, discord_id, guild_id, player_name):
         user = self._get_user(discord_id, guild_id)
@@ -24,7 +26,7 @@ class TransferService:
             return {"success": False, "message": "You already have a player on the Transfer List! Wait for it to sell or remove it."}
 
         # 2. Find the card
-        card = self.session.query(Card).join(PlayerBase)\
+        card = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details))\
             .filter(Card.user_id == user.id)\
             .filter(PlayerBase.name.ilike(f"%{player_name}%"))\
             .first()
@@ -59,7 +61,7 @@ class TransferService:
             listed_at=datetime.utcnow()
         )
         self.session.add(new_listing)
-        self.session.commit()
+        commit(self.session)
 
         return {
             "success": True,
@@ -77,7 +79,7 @@ class TransferService:
 
         # Delete the listing. The card remains owned by the user.
         self.session.delete(listing)
-        self.session.commit()
+        commit(self.session)
         return {"success": True, "message": "Player removed from Transfer List."}
 
     def check_transfer_status(self, discord_id, guild_id):
@@ -90,7 +92,7 @@ class TransferService:
 
         now = datetime.utcnow()
         # Join to get player name just for display
-        card = self.session.query(Card).join(PlayerBase).filter(Card.id == listing.card_id).first()
+        card = self.session.query(Card).join(PlayerBase).options(contains_eager(Card.details)).filter(Card.id == listing.card_id).first()
         player_name = card.details.name if card else "Unknown Player"
 
         # CASE 1: Transfer Finished (Time passed)
@@ -103,7 +105,7 @@ class TransferService:
             # Delete both the Listing AND the Card (since it was sold)
             self.session.delete(card) 
             self.session.delete(listing) 
-            self.session.commit()
+            commit(self.session)
             
             return {
                 "status": "completed", 
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from src.database.db import get_session
+from src.database.models import GlobalTutorial
+from src.services.tutorial_service import TutorialService
+
+class TutorialEvent:
+    __slots__ = ("discord_id", "guild_id", "step_key", "notify")
+
+    def __init__(self, discord_id, guild_id, step_key, notify=None):
+        self.discord_id = str(discord_id)
+        self.guild_id = str(guild_id)
+        self.step_key = step_key
+        self.notify = notify # async callable taking the tutorial message
+
+_STOP = object() # Queued by close(): the consumer flushes the batch it holds and exits
+
+class TutorialEventBus:
+    """
+    In-process queue for tutorial step completions.
+    Cogs publish step events without touching the DB. A single consumer drains
+    the queue in small batches, applies them in one session/commit and then
+    delivers the tutorial messages through each event's notify callback.
+    """
+    def __init__(self, session_factory=get_session, batch_size=50, batch_window=0.25):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_window = batch_window # Seconds to wait for more events before flushing
+
+        self.queue = asyncio.Queue()
+        # Discord IDs that finished every tutorial. Their events are dropped on publish.
+        self.completed_ids = set()
+        self.total_steps = len(TutorialService(None).TUTORIALS)
+
+        self.stats = {"published": 0, "short_circuited": 0, "processed": 0, "batches": 0, "failed": 0}
+        self._task = None
+
+    async def start(self):
+        """Starts the consumer task, then warms the completed-ID set (off the event loop)."""
+        # The consumer comes first: events published from now on must always be processed
+        self._task = asyncio.create_task(self._consume())
+        try:
+            await asyncio.to_thread(self.warm_completed_ids)
+        except Exception as e:
+            # The veteran set only saves DB work; without it their events are processed like anyone else's
+            print(f"⚠️ [Tutorial] Veteran preload failed, tracking everyone: {e}")
+
+    async def close(self):
+        """Stops the consumer once it has flushed its current batch, then flushes whatever is still queued."""
+        if self._task:
+            self.queue.put_nowait(_STOP)
+            await self._task
+            self._task = None
+        pending = []
+        while not self.queue.empty():
+            event = self.queue.get_nowait()
+            if event is not _STOP:
+                pending.append(event)
+        if pending:
+            await self._process_safely(pending)
+
+    def warm_completed_ids(self):
+        session = self.session_factory()
+        try:
+            rows = session.query(GlobalTutorial.discord_id)\
+                .filter(GlobalTutorial.tutorial_progress >= self.total_steps)\
+                .all()
+            self.completed_ids.update(row[0] for row in rows)
+        finally:
+            session.close()
+        print(f"[Tutorial] {len(self.completed_ids)} veterans skip tutorial tracking")
+
+    def publish(self, discord_id, guild_id, step_key, notify=None):
+        """Queues a step event. Veterans are filtered here without any DB access."""
+        self.stats["published"] += 1
+        if str(discord_id) in self.completed_ids:
+            self.stats["short_circuited"] += 1
+            return False
+
+        self.queue.put_nowait(TutorialEvent(discord_id, guild_id, step_key, notify))
+        return True
+
+    async def _consume(self):
+        stopping = False
+        while not stopping:
+            event = await self.queue.get()
+            if event is _STOP:
+                return
+            batch = [event]
+            deadline = time.monotonic() + self.batch_window
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await self._process_safely(batch)
+
+    async def _process_safely(self, batch):
+        """Applies a batch; if it fails, retries its events one by one so one bad event doesn't drop the others."""
+        try:
+            await self._process(batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self.stats["failed"] += 1
+                print(f"[Tutorial] Event {batch[0].step_key} for {batch[0].discord_id} failed: {e}")
+                return
+            print(f"[Tutorial] Batch of {len(batch)} failed ({e}); retrying one event at a time")
+
+        for event in batch:
+            await self._process_safely([event])
+
+    async def _process(self, batch):
+        results = self.apply_batch(batch)
+
+        for event, msg in results:
+            if msg and event.notify:
+                try:
+                    await event.notify(msg)
+                except Exception as e:
+                    print(f"Tutorial Notify Error: {e}")
+
+    def apply_batch(self, batch):
+        """Applies every event of the batch in a single transaction. Returns (event, message) pairs."""
+        session = self.session_factory()
+        service = TutorialService(session)
+        results = []
+
+        try:
+            for event in batch:
+                if event.discord_id in self.completed_ids:
+                    continue
+                msg = service.complete_step(event.discord_id, event.guild_id, event.step_key, commit=False)
+                results.append((event, msg))
+
+            session.commit()
+
+            # Anyone who just finished the campaign no longer needs tracking
+            batch_ids = {event.discord_id for event in batch}
+            finished = session.query(GlobalTutorial.discord_id).filter(
+                GlobalTutorial.discord_id.in_(batch_ids),
+                GlobalTutorial.tutorial_progress >= self.total_steps
+            ).all()
+            self.completed_ids.update(row[0] for row in finished)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        self.stats["processed"] += len(results)
+        self.stats["batches"] += 1
+        return results
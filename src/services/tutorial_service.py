@@ -1,5 +1,7 @@
 import discord
 from src.database.models import User, GlobalTutorial
+from src.database.unit_of_work import get_user, commit as commit_session
+from src.database.flags import TUTORIAL_BITS, mask_of, has_bit
 
 class TutorialService:
     def __init__(self, session):
@@ -107,10 +109,10 @@ class TutorialService:
 
     def _get_user(self, discord_id, guild_id):
         # Local User (For Rewards)
-        return self.session.query(User).filter_by(discord_id=str(discord_id), guild_id=str(guild_id)).first()
+        return get_user(self.session, discord_id, guild_id)
 
     def get_or_create_user(self, discord_id, guild_id, username):
-        user = self.session.query(User).filter_by(discord_id=discord_id, guild_id=guild_id).first()
+        user = get_user(self.session, discord_id, guild_id)
         if not user:
             user = User(
                 discord_id=discord_id,
@@ -118,18 +120,29 @@ class TutorialService:
                 username=username
             )
             self.session.add(user)
-            self.session.commit()
+            commit_session(self.session)
         return user
 
-    def _get_global_tracker(self, discord_id):
+    def _get_global_tracker(self, discord_id, commit=True):
         # Global Tracker (For Progress)
         tracker = self.session.query(GlobalTutorial).filter_by(discord_id=str(discord_id)).first()
         if not tracker:
             tracker = GlobalTutorial(discord_id=str(discord_id))
             self.session.add(tracker)
-            self.session.commit()
+            # Flush only when batching so later events in the same batch find the row
+            if commit:
+                commit_session(self.session)
+            else:
+                self.session.flush()
         return tracker
 
+    def get_unfinished_ids(self, tutorial_number):
+        """Discord IDs that have not finished Tutorial N (1-based). Served by the tutorial_progress index."""
+        rows = self.session.query(GlobalTutorial.discord_id)\
+            .filter(GlobalTutorial.tutorial_progress < tutorial_number)\
+            .all()
+        return [row[0] for row in rows]
+
     def get_tutorial_status(self, discord_id, guild_id, username, page=None):
         """Returns the Embed for a specific tutorial level."""
         self.get_or_create_user(discord_id, guild_id, username)
@@ -166,7 +179,7 @@ class TutorialService:
 
         # 4. Build Embed
         data = self.TUTORIALS[target_index]
-        flags = tracker.tutorial_flags if isinstance(tracker.tutorial_flags, dict) else {}
+        flags = tracker.tutorial_flags or 0
 
         embed = discord.Embed(
             title=data["title"],
@@ -176,7 +189,7 @@ class TutorialService:
 
         for step_key, step_desc in data["steps"].items():
             # Check if this specific step is done
-            status = "✅" if flags.get(step_key) else "⬜"
+            status = "✅" if has_bit(flags, TUTORIAL_BITS[step_key]) else "⬜"
             embed.add_field(name=step_desc, value=status, inline=False)
 
         embed.set_footer(text=f"Page {target_index + 1}/{len(self.TUTORIALS)}")
@@ -222,7 +235,7 @@ class TutorialService:
 
         # Fast-forward local progress to match global
         user.tutorial_progress = global_level
-        self.session.commit()
+        commit_session(self.session)
 
         embed = discord.Embed(
             title="🎁 Tutorial Rewards Synced",
@@ -231,12 +244,13 @@ class TutorialService:
         )
         return {"success": True, "embed": embed}
 
-    def complete_step(self, discord_id, guild_id, step_key):
+    def complete_step(self, discord_id, guild_id, step_key, commit=True):
         """
         Marks a step as complete Globally. Grants reward Locally if level up.
         Strictly enforced: Can only complete steps for the CURRENT level.
+        Pass commit=False when the caller (e.g. the event bus) commits a whole batch.
         """
-        tracker = self._get_global_tracker(discord_id)
+        tracker = self._get_global_tracker(discord_id, commit=commit)
         current_level = tracker.tutorial_progress
         
         if current_level >= len(self.TUTORIALS): return None 
@@ -250,15 +264,20 @@ class TutorialService:
             return None 
 
         # 2. Update Global Flag
-        flags = dict(tracker.tutorial_flags) if tracker.tutorial_flags else {}
-        if flags.get(step_key):
+        bit = TUTORIAL_BITS[step_key]
+        flags = tracker.tutorial_flags or 0
+        if has_bit(flags, bit):
             return None # Already complete
 
-        flags[step_key] = True
-        tracker.tutorial_flags = flags 
+        # Atomic `tutorial_flags = tutorial_flags | bit` instead of rewriting the whole value.
+        # Flushed right away so later reads in the same session see the new mask.
+        tracker.tutorial_flags = GlobalTutorial.tutorial_flags.op("|")(bit)
+        self.session.flush()
+        flags |= bit
         
         # 3. Check Level Completion
-        all_done = all(flags.get(k) for k in data["steps"].keys())
+        level_mask = mask_of(TUTORIAL_BITS, data["steps"].keys())
+        all_done = (flags & level_mask) == level_mask
         
         result_msg = "✅ **Tutorial Step Complete!** Check `/tutorial`."
 
@@ -291,7 +310,8 @@ class TutorialService:
             else:
                 result_msg = f"🎉 **{data['title']} Completed!**\nReward: **{data['reward_text']}**\nType `/tutorial` for the next one!"
 
-        self.session.commit()
+        if commit:
+            commit_session(self.session)
         return result_msg
     
     
\ No newline at end of file
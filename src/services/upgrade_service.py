@@ -1,4 +1,5 @@
 from src.database.models import User
+from src.database.unit_of_work import get_user, get_user_state, commit
 from src.services.team_service import TeamService
 
 class UpgradeService:
@@ -41,11 +42,11 @@ class UpgradeService:
         }
 
     def _get_user(self, discord_id, guild_id):
-        return self.session.query(User).filter_by(discord_id=discord_id, guild_id=guild_id).first()
+        return get_user(self.session, discord_id, guild_id)
 
     def get_menu_info(self, discord_id, guild_id):
         """Returns data for the %u info menu."""
-        user = self._get_user(discord_id, guild_id)
+        user = get_user_state(self.session, discord_id, guild_id)
         if not user:
             # If user doesn't exist, just show default prices (level 0)
             user_balance = 0
@@ -125,7 +126,7 @@ class UpgradeService:
         # 5. Execute
         user.coins -= cost
         setattr(user, f"upgrade_{key}", current_level + 1)
-        self.session.commit()
+        commit(self.session)
 
         # Get the new bonus value to display
         new_bonus = config["bonuses"][current_level] # Now at this index
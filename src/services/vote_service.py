@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from sqlalchemy import func
+from src.database.models import User
+from src.database.user_state import user_state_cache
+
+class RecentVotes:
+    """
+    Remembers votes processed in the last `window_seconds`.
+    Top.gg retries webhooks that time out and sends no vote ID, so a repeat
+    (user, type) inside the window is treated as a retry, not a new vote.
+    A vote only counts as processed once its reward is committed: until then it
+    is in flight (repeats are dropped), and if applying it fails it is forgotten
+    so Top.gg's retry gets through.
+    """
+    def __init__(self, window_seconds=3600, clock=time.monotonic):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._seen = OrderedDict() # key -> timestamp, oldest first
+        self._in_flight = set()
+
+    def begin(self, key):
+        """True if the vote is new (it is now in flight); False if it is processed or already in flight."""
+        now = self.clock()
+
+        # Drop expired entries (insertion order == time order)
+        while self._seen:
+            oldest_key, ts = next(iter(self._seen.items()))
+            if now - ts < self.window_seconds:
+                break
+            self._seen.popitem(last=False)
+
+        if key in self._seen or key in self._in_flight:
+            return False
+        self._in_flight.add(key)
+        return True
+
+    def done(self, key):
+        """The reward was committed: repeats inside the window are retries from now on."""
+        self._in_flight.discard(key)
+        self._seen.pop(key, None)
+        self._seen[key] = self.clock()
+
+    def failed(self, key):
+        """The reward was not applied: accept the vote again when Top.gg retries it."""
+        self._in_flight.discard(key)
+
+class VoteService:
+    def __init__(self, session):
+        self.session = session
+        self.COIN_REWARD = 250
+        self.REFRESH_REWARD = 1
+
+    def apply_rewards(self, discord_ids):
+        """
+        Rewards every guild profile of every voter in one bulk UPDATE.
+        Returns {discord_id: profiles_rewarded} for voters that have at least one profile.
+        """
+        ids = list({str(i) for i in discord_ids})
+        if not ids:
+            return {}
+
+        rows = self.session.query(User.discord_id, func.count(User.id))\
+            .filter(User.discord_id.in_(ids))\
+            .group_by(User.discord_id)\
+            .all()
+        profile_counts = {discord_id: count for discord_id, count in rows}
+
+        if profile_counts:
+            self.session.query(User)\
+                .filter(User.discord_id.in_(list(profile_counts)))\
+                .update({
+                    User.coins: User.coins + self.COIN_REWARD,
+                    User.roll_refreshes: User.roll_refreshes + self.REFRESH_REWARD
+                }, synchronize_session=False)
+            self.session.commit()
+            # Bulk UPDATE skips the ORM write-through, so drop the cached profiles
+            user_state_cache.invalidate_discord_ids(profile_counts)
+
+        return profile_counts
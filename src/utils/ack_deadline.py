@@ -0,0 +1,24 @@
+# src/utils/ack_deadline.py
+"""
+Discord's 3 second acknowledgement deadline.
+
+An interaction has to be answered or deferred within 3 seconds, otherwise the
+user sees "This interaction failed" even though the command then runs. Every
+wait that happens before a callback defers (the readiness gate, rate limit
+queueing, the per-user lock) takes its time out of one budget, counted from
+when this process first saw the interaction, so together they always leave
+the callback time to respond.
+"""
+import time
+
+ACK_BUDGET_SECONDS = 1.5 # Total pre-ack waiting; the rest of the 3s covers the callback's own work and the round trip
+
+def received_at(interaction):
+    """When this process started handling the interaction (recorded by whichever layer asks first)."""
+    return interaction.extras.setdefault("received_at", time.monotonic())
+
+def ack_time_left(interaction):
+    """Seconds the interaction may still wait before it must be answered; None once it has been answered."""
+    if interaction.response.is_done():
+        return None
+    return max(0.0, ACK_BUDGET_SECONDS - (time.monotonic() - received_at(interaction)))
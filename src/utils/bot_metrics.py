@@ -0,0 +1,121 @@
+# src/utils/bot_metrics.py
+"""
+/metrics for the running bot: the registry from src/utils/metrics.py plus
+gauges read at scrape time from the pool, caches, locks, rate limiter,
+cluster bus, live matches and discord.py's view store.
+"""
+import hmac
+import math
+from aiohttp import web
+from src.config import CLUSTER_ID, METRICS_TOKEN
+from src.database.db import get_pool_status
+from src.database.user_state import user_state_cache
+from src.services.catalog_cache import catalog_cache
+from src.services.cluster_bus import cluster_bus
+from src.utils.metrics import loop_lag, registry
+from src.utils.rate_limit import rate_limiter
+from src.utils.user_locks import user_locks
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+def _gauge(name, help, value, labels=None):
+    return (name, "gauge", help, [(labels or {}, value)])
+
+def open_view_count(bot):
+    """Distinct views discord.py is still dispatching clicks to (timed-out and stopped views are removed)."""
+    store = getattr(getattr(bot, "_connection", None), "_view_store", None)
+    if store is None:
+        return 0
+    views = {id(item.view) for items in store._views.values() for item in items.values() if item.view}
+    views.update(id(view) for view in store._synced_message_views.values())
+    return len(views)
+
+def collect_runtime():
+    """Gauges for everything that keeps its own stats, independent of the bot object."""
+    families = []
+
+    pool = get_pool_status()
+    families.append(("touchline_db_pool_checkouts_total", "counter", "Pool checkouts.", [({}, pool["checkouts"])]))
+    families.append(("touchline_db_pool_timeouts_total", "counter", "Pool checkouts that timed out.", [({}, pool["timeouts"])]))
+    families.append(_gauge("touchline_db_pool_max_wait_seconds", "Longest pool checkout wait.", pool["max_wait_ms"] / 1000))
+    if "size" in pool:
+        families.append(_gauge("touchline_db_pool_checked_out", "Connections in use.", pool["checked_out"]))
+        families.append(_gauge("touchline_db_pool_capacity", "Pool size plus max overflow.", pool["capacity"]))
+        families.append(_gauge("touchline_db_pool_overflow", "Overflow connections open.", pool["overflow"]))
+
+    families.append(_gauge("touchline_event_loop_lag_last_seconds", "Most recent event loop lag sample.", loop_lag.lag))
+    families.append(_gauge("touchline_event_loop_lag_max_seconds", "Worst event loop lag since start.", loop_lag.max_lag))
+
+    cache = user_state_cache.snapshot()
+    families.append(_gauge("touchline_user_state_cache_entries", "User state cache entries.", cache["size"]))
+    families.append(_gauge("touchline_user_state_cache_hit_ratio", "User state cache hit ratio.", cache["hit_ratio"]))
+    families.append(("touchline_user_state_cache_events_total", "counter", "User state cache lookups and removals.", [
+        ({"event": event}, cache[event]) for event in ("hits", "misses", "evictions", "expired", "invalidations")
+    ]))
+
+    families.append(_gauge("touchline_catalog_players", "Rollable players in the catalog cache.",
+                           sum(len(ids) for ids in catalog_cache.ids_by_rarity.values())))
+    families.append(_gauge("touchline_catalog_version", "Loaded catalog version (-1 = not loaded).",
+                           catalog_cache.version if catalog_cache.loaded else -1))
+    families.append(("touchline_catalog_cache_events_total", "counter", "Catalog cache reloads and picks.", [
+        ({"event": event}, count) for event, count in sorted(catalog_cache.stats.items())
+    ]))
+
+    locks = user_locks.snapshot()
+    families.append(_gauge("touchline_user_locks", "Live per-user locks.", locks["live_locks"]))
+    families.append(("touchline_user_lock_events_total", "counter", "Per-user lock acquisitions.", [
+        ({"event": "acquired"}, locks["acquired"]), ({"event": "contended"}, locks["contended"]),
+        ({"event": "timed_out"}, locks["timeouts"]),
+    ]))
+    families.append(_gauge("touchline_user_lock_max_wait_seconds", "Longest per-user lock wait.", locks["max_wait"]))
+
+    families.append(_gauge("touchline_rate_limit_buckets", "Live rate limiter buckets.", len(rate_limiter)))
+    families.append(("touchline_rate_limit_total", "counter", "Rate limiter decisions per command group.", [
+        ({"group": group, "decision": decision}, count)
+        for group, counts in sorted(rate_limiter.stats.items()) for decision, count in sorted(counts.items())
+    ]))
+
+    families.append(("touchline_cluster_bus_events_total", "counter", "Cluster bus messages.", [
+        ({"event": event}, count) for event, count in sorted(cluster_bus.stats.items())
+    ]))
+    return families
+
+def bot_collector(bot):
+    def collect_bot():
+        match_cog = bot.get_cog("MatchCog")
+        latency = bot.latency
+        return [
+            _gauge("touchline_cluster_id", "Cluster ID of this process.", CLUSTER_ID),
+            _gauge("touchline_guilds", "Guilds on this cluster's shards.", len(bot.guilds)),
+            # nan / inf until the first heartbeat
+            _gauge("touchline_gateway_latency_seconds", "Average heartbeat latency over this process's shards.",
+                   latency if math.isfinite(latency) else None),
+            _gauge("touchline_live_matches", "Matches currently being played out.", match_cog.live_matches if match_cog else 0),
+            _gauge("touchline_open_views", "Views still listening for button clicks.", open_view_count(bot)),
+            _gauge("touchline_tutorial_queue", "Tutorial step events waiting to be written.", bot.tutorial_bus.queue.qsize()),
+        ]
+    return collect_bot
+
+def register_bot(bot):
+    registry.add_collector(collect_runtime)
+    registry.add_collector(bot_collector(bot))
+
+def authorized(request, token=None):
+    token = METRICS_TOKEN if token is None else token
+    if not token:
+        return True
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+async def metrics_handler(request):
+    if not authorized(request):
+        return web.Response(status=401, text="Unauthorized")
+    return web.Response(body=registry.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+def can_serve_on(host, token=None):
+    """Without a token, /metrics may only listen on loopback."""
+    token = METRICS_TOKEN if token is None else token
+    return bool(token) or host in LOOPBACK_HOSTS
+
+def add_metrics_route(app):
+    app.router.add_get("/metrics", metrics_handler)
@@ -0,0 +1,113 @@
+# src/utils/catalog.py
+"""
+Streaming parser for the player catalog text files.
+
+Lines are parsed lazily and written in chunks with one dialect-specific
+`INSERT ... ON CONFLICT (id) DO UPDATE` per chunk (executemany), instead of a
+SELECT + INSERT/UPDATE round trip per player. catalog_sync.py drives the writes.
+"""
+import hashlib
+import os
+import re
+from sqlalchemy.dialects import postgresql, sqlite
+from src.database.models import PlayerBase
+
+# Resolved from this file, so scripts and the bot find the data wherever they are started from
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Map your filenames to the Rarity string
+DATA_FILES = {
+    os.path.join(DATA_DIR, "ultra_rare_players_list.txt"): "Ultra Rare",
+    os.path.join(DATA_DIR, "rare_players.txt"): "Rare",
+    os.path.join(DATA_DIR, "common_players.txt"): "Common",
+    os.path.join(DATA_DIR, "legends_list.txt"): "Legend"
+}
+
+CHUNK_SIZE = 2000
+
+# Columns that come from the data files (and feed the content hash)
+CONTENT_COLUMNS = ["name", "positions", "club", "nationality", "image_url", "rarity", "rating"]
+
+# Columns refreshed when a player ID already exists
+UPSERT_COLUMNS = CONTENT_COLUMNS + ["content_hash", "retired"]
+
+def record_hash(row):
+    """Stable fingerprint of a player's catalog data, stored in player_base.content_hash."""
+    raw = "\x1f".join(str(row[col]) for col in CONTENT_COLUMNS)
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+def parse_value(raw_value):
+    clean = raw_value.replace("Value:", "").strip()
+    clean = re.sub(r'[^\d]', '', clean)
+    return int(clean) if clean else 0
+
+def parse_line(line, rarity):
+    """'Name, Positions, Club, Nation, Value: 826, image, sofifa_id' -> row dict, or None if malformed."""
+    line = line.strip()
+    if not line:
+        return None
+
+    parts = line.split(", ")
+    if len(parts) < 7:
+        parts = line.split(",") # Fallback
+        if len(parts) < 7:
+            return None
+
+    try:
+        row = {
+            # The ID comes from the file, so "Messi" is always the same row
+            "id": int(parts[6].strip()),
+            "name": parts[0].strip(),
+            "positions": parts[1].strip(),
+            "club": parts[2].strip(),
+            "nationality": parts[3].strip(),
+            "rating": parse_value(parts[4]),
+            "image_url": parts[5].strip(),
+            "rarity": rarity,
+            "retired": False,
+        }
+    except ValueError:
+        return None
+    row["content_hash"] = record_hash(row)
+    return row
+
+def iter_file(filename, rarity):
+    """Yields rows one line at a time; the file is never read into memory."""
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            row = parse_line(line, rarity)
+            if row:
+                yield row
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def build_upsert(dialect_name):
+    dialects = {"postgresql": postgresql, "sqlite": sqlite}
+    if dialect_name not in dialects:
+        raise ValueError(f"Catalog upsert is not supported on {dialect_name}")
+
+    stmt = dialects[dialect_name].insert(PlayerBase.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={col: stmt.excluded[col] for col in UPSERT_COLUMNS}
+    )
+
+def upsert_chunk(conn, stmt, chunk):
+    # Postgres refuses to update the same row twice in one statement: last line wins, like merge() did
+    rows = list({row["id"]: row for row in chunk}.values())
+    conn.execute(stmt, rows)
+    return len(rows)
+
+def iter_catalog(data_files=None):
+    """Every row of every data file that exists, in file order."""
+    for filename, rarity in (data_files or DATA_FILES).items():
+        if os.path.exists(filename):
+            yield from iter_file(filename, rarity)
@@ -0,0 +1,190 @@
+# src/utils/catalog_snapshot.py
+"""
+Binary catalog snapshot, read through mmap.
+
+Layout (little-endian):
+    header   MAGIC, format version, record count, catalog_version, table count
+    records  one fixed-width struct per player, sorted by id:
+             id, rating, rarity code, retired, name/club/nationality/positions indexes
+    tables   names, clubs, nationalities, positions; each is
+             u32 count, (count + 1) u32 offsets, then one UTF-8 blob
+
+The file is mapped read-only, so every process that opens it shares the same
+page-cache pages and nothing is parsed up front. Writes go to a temp file and
+are renamed over the old snapshot; readers that still map the old file keep a
+valid view.
+
+Usage:
+    python -m src.utils.catalog_snapshot                 # from the DB
+    python -m src.utils.catalog_snapshot --from-files    # from src/data/*.txt
+"""
+import bisect
+import mmap
+import os
+import struct
+from sqlalchemy import select
+from src.database.models import PlayerBase
+from src.utils.catalog import iter_catalog
+
+MAGIC = b"TLCS"
+FORMAT_VERSION = 1
+RARITIES = ["Common", "Rare", "Ultra Rare", "Legend"]
+TABLES = ["name", "club", "nationality", "positions"]
+
+HEADER = struct.Struct("<4sHHIII")        # magic, format, reserved, count, catalog_version, table count
+RECORD = struct.Struct("<iIBBxxIIII")     # id, rating, rarity, retired, name, club, nationality, positions
+U32 = struct.Struct("<I")
+OFFSET_PAIR = struct.Struct("<II")
+ID = struct.Struct("<i")
+
+# --- WRITE ---
+
+def _encode_table(values):
+    blob = bytearray()
+    offsets = [0]
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return U32.pack(len(values)) + struct.pack(f"<{len(offsets)}I", *offsets) + bytes(blob)
+
+def build_snapshot(rows, catalog_version=0):
+    """rows: dicts with id, rating, rarity, name, club, nationality, positions (and optionally retired) -> bytes"""
+    rows = sorted({row["id"]: row for row in rows}.values(), key=lambda row: row["id"])
+
+    # Names are nearly unique; clubs, nations and positions repeat a lot and are stored once
+    tables = {key: {} for key in TABLES}
+    def intern(key, value):
+        return tables[key].setdefault(value or "", len(tables[key]))
+
+    records = bytearray()
+    for row in rows:
+        records += RECORD.pack(
+            row["id"], row["rating"], RARITIES.index(row["rarity"]), 1 if row.get("retired") else 0,
+            *(intern(key, row[key]) for key in TABLES)
+        )
+
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(rows), catalog_version, len(TABLES)), bytes(records)]
+    parts += [_encode_table(list(tables[key])) for key in TABLES] # Dicts keep insertion order = index order
+    return b"".join(parts)
+
+def write_snapshot(path, rows, catalog_version=0):
+    data = build_snapshot(rows, catalog_version)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+def rows_from_db(conn):
+    table = PlayerBase.__table__
+    columns = [table.c.id, table.c.rating, table.c.rarity, table.c.retired] + [table.c[key] for key in TABLES]
+    return [dict(row._mapping) for row in conn.execute(select(*columns))]
+
+# --- READ ---
+
+class CatalogSnapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, fmt, _, self.count, self.catalog_version, table_count = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION or table_count != len(TABLES):
+            self.close()
+            raise ValueError(f"{path} is not a catalog snapshot (format {FORMAT_VERSION})")
+
+        self._records_at = HEADER.size
+        position = self._records_at + self.count * RECORD.size
+
+        # Only section positions are computed here; strings are decoded on access
+        self._tables = {}
+        for key in TABLES:
+            (size,) = U32.unpack_from(self._view, position)
+            offsets_at = position + 4
+            blob_at = offsets_at + (size + 1) * 4
+            self._tables[key] = (offsets_at, blob_at)
+            (blob_size,) = U32.unpack_from(self._view, offsets_at + size * 4)
+            position = blob_at + blob_size
+
+    def close(self):
+        if self._mmap is None:
+            return
+        # The view must be released before the map can close
+        self._view.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, key, index):
+        offsets_at, blob_at = self._tables[key]
+        start, end = OFFSET_PAIR.unpack_from(self._view, offsets_at + index * 4)
+        return str(self._view[blob_at + start:blob_at + end], "utf-8")
+
+    def _unpack(self, i):
+        return RECORD.unpack_from(self._view, self._records_at + i * RECORD.size)
+
+    def id_at(self, i):
+        return ID.unpack_from(self._view, self._records_at + i * RECORD.size)[0]
+
+    def record(self, i):
+        player_id, rating, rarity, retired, *indexes = self._unpack(i)
+        row = {"id": player_id, "rating": rating, "rarity": RARITIES[rarity], "retired": bool(retired)}
+        for key, index in zip(TABLES, indexes):
+            row[key] = self._string(key, index)
+        return row
+
+    def get(self, player_id):
+        """Binary search over the id-sorted records. None if the id is not in the snapshot."""
+        i = bisect.bisect_left(range(self.count), player_id, key=self.id_at)
+        if i < self.count and self.id_at(i) == player_id:
+            return self.record(i)
+        return None
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.record(i)
+
+    def iter_rollable(self):
+        """(id, rarity, club) of every non-retired player, decoding only the club string."""
+        for i in range(self.count):
+            player_id, _, rarity, retired, _, club, _, _ = self._unpack(i)
+            if not retired:
+                yield player_id, RARITIES[rarity], self._string("club", club)
+
+def open_snapshot(path):
+    """The snapshot at `path`, or None if it is missing or unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return CatalogSnapshot(path)
+    except (ValueError, OSError, struct.error) as e:
+        print(f"⚠️ Ignoring catalog snapshot {path}: {e}")
+        return None
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from src.config import CATALOG_SNAPSHOT_PATH
+
+    start = time.perf_counter()
+    if "--from-files" in sys.argv:
+        rows, version = list(iter_catalog()), 0
+    else:
+        from src.database.db import engine
+        from src.utils.catalog_sync import get_catalog_version
+        with engine.connect() as conn:
+            rows, version = rows_from_db(conn), get_catalog_version(conn)
+
+    size = write_snapshot(CATALOG_SNAPSHOT_PATH, rows, version)
+    print(f"✅ Wrote {len(rows)} players ({size / 1024:.0f} KiB, catalog version {version}) "
+          f"to {CATALOG_SNAPSHOT_PATH} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,220 @@
+# src/utils/catalog_sync.py
+"""
+Incremental catalog refresh.
+
+Every incoming record is hashed (see catalog.record_hash) and compared with
+player_base.content_hash, so a run only writes what actually changed:
+  - insert:  IDs that are new in the data files
+  - update:  IDs whose content hash differs (or that come back from retirement)
+  - retire:  IDs that are no longer in any data file (owned cards keep working)
+Because anything missing from the files gets retired, a run aborts before
+writing when a data file is missing or parses to zero rows, and refuses to
+retire more than MAX_RETIRE_FRACTION of the active catalog unless forced.
+Everything is applied in one transaction, which also bumps `catalog_version`
+in catalog_meta; the running bot polls it and reloads its catalog cache
+(on Postgres a NOTIFY makes every cluster reload right away).
+
+Usage:
+    python -m src.utils.catalog_sync             # apply the diff
+    python -m src.utils.catalog_sync --dry-run   # only print what would change
+    python -m src.utils.catalog_sync --force     # allow a mass retirement
+"""
+import os
+import time
+from sqlalchemy import bindparam, select, text, update
+from src.database.models import CatalogMeta, PlayerBase
+from src.utils.catalog import (
+    CHUNK_SIZE, CONTENT_COLUMNS, DATA_FILES, build_upsert, chunked, iter_file, record_hash, upsert_chunk
+)
+from src.utils.cluster import CATALOG_RELOAD, NOTIFY_CHANNEL, SCRIPT_ORIGIN, encode_messages
+
+VERSION_KEY = "catalog_version"
+REPORT_LIMIT = 20 # Lines per section in the dry-run report
+MAX_RETIRE_FRACTION = 0.1 # Retiring more of the active catalog in one run needs force=True / --force
+RETIRE_GUARD_MIN = 50 # ...unless it is only a handful of players (small dev and test catalogs)
+
+class CatalogSyncError(Exception):
+    """The data files look broken; nothing was written."""
+
+def iter_data_files(data_files):
+    """Like catalog.iter_catalog, but a missing file or one without a single parsable row is an error."""
+    for filename, rarity in data_files.items():
+        if not os.path.exists(filename):
+            raise CatalogSyncError(f"{filename} not found: syncing without it would retire every {rarity} player")
+        rows = 0
+        for row in iter_file(filename, rarity):
+            rows += 1
+            yield row
+        if rows == 0:
+            raise CatalogSyncError(f"{filename} has no parsable rows: syncing it would retire every {rarity} player")
+
+def check_retirements(existing, diff):
+    """Raises if the diff retires a suspiciously large part of the active catalog."""
+    active = sum(1 for row in existing.values() if not row["retired"])
+    retiring = len(diff["retire"])
+    if retiring > RETIRE_GUARD_MIN and retiring > active * MAX_RETIRE_FRACTION:
+        raise CatalogSyncError(
+            f"Refusing to retire {retiring} of {active} active players; re-run with --force if that is intended"
+        )
+
+def load_existing(conn):
+    """{id: row} for every player_base row. Rows written before content hashes existed get one computed."""
+    table = PlayerBase.__table__
+    columns = [table.c.id, table.c.content_hash, table.c.retired] + [table.c[col] for col in CONTENT_COLUMNS]
+
+    existing = {}
+    for row in conn.execute(select(*columns)):
+        row = dict(row._mapping)
+        row["stored_hash"] = row["content_hash"]
+        if row["content_hash"] is None:
+            row["content_hash"] = record_hash(row)
+        existing[row["id"]] = row
+    return existing
+
+def diff_catalog(existing, incoming):
+    """Compares parsed data-file rows with the DB rows from load_existing()."""
+    diff = {"insert": [], "update": [], "retire": [], "backfill": [], "unchanged": 0}
+
+    seen = {}
+    for row in incoming:
+        seen[row["id"]] = row # Last line wins, like the upsert
+
+    for player_id, row in seen.items():
+        current = existing.get(player_id)
+        if current is None:
+            diff["insert"].append(row)
+        elif current["content_hash"] != row["content_hash"] or current["retired"]:
+            changed = [col for col in CONTENT_COLUMNS if current[col] != row[col]]
+            diff["update"].append(dict(row, changed=changed, previous=current))
+        elif current["stored_hash"] is None:
+            # Same data, only the hash column is missing
+            diff["backfill"].append({"b_id": player_id, "b_hash": row["content_hash"]})
+        else:
+            diff["unchanged"] += 1
+
+    diff["retire"] = sorted(
+        player_id for player_id, current in existing.items()
+        if player_id not in seen and not current["retired"]
+    )
+    return diff
+
+def has_changes(diff):
+    return bool(diff["insert"] or diff["update"] or diff["retire"])
+
+def get_catalog_version(conn):
+    value = conn.execute(select(CatalogMeta.value).where(CatalogMeta.key == VERSION_KEY)).scalar()
+    return int(value) if value is not None else 0
+
+def bump_catalog_version(conn):
+    table = CatalogMeta.__table__
+    version = get_catalog_version(conn) + 1
+    result = conn.execute(update(table).where(table.c.key == VERSION_KEY).values(value=str(version)))
+    if result.rowcount == 0:
+        conn.execute(table.insert().values(key=VERSION_KEY, value=str(version)))
+    return version
+
+def apply_diff(conn, diff, chunk_size=CHUNK_SIZE, log=print):
+    """Writes one diff, logging each chunk. Returns the new catalog version (unchanged if nothing but hashes changed)."""
+    table = PlayerBase.__table__
+
+    # 1. Inserts and updates share the upsert (it also clears `retired`)
+    stmt = build_upsert(conn.dialect.name)
+    rows = diff["insert"] + [
+        {key: value for key, value in row.items() if key not in ("changed", "previous")}
+        for row in diff["update"]
+    ]
+    total = 0
+    for i, chunk in enumerate(chunked(rows, chunk_size), start=1):
+        chunk_start = time.perf_counter()
+        written = upsert_chunk(conn, stmt, chunk)
+        total += written
+        log(f"   • upsert chunk {i}: {written} rows in {time.perf_counter() - chunk_start:.2f}s (total {total})")
+
+    # 2. A new image URL has not been validated yet
+    new_images = [row["id"] for row in diff["update"] if "image_url" in row["changed"]]
+    for chunk in chunked(new_images, chunk_size):
+        conn.execute(update(table).where(table.c.id.in_(chunk)).values(image_status=None, image_checked_at=None))
+
+    # 3. Retirements
+    for i, chunk in enumerate(chunked(diff["retire"], chunk_size), start=1):
+        chunk_start = time.perf_counter()
+        conn.execute(update(table).where(table.c.id.in_(chunk)).values(retired=True))
+        log(f"   • retire chunk {i}: {len(chunk)} rows in {time.perf_counter() - chunk_start:.2f}s")
+
+    # 4. Hash backfill for rows loaded before content hashes existed
+    if diff["backfill"]:
+        backfill = update(table).where(table.c.id == bindparam("b_id")).values(content_hash=bindparam("b_hash"))
+        for chunk in chunked(diff["backfill"], chunk_size):
+            conn.execute(backfill, chunk)
+
+    # 5. Tell the bot (hash backfills do not change anything it caches)
+    if not has_changes(diff):
+        return get_catalog_version(conn)
+    version = bump_catalog_version(conn)
+    if conn.dialect.name == "postgresql":
+        # Delivered on commit; running clusters reload now instead of at their next poll
+        for payload in encode_messages(CATALOG_RELOAD, SCRIPT_ORIGIN, version=version):
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": payload})
+    return version
+
+def format_report(diff, limit=REPORT_LIMIT):
+    lines = [
+        f"➕ {len(diff['insert'])} new, ✏️ {len(diff['update'])} changed, "
+        f"🗄️ {len(diff['retire'])} retired, {diff['unchanged']} unchanged"
+        + (f" ({len(diff['backfill'])} hashes to backfill)" if diff["backfill"] else "")
+    ]
+
+    for row in diff["insert"][:limit]:
+        lines.append(f"   ➕ {row['id']} {row['name']} ({row['rarity']}, {row['rating']})")
+    for row in diff["update"][:limit]:
+        if row["changed"]:
+            fields = ", ".join(f"{col}: {row['previous'][col]} → {row[col]}" for col in row["changed"])
+        else:
+            fields = "back in the catalog"
+        lines.append(f"   ✏️ {row['id']} {row['name']}: {fields}")
+    for player_id in diff["retire"][:limit]:
+        lines.append(f"   🗄️ {player_id}")
+
+    hidden = sum(max(len(diff[key]) - limit, 0) for key in ("insert", "update", "retire"))
+    if hidden:
+        lines.append(f"   ... and {hidden} more")
+    return "\n".join(lines)
+
+def sync_catalog(engine, data_files=None, dry_run=False, force=False, chunk_size=CHUNK_SIZE, log=print):
+    """
+    Diffs the data files against player_base and (unless dry_run) applies the diff in one transaction.
+    Raises CatalogSyncError without writing when the data files look broken (see check_retirements).
+    """
+    start = time.perf_counter()
+
+    # The diff is computed inside the same transaction it is applied in
+    with engine.begin() as conn:
+        existing = load_existing(conn)
+        diff = diff_catalog(existing, iter_data_files(data_files or DATA_FILES))
+        log(format_report(diff))
+
+        if dry_run:
+            log("🔍 Dry run: nothing written.")
+            return diff
+        if not force:
+            check_retirements(existing, diff)
+        if not has_changes(diff) and not diff["backfill"]:
+            log("✅ Catalog is up to date.")
+            return diff
+
+        version = apply_diff(conn, diff, chunk_size, log)
+
+    log(f"✅ Catalog synced (version {version}) in {time.perf_counter() - start:.2f}s")
+    return diff
+
+if __name__ == "__main__":
+    import sys
+    from src.database.db import engine, init_db
+
+    print("🔌 Connecting to database...")
+    init_db()
+    try:
+        sync_catalog(engine, dry_run="--dry-run" in sys.argv, force="--force" in sys.argv)
+    except CatalogSyncError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -1,93 +1,142 @@
-import os
-import requests
+# src/utils/check_images.py
+"""
+Validates player image URLs concurrently and stores the result per player.
+
+One pooled aiohttp session is shared by every check. The connector caps total
+and per-host connections, so the CDN sees a bounded number of parallel requests.
+Results go to player_base.image_status / image_checked_at:
+  - "ok":     the URL served an image
+  - "broken": the server answered 4xx or did not serve an image (embeds skip these)
+  - "error":  timeout, connection failure or 5xx (re-checked on the next run)
+Only entries that were never checked, failed with "error" or are older than
+--max-age-hours are revisited.
+
+Usage:
+    python -m src.utils.check_images                    # stale entries, every rarity
+    python -m src.utils.check_images --rarity Legend
+    python -m src.utils.check_images --all              # ignore the timestamps
+"""
+import asyncio
 import time
+from datetime import datetime, timedelta
+import aiohttp
+from sqlalchemy import bindparam, or_, select, update
+from src.database.models import PlayerBase
+
+# --- CONFIGURATION ---
+CONCURRENCY = 50          # Connections open at once (and checks in flight)
+PER_HOST_LIMIT = 10       # Connections per CDN host
+REQUEST_TIMEOUT = 10      # Seconds per check
+MAX_AGE_HOURS = 24 * 7    # "ok"/"broken" results older than this are re-checked
+WRITE_CHUNK = 500
+
+# Headers to look like a real browser (prevents 403 Forbidden on some CDNs)
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+def classify(status, content_type, url):
+    if status == 200:
+        if content_type.startswith("image") or url.lower().endswith(IMAGE_EXTENSIONS):
+            return "ok"
+        return "broken"
+    if 400 <= status < 500:
+        return "broken"
+    return "error"
+
+async def check_url(http, url):
+    """-> (status, detail). HEAD first (no body); GET when a server refuses HEAD."""
+    try:
+        async with http.head(url, allow_redirects=True) as response:
+            status, content_type = response.status, response.headers.get("Content-Type", "")
+        if status >= 400:
+            async with http.get(url) as response:
+                # Headers are enough; the body is never read
+                status, content_type = response.status, response.headers.get("Content-Type", "")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return "error", type(e).__name__
+    return classify(status, content_type, url), f"{status} {content_type}".strip()
+
+async def check_urls(items, concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT, timeout=REQUEST_TIMEOUT):
+    """items: [(player_id, url)] -> {player_id: (status, detail)}"""
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    semaphore = asyncio.Semaphore(concurrency) # Bounds pending tasks, not just sockets
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=HEADERS) as http:
+        async def run(player_id, url):
+            async with semaphore:
+                return player_id, await check_url(http, url)
+
+        results = await asyncio.gather(*(run(player_id, url) for player_id, url in items))
+    return dict(results)
+
+def select_stale(conn, now, max_age_hours=MAX_AGE_HOURS, rarity=None, check_all=False):
+    table = PlayerBase.__table__
+    query = select(table.c.id, table.c.image_url)\
+        .where(table.c.image_url.isnot(None), table.c.image_url != "N/A", table.c.retired == False)
 
-# --- PATH CONFIGURATION ---
-# This matches your scrape_players.py logic exactly
-current_dir = os.path.dirname(os.path.abspath(__file__))  # src/utils
-project_root = os.path.dirname(current_dir)             # src/ (or project root depending on depth)
-DATA_DIR = os.path.join(project_root, "data")           # Path to /data folder
-
-# The specific file to check
-FILE_PATH = os.path.join(DATA_DIR, "legends_list.txt")
-
-def check_images():
-    # 1. Verify file existence using the absolute path
-    if not os.path.exists(FILE_PATH):
-        print(f"❌ Error: Could not find file at: {FILE_PATH}")
-        print(f"   Current working dir: {os.getcwd()}")
-        return
-
-    print(f"🕵️  Scanning image URLs in: {FILE_PATH}\n")
-    
-    valid_count = 0
-    broken_count = 0
-    total_count = 0
-    
-    # Headers to look like a real browser (prevents 403 Forbidden on some CDNs)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
-    # 2. Read the file
-    with open(FILE_PATH, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    # 3. Process every line
-    for line in lines:
-        parts = line.strip().split(', ')
-        
-        # Skip empty lines or headers
-        if len(parts) < 7:
-            continue
-            
-        total_count += 1
-        name = parts[0]
-        url = parts[5] # Index 5 is the Image URL
-        
-        status_msg = ""
-        
-        try:
-            # We attempt a 'HEAD' request first (faster, doesn't download the image)
-            response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
-            
-            # If HEAD fails (some servers block it), fallback to GET
-            if response.status_code >= 400:
-                 response = requests.get(url, headers=headers, timeout=5, stream=True)
-            
-            if response.status_code == 200:
-                # Extra check: ensure it is actually an image (optional but good)
-                content_type = response.headers.get('Content-Type', '')
-                if 'image' in content_type or url.endswith(('.jpg', '.png', '.webp')):
-                    status_msg = "✅ OK"
-                    valid_count += 1
-                else:
-                    status_msg = f"⚠️  Not Image? ({content_type})"
-                    # We count this as valid for now, just a warning
-                    valid_count += 1
-            else:
-                status_msg = f"❌ Broken ({response.status_code})"
-                broken_count += 1
-                
-        except requests.exceptions.RequestException as e:
-            status_msg = f"❌ Error"
-            broken_count += 1
-
-        print(f"{status_msg} | {name}")
-        
-        # Sleep briefly to be polite to servers
-        time.sleep(0.1)
-
-    # 4. Final Summary
-    print("\n" + "="*30)
-    print(f"📊 SUMMARY")
-    print(f"Total Checked: {total_count}")
-    print(f"✅ Valid:      {valid_count}")
-    print(f"❌ Broken:     {broken_count}")
-    print("="*30)
-
-    if broken_count > 0:
-        print("\n💡 Action Required: Open 'data/legends_list.txt', fix the broken URLs, then run 'update_legends.py'.")
+    if not check_all:
+        cutoff = now - timedelta(hours=max_age_hours)
+        query = query.where(or_(
+            table.c.image_checked_at.is_(None),
+            table.c.image_checked_at < cutoff,
+            table.c.image_status == "error",
+        ))
+    if rarity:
+        query = query.where(table.c.rarity == rarity)
+    return [(row.id, row.image_url) for row in conn.execute(query)]
+
+def save_results(conn, results, now):
+    table = PlayerBase.__table__
+    stmt = update(table).where(table.c.id == bindparam("b_id"))\
+        .values(image_status=bindparam("b_status"), image_checked_at=bindparam("b_checked"))
+    rows = [{"b_id": player_id, "b_status": status, "b_checked": now} for player_id, (status, _) in results.items()]
+    for i in range(0, len(rows), WRITE_CHUNK):
+        conn.execute(stmt, rows[i:i + WRITE_CHUNK])
+
+def check_images(engine, max_age_hours=MAX_AGE_HOURS, rarity=None, check_all=False,
+                 concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT, timeout=REQUEST_TIMEOUT, log=print):
+    now = datetime.utcnow()
+    with engine.connect() as conn:
+        items = select_stale(conn, now, max_age_hours, rarity, check_all)
+
+    if not items:
+        log("✅ Every image was checked recently.")
+        return {}
+
+    log(f"🕵️  Checking {len(items)} image URLs ({concurrency} at once, {per_host} per host)...")
+    start = time.perf_counter()
+    results = asyncio.run(check_urls(items, concurrency, per_host, timeout))
+
+    # Network time is over before the write transaction starts
+    with engine.begin() as conn:
+        save_results(conn, results, now)
+
+    counts = {"ok": 0, "broken": 0, "error": 0}
+    urls = dict(items)
+    for player_id, (status, detail) in results.items():
+        counts[status] += 1
+        if status != "ok":
+            log(f"❌ {status} ({detail}) | {player_id} {urls[player_id]}")
+
+    log("\n" + "="*30)
+    log(f"📊 SUMMARY ({time.perf_counter() - start:.1f}s)")
+    log(f"Total Checked: {len(results)}")
+    log(f"✅ Valid:      {counts['ok']}")
+    log(f"❌ Broken:     {counts['broken']}")
+    log(f"⚠️  Errors:     {counts['error']} (re-checked next run)")
+    log("="*30)
+    return results
 
 if __name__ == "__main__":
-    check_images()
\ No newline at end of file
+    import sys
+    from src.database.db import engine, init_db
+
+    rarity = sys.argv[sys.argv.index("--rarity") + 1] if "--rarity" in sys.argv else None
+    max_age = float(sys.argv[sys.argv.index("--max-age-hours") + 1]) if "--max-age-hours" in sys.argv else MAX_AGE_HOURS
+
+    print("🔌 Connecting to database...")
+    init_db()
+    check_images(engine, max_age_hours=max_age, rarity=rarity, check_all="--all" in sys.argv)
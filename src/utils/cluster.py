@@ -0,0 +1,72 @@
+# src/utils/cluster.py
+"""
+Shard/cluster arithmetic and the cross-cluster message format.
+
+A cluster is one bot process owning a contiguous range of shards. Discord
+routes every event (and interaction) of a guild to shard
+(guild_id >> 22) % shard_count, so all per-guild state lives in exactly one
+cluster. Per-user state that spans guilds (votes, catalog) is kept coherent
+with small JSON messages on the NOTIFY_CHANNEL (see src/services/cluster_bus.py).
+"""
+import json
+
+NOTIFY_CHANNEL = "touchline_cluster"
+MAX_PAYLOAD_BYTES = 7900 # Postgres NOTIFY payloads must stay under 8000 bytes
+
+# Message kinds
+USER_STATE_INVALIDATE = "user_state.invalidate"   # discord_ids: profiles changed in several guilds
+CATALOG_RELOAD = "catalog.reload"                 # version: player_base changed
+SCRIPT_ORIGIN = "script"                          # Origin of messages sent outside any cluster
+
+def shard_ranges(shard_count, cluster_count):
+    """Splits shards 0..shard_count-1 into cluster_count contiguous, near-equal ranges."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    base, extra = divmod(shard_count, cluster_count)
+    ranges, start = [], 0
+    for cluster in range(cluster_count):
+        size = base + (1 if cluster < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+def encode_messages(kind, origin, key=None, values=None, **fields):
+    """
+    JSON payloads for one event. A long `values` list is split over several
+    messages so each stays under the NOTIFY size limit.
+    """
+    def encode(chunk):
+        message = dict(fields, kind=kind, origin=origin)
+        if key:
+            message[key] = chunk
+        return json.dumps(message, separators=(",", ":"))
+
+    if not key:
+        return [encode(None)]
+
+    payloads, chunk = [], []
+    for value in values or []:
+        if chunk and len(encode(chunk + [value]).encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            payloads.append(encode(chunk))
+            chunk = []
+        chunk.append(value)
+    if chunk:
+        payloads.append(encode(chunk))
+    return payloads
+
+def decode_message(payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) and "kind" in message else None
+
+def cluster_env(cluster_id, shard_ids, shard_count, cluster_count, base_env):
+    """Environment for one cluster process (read back by src/config.py)."""
+    env = dict(base_env)
+    env.update({
+        "CLUSTER_ID": str(cluster_id),
+        "CLUSTER_COUNT": str(cluster_count),
+        "SHARD_COUNT": str(shard_count),
+        "SHARD_IDS": ",".join(str(shard) for shard in shard_ids),
+    })
+    return env
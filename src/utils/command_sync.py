@@ -0,0 +1,59 @@
+# src/utils/command_sync.py
+"""
+Hash-gated app command sync.
+
+`tree.sync()` is slow and heavily rate-limited, so at startup the full command
+payload (names, descriptions, options, choices, permissions) is hashed and only
+synced when the hash differs from the last successful sync for that scope.
+Hashes are kept in a small JSON file, keyed by application ID and scope.
+"""
+import hashlib
+import json
+import os
+from src.config import COMMAND_HASH_PATH
+
+def tree_payload(tree, guild=None):
+    """Exactly what tree.sync() would upload for this scope, in a stable order."""
+    commands = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    return sorted(commands, key=lambda c: (c.get("type", 1), c["name"]))
+
+def tree_hash(tree, guild=None):
+    raw = json.dumps(tree_payload(tree, guild), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def scope_key(tree, guild=None):
+    scope = f"guild:{guild.id}" if guild else "global"
+    return f"{tree.client.application_id}:{scope}"
+
+def load_hashes(path=COMMAND_HASH_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} # A corrupt file just means one extra sync
+
+def save_hash(key, value, path=COMMAND_HASH_PATH):
+    hashes = load_hashes(path)
+    hashes[key] = value
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+async def sync_tree(tree, guild=None, force=False, path=COMMAND_HASH_PATH):
+    """
+    Syncs one scope unless its command hash matches the last successful sync.
+    Returns the number of synced commands, or None if the sync was skipped.
+    """
+    key = scope_key(tree, guild)
+    current = tree_hash(tree, guild)
+
+    if not force and load_hashes(path).get(key) == current:
+        return None
+
+    synced = await tree.sync(guild=guild)
+    # Only recorded after Discord accepted it, so a failed sync is retried next boot
+    save_hash(key, current, path)
+    return len(synced)
@@ -0,0 +1,132 @@
+# src/utils/gateway_cache.py
+"""
+Gateway intents and discord.py cache policy, plus a memory report.
+
+The bot works through slash commands: interaction payloads already carry the
+invoking member and any member/user options, so it does not need the member
+list or the message cache. The "low" profile turns both off; the "default"
+profile keeps the previous behaviour.
+"""
+import os
+import discord
+from src import config
+from src.database.user_state import user_state_cache
+from src.services.catalog_cache import catalog_cache
+from src.utils.rate_limit import rate_limiter
+from src.utils.user_locks import user_locks
+
+PROFILES = {
+    "default": {
+        "members_intent": True,
+        "message_content": True,
+        "member_cache": "all",
+        "chunk_at_startup": True,
+        "message_cache_size": 1000,
+    },
+    "low": {
+        # Owner prefix commands still work by mentioning the bot or in DMs
+        "members_intent": False,
+        "message_content": False,
+        "member_cache": "none",
+        "chunk_at_startup": False,
+        "message_cache_size": 0,
+    },
+}
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes", "on")
+
+def resolve_policy(profile=None, overrides=None):
+    """Profile defaults with the GATEWAY_* overrides applied. Unknown profiles fall back to default."""
+    profile = profile or config.MEMORY_PROFILE
+    policy = dict(PROFILES.get(profile, PROFILES["default"]), profile=profile if profile in PROFILES else "default")
+
+    if overrides is None:
+        overrides = {
+            "members_intent": config.GATEWAY_MEMBERS_INTENT,
+            "message_content": config.GATEWAY_MESSAGE_CONTENT,
+            "member_cache": config.GATEWAY_MEMBER_CACHE,
+            "chunk_at_startup": config.GATEWAY_CHUNK_AT_STARTUP,
+            "message_cache_size": config.GATEWAY_MESSAGE_CACHE_SIZE,
+        }
+    for key, raw in overrides.items():
+        if raw is None or raw == "":
+            continue
+        if key == "member_cache":
+            policy[key] = raw.lower()
+        elif key == "message_cache_size":
+            policy[key] = int(raw)
+        else:
+            policy[key] = _flag(raw)
+
+    # Without the members intent discord.py can neither chunk nor track joins
+    if not policy["members_intent"]:
+        policy["chunk_at_startup"] = False
+        if policy["member_cache"] in ("all", "joined"):
+            policy["member_cache"] = "voice" if policy["member_cache"] == "all" else "none"
+    return policy
+
+def _member_cache_flags(name, intents):
+    if name == "all":
+        return discord.MemberCacheFlags.from_intents(intents)
+    if name == "joined":
+        return discord.MemberCacheFlags(joined=True, voice=False)
+    if name == "voice":
+        return discord.MemberCacheFlags(joined=False, voice=True)
+    return discord.MemberCacheFlags.none()
+
+def bot_options(policy=None):
+    """Keyword arguments for commands.Bot(...) implementing the policy."""
+    policy = policy or resolve_policy()
+
+    intents = discord.Intents.default()
+    intents.members = policy["members_intent"]
+    intents.message_content = policy["message_content"]
+    if policy["profile"] == "low":
+        # Typing events are never used; skip the gateway traffic
+        intents.typing = False
+
+    return {
+        "intents": intents,
+        "member_cache_flags": _member_cache_flags(policy["member_cache"], intents),
+        "chunk_guilds_at_startup": policy["chunk_at_startup"],
+        # discord.py takes None (not 0) to disable the message cache
+        "max_messages": policy["message_cache_size"] or None,
+    }
+
+def _rss_bytes():
+    """Current resident set size (Linux), falling back to the peak from getrusage."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+def memory_report(bot):
+    """Entry counts for discord.py's caches and ours, plus process RSS."""
+    guilds = bot.guilds
+    report = {
+        "rss_bytes": _rss_bytes(),
+        "guilds": len(guilds),
+        "members": sum(len(guild.members) for guild in guilds),
+        "member_counts": sum(guild.member_count or 0 for guild in guilds), # What Discord says, cached or not
+        "users": len(bot.users),
+        "channels": sum(len(guild.channels) + len(guild.threads) for guild in guilds),
+        "roles": sum(len(guild.roles) for guild in guilds),
+        "emojis": len(bot.emojis),
+        "stickers": len(bot.stickers),
+        "messages": len(bot.cached_messages),
+        "private_channels": len(bot.private_channels),
+        "views": len(bot.persistent_views),
+    }
+
+    report["user_state_cache"] = user_state_cache.snapshot()["size"]
+    report["catalog_players"] = sum(len(ids) for ids in catalog_cache.ids_by_rarity.values())
+    report["rate_limit_buckets"] = len(rate_limiter)
+    report["user_locks"] = user_locks.snapshot()["live_locks"]
+    return report
@@ -0,0 +1,167 @@
+# src/utils/loop_watchdog.py
+"""
+Event loop blocking watchdog.
+
+The lag monitor in src/utils/metrics.py only learns about a stall once the
+loop is free again, when the code that blocked it has already returned. This
+thread watches the monitor's heartbeat instead: once a beat is overdue by more
+than the threshold it takes the loop thread's stack from sys._current_frames(),
+which shows the line that is blocking and the interaction it is serving. The
+block is recorded, with its full duration, when the loop wakes up again.
+"""
+import os
+import sys
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from src.config import LOOP_BLOCK_THRESHOLD_MS
+from src.utils.metrics import loop_lag, registry
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+CHECK_INTERVAL = 0.05 # How often the watchdog thread looks at the heartbeat
+STACK_DEPTH = 12      # Innermost frames kept per block
+
+block_seconds = registry.histogram(
+    "touchline_loop_block_seconds", "Event loop stalls over the watchdog threshold, by the command that caused them.",
+    ("command",), buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+def _site(frame_summary):
+    filename = os.path.relpath(frame_summary.filename, ROOT_DIR) if frame_summary.filename.startswith(ROOT_DIR) else frame_summary.filename
+    return f"{filename}:{frame_summary.lineno} in {frame_summary.name}"
+
+def find_command(frame):
+    """The interaction a stack is serving: the nearest frame with an `interaction` local."""
+    while frame is not None:
+        interaction = frame.f_locals.get("interaction")
+        if interaction is not None and hasattr(interaction, "command"):
+            if interaction.command is not None:
+                return f"/{interaction.command.qualified_name}"
+            return f"component:{frame.f_code.co_name}" # Button or select callback
+        frame = frame.f_back
+    return "background"
+
+def describe_stack(frame):
+    stack = traceback.extract_stack(frame)
+    ours = [summary for summary in stack if summary.filename.startswith(SRC_DIR)]
+    return {
+        "command": find_command(frame),
+        # Our innermost line is the useful one; library frames below it are how it blocks
+        "site": _site(ours[-1] if ours else stack[-1]),
+        "stack": traceback.format_list(stack[-STACK_DEPTH:]),
+    }
+
+class LoopWatchdog:
+    def __init__(self, monitor=loop_lag, threshold=LOOP_BLOCK_THRESHOLD_MS / 1000,
+                 check_interval=CHECK_INTERVAL, history=50):
+        self.monitor = monitor
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.recent = deque(maxlen=history) # Finished blocks, newest last
+        self.loop_thread_id = None
+        self._pending = None # Stack captured for the beat that is currently overdue
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    async def start(self):
+        """Must run on the loop (it records the loop's thread). The lag monitor provides the heartbeat."""
+        if self._thread is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.monitor.listeners.append(self._on_wakeup)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+        if self._on_wakeup in self.monitor.listeners:
+            self.monitor.listeners.remove(self._on_wakeup)
+
+    # --- WATCHDOG THREAD ---
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[Watchdog] Check failed: {e}")
+
+    def check(self):
+        beat = self.monitor.beat
+        if beat is None:
+            return
+        overdue = self.monitor.clock() - beat - self.monitor.interval
+        if overdue < self.threshold:
+            return
+        with self._lock:
+            if self._pending is not None and self._pending["beat"] == beat:
+                return # Already captured this stall
+
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None or self.monitor.beat != beat:
+            return # The loop woke up meanwhile; this stack would be innocent
+        capture = describe_stack(frame)
+        capture["beat"] = beat
+        with self._lock:
+            self._pending = capture
+
+    # --- LOOP THREAD ---
+
+    def _on_wakeup(self, lag):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if lag < self.threshold:
+            return
+        if pending is None or pending["beat"] != self.monitor.beat:
+            # Too short for the thread to catch, or blocked in C code holding the GIL
+            pending = {"command": "unknown", "site": "not captured", "stack": []}
+
+        block = {
+            "command": pending["command"],
+            "site": pending["site"],
+            "stack": pending["stack"],
+            "blocked_seconds": lag,
+            "at": datetime.utcnow(),
+        }
+        self.recent.append(block)
+        block_seconds.observe(lag, block["command"])
+        print(f"🧊 [Watchdog] Event loop blocked {lag * 1000:.0f} ms by {block['command']} at {block['site']}")
+
+    # --- REPORT ---
+
+    def summary(self):
+        """Recent blocks grouped by command: [(command, count, total seconds, worst block)], worst total first."""
+        groups = {}
+        for block in self.recent:
+            group = groups.setdefault(block["command"], [0, 0.0, None])
+            group[0] += 1
+            group[1] += block["blocked_seconds"]
+            if group[2] is None or block["blocked_seconds"] > group[2]["blocked_seconds"]:
+                group[2] = block
+        ranked = [(command, count, total, worst) for command, (count, total, worst) in groups.items()]
+        return sorted(ranked, key=lambda r: r[2], reverse=True)
+
+    def report(self, stack_lines=6):
+        summary = self.summary()
+        if not summary:
+            return f"No event loop blocks over {self.threshold * 1000:.0f} ms."
+
+        lines = [f"--- Event loop blocks over {self.threshold * 1000:.0f} ms (last {len(self.recent)}) ---"]
+        for command, count, total, worst in summary:
+            lines.append(f"  {command}: {count}x, {total * 1000:,.0f} ms total, worst {worst['blocked_seconds'] * 1000:,.0f} ms at {worst['site']}")
+
+        worst = summary[0][3]
+        if worst["stack"]:
+            lines.append(f"  Stack of the worst {summary[0][0]} block:")
+            lines.extend("    " + line.rstrip().replace("\n", "\n    ") for line in worst["stack"][-stack_lines:])
+        return "\n".join(lines)
+
+loop_watchdog = LoopWatchdog()
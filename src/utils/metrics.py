@@ -0,0 +1,257 @@
+# src/utils/metrics.py
+"""
+In-process metrics, rendered in the Prometheus text format.
+
+Counters and histograms are recorded where things happen (commands, SQL
+queries, service stages). Gauges are read from the existing stats objects by
+collector callbacks at scrape time, so between scrapes they cost nothing.
+Nothing here imports the rest of the bot: src/utils/bot_metrics.py wires it up.
+"""
+import asyncio
+import threading
+import time
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SQL_VERBS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values = {} # label values -> count
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values):
+        return self.values.get(label_values, 0)
+
+    def lines(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in items]
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {} # label values -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *label_values):
+        series = self.values.get(label_values)
+        return series[-1] if series else 0
+
+    def lines(self):
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.values.items())
+        lines = []
+        for key, series in items:
+            for bound, cumulative in zip(self.buckets + (float("inf"),), series[:len(self.buckets)] + [series[-1]]):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {} # name -> Counter / Histogram
+        self.collectors = [] # callables returning [(name, kind, help, [(labels dict, value)])]
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, labels, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, labels, **kwargs)
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._get_or_create(Counter, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for name in sorted(self.metrics):
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.lines())
+
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                # One broken collector must not take the whole scrape down
+                print(f"[Metrics] Collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    label_text = _labels(list(labels), list(labels.values()))
+                    lines.append(f"{name}{label_text} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- COMMANDS ---
+
+command_seconds = registry.histogram(
+    "touchline_command_seconds", "Slash command latency, from the readiness check to completion.", ("command", "status")
+)
+command_errors = registry.counter(
+    "touchline_command_errors_total", "Slash commands that raised, by exception type.", ("command", "error")
+)
+
+# --- SERVICES ---
+
+stage_seconds = registry.histogram(
+    "touchline_service_stage_seconds", "Time spent in each stage of a service call.", ("operation", "stage"), STAGE_BUCKETS
+)
+service_outcomes = registry.counter(
+    "touchline_service_outcomes_total", "Service call results, by outcome.", ("operation", "outcome")
+)
+
+class StageTimer:
+    """
+    Times the consecutive stages of one service call: lap(stage) records the
+    time since the previous lap (or since the timer was made).
+    """
+    def __init__(self, operation, clock=time.perf_counter):
+        self.operation = operation
+        self.clock = clock
+        self.last = clock()
+
+    def lap(self, stage):
+        now = self.clock()
+        stage_seconds.observe(now - self.last, self.operation, stage)
+        self.last = now
+
+    def outcome(self, outcome):
+        service_outcomes.inc(self.operation, outcome)
+
+def stages(operation):
+    return StageTimer(operation)
+
+# --- DATABASE ---
+
+query_seconds = registry.histogram(
+    "touchline_db_query_seconds", "SQL statement execution time, by statement type.", ("statement",), QUERY_BUCKETS
+)
+query_errors = registry.counter(
+    "touchline_db_query_errors_total", "SQL statements that raised, by statement type.", ("statement",)
+)
+
+def statement_verb(statement):
+    words = statement.lstrip().split(None, 1)
+    verb = words[0].upper() if words else ""
+    return verb if verb in SQL_VERBS else "OTHER"
+
+def instrument_engine(engine):
+    """Times every statement on this engine through cursor execute events."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            query_seconds.observe(time.perf_counter() - starts.pop(), statement_verb(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("metrics_query_start"):
+            conn.info["metrics_query_start"].pop()
+        query_errors.inc(statement_verb(context.statement or ""))
+
+# --- EVENT LOOP ---
+
+class LoopLagMonitor:
+    """
+    Sleeps `interval` seconds at a time and records how late it woke up: the
+    time the loop spent running other callbacks it could not interrupt.
+    `beat` is when the current sleep started, so another thread can tell the
+    loop is stuck before the late wakeup happens (src/utils/loop_watchdog.py).
+    """
+    def __init__(self, interval=0.5, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.beat = None
+        self.listeners = [] # callables(lag), run on the loop after every wakeup
+        self.histogram = registry.histogram("touchline_event_loop_lag_seconds", "How late the event loop ran a timer.")
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.beat = self.clock()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, self.clock() - self.beat - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.histogram.observe(self.lag)
+            for listener in self.listeners:
+                listener(self.lag)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.beat = None
+
+loop_lag = LoopLagMonitor()
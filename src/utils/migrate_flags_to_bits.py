@@ -0,0 +1,69 @@
+import json
+from sqlalchemy import inspect, text, Integer
+from src.database.flags import tutorial_flags_from_json, team_flags_from_json
+
+# (table, primary key, column, JSON -> bitmask converter)
+FLAG_COLUMNS = [
+    ("users", "id", "tutorial_flags", tutorial_flags_from_json),
+    ("users", "id", "team_rewards_flags", team_flags_from_json),
+    ("global_tutorials", "discord_id", "tutorial_flags", tutorial_flags_from_json),
+]
+
+BATCH_SIZE = 1000
+
+def _is_integer_column(conn, table, column):
+    for col in inspect(conn).get_columns(table):
+        if col["name"] == column:
+            return isinstance(col["type"], Integer)
+    return False
+
+def _convert_column(conn, table, pk, column, converter):
+    tmp = f"{column}_bits"
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {tmp} BIGINT NOT NULL DEFAULT 0"))
+
+    rows = conn.execute(text(f"SELECT {pk}, {column} FROM {table} WHERE {column} IS NOT NULL")).fetchall()
+    updates = []
+    for row_id, raw in rows:
+        # JSONB comes back decoded; SQLite JSON comes back as text
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                raw = None
+        mask = converter(raw)
+        if mask:
+            updates.append({"id": row_id, "mask": mask})
+
+    stmt = text(f"UPDATE {table} SET {tmp} = :mask WHERE {pk} = :id")
+    for i in range(0, len(updates), BATCH_SIZE):
+        conn.execute(stmt, updates[i:i + BATCH_SIZE])
+
+    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+    conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {tmp} TO {column}"))
+    return len(updates)
+
+def migrate_flags(conn):
+    """Converts the JSON flag columns to integer bitmasks. Safe to run twice."""
+    for table, pk, column, converter in FLAG_COLUMNS:
+        if _is_integer_column(conn, table, column):
+            print(f"   ⏭️  {table}.{column} is already a bitmask.")
+            continue
+        converted = _convert_column(conn, table, pk, column, converter)
+        print(f"   ✅ {table}.{column}: converted {converted} rows.")
+
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_global_tutorials_tutorial_progress "
+        "ON global_tutorials (tutorial_progress)"
+    ))
+
+if __name__ == "__main__":
+    from src.database.db import engine
+
+    print("🔌 Connecting to database...")
+    try:
+        # One transaction: either every column is converted or none is
+        with engine.begin() as conn:
+            migrate_flags(conn)
+        print("✅ Success! Flag columns are now bitmasks.")
+    except Exception as e:
+        print(f"❌ Error migrating flags: {e}")
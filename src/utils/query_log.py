@@ -0,0 +1,225 @@
+# src/utils/query_log.py
+"""
+Per-interaction SQL recorder.
+
+While an interaction is traced (a ContextVar, so it follows the command into
+asyncio.to_thread), every statement is recorded with its duration and the
+first line of our own code that caused it. When the interaction ends, statement
+shapes (SQL with literals and IN lists collapsed) that repeat are flagged as
+N+1 patterns, typically a lazy-loaded relationship inside a loop. Interactions
+that are slow, run too many queries or contain an N+1 pattern are printed and
+kept for the `!queries` owner command.
+"""
+import contextvars
+import functools
+import os
+import re
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from sqlalchemy import event
+from src.config import QUERY_LOG_ENABLED, QUERY_LOG_MAX_QUERIES, QUERY_LOG_REPEAT_THRESHOLD, QUERY_LOG_SLOW_MS
+from src.utils.metrics import registry
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+# Frames that only pass statements along; the site is the service line above them
+SKIP_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(SRC_DIR, "utils", "metrics.py"),
+    os.path.join(SRC_DIR, "database", "unit_of_work.py"),
+    os.path.join(SRC_DIR, "database", "user_state.py"),
+}
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_IN_LIST = re.compile(r"\(\s*" + _PLACEHOLDER + r"(?:\s*,\s*" + _PLACEHOLDER + r")+\s*\)")
+
+_current = contextvars.ContextVar("query_trace", default=None)
+
+flagged = registry.counter(
+    "touchline_query_log_flagged_total", "Traced interactions flagged by the query log, by reason.", ("command", "reason")
+)
+
+def statement_shape(statement):
+    """The statement with literals and IN lists collapsed, so repeats of one query compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _IN_LIST.sub("(?)", shape)
+
+def call_site():
+    """file:line in function of the innermost frame in our code (outside the SQL plumbing)."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(SRC_DIR) and filename not in SKIP_FILES:
+            return f"{os.path.relpath(filename, ROOT_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+class QueryTrace:
+    def __init__(self, name, owner=None, clock=time.perf_counter):
+        self.name = name
+        self.owner = owner # The QueryLog recording it (several can be installed on one engine)
+        self.clock = clock
+        self.started = clock()
+        self.elapsed = None
+        self.queries = [] # (shape, seconds, site)
+
+    @property
+    def finished(self):
+        return self.elapsed is not None
+
+    def record(self, statement, seconds, site):
+        if not self.finished:
+            self.queries.append((statement_shape(statement), seconds, site))
+
+    def finish(self):
+        if not self.finished:
+            self.elapsed = self.clock() - self.started
+
+    def sql_seconds(self):
+        return sum(seconds for _, seconds, _ in self.queries)
+
+    def repeated(self, threshold):
+        """[(shape, count, total seconds, sites)] for shapes run at least `threshold` times, most frequent first."""
+        groups = {}
+        for shape, seconds, site in self.queries:
+            group = groups.setdefault(shape, [0, 0.0, []])
+            group[0] += 1
+            group[1] += seconds
+            if site not in group[2]:
+                group[2].append(site)
+        repeats = [(shape, count, total, sites) for shape, (count, total, sites) in groups.items() if count >= threshold]
+        return sorted(repeats, key=lambda r: r[1], reverse=True)
+
+class QueryLog:
+    def __init__(self, enabled=QUERY_LOG_ENABLED, slow_ms=QUERY_LOG_SLOW_MS,
+                 max_queries=QUERY_LOG_MAX_QUERIES, repeat_threshold=QUERY_LOG_REPEAT_THRESHOLD, history=20):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.max_queries = max_queries
+        self.repeat_threshold = repeat_threshold
+        self.recent = deque(maxlen=history) # Flagged reports, newest last
+
+    # --- TRACING ---
+
+    def begin(self, name):
+        """Starts tracing the current context. Returns the trace, or None when disabled."""
+        if not self.enabled:
+            return None
+        trace = QueryTrace(name, self)
+        _current.set(trace)
+        return trace
+
+    def end(self, trace):
+        """Finishes a trace and returns its report if it was flagged (None otherwise)."""
+        if trace is None or trace.finished:
+            return None
+        trace.finish()
+        report = self.analyze(trace)
+        if report:
+            self.recent.append(report)
+            for reason in report["reasons"]:
+                flagged.inc(trace.name, reason)
+            print(self.format_report(report))
+        return report
+
+    @contextmanager
+    def trace(self, name):
+        if not self.enabled:
+            yield None
+            return
+        trace = QueryTrace(name, self)
+        token = _current.set(trace)
+        try:
+            yield trace
+        finally:
+            self.end(trace)
+            _current.reset(token)
+
+    # --- ANALYSIS ---
+
+    def analyze(self, trace):
+        reasons = []
+        elapsed_ms = trace.elapsed * 1000
+        if elapsed_ms >= self.slow_ms:
+            reasons.append("slow")
+        if len(trace.queries) >= self.max_queries:
+            reasons.append("queries")
+        repeats = trace.repeated(self.repeat_threshold)
+        if repeats:
+            reasons.append("n+1")
+        if not reasons:
+            return None
+
+        slowest = sorted(trace.queries, key=lambda q: q[1], reverse=True)[:3]
+        return {
+            "name": trace.name,
+            "reasons": reasons,
+            "elapsed_ms": elapsed_ms,
+            "query_count": len(trace.queries),
+            "sql_ms": trace.sql_seconds() * 1000,
+            "repeats": repeats,
+            "slowest": slowest,
+        }
+
+    def format_report(self, report, shape_chars=160):
+        lines = [
+            f"🐢 [QueryLog] {report['name']}: {report['elapsed_ms']:.1f} ms, {report['query_count']} queries "
+            f"({report['sql_ms']:.1f} ms SQL) - {', '.join(report['reasons'])}"
+        ]
+        for shape, count, total, sites in report["repeats"]:
+            lines.append(f"    N+1 x{count} ({total * 1000:.1f} ms): {shape[:shape_chars]}")
+            for site in sites[:3]:
+                lines.append(f"        at {site}")
+        if "n+1" not in report["reasons"]:
+            for shape, seconds, site in report["slowest"]:
+                lines.append(f"    {seconds * 1000:8.1f} ms  {shape[:shape_chars]}")
+                lines.append(f"        at {site}")
+        return "\n".join(lines)
+
+    # --- ENGINE HOOKS ---
+
+    def install(self, engine):
+        key = f"query_log_start_{id(self)}"
+
+        def _mine():
+            trace = _current.get()
+            return trace if trace is not None and trace.owner is self else None
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if _mine() is not None:
+                conn.info.setdefault(key, []).append((time.perf_counter(), call_site()))
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            trace = _mine()
+            starts = conn.info.get(key)
+            if trace is None or not starts:
+                return
+            start, site = starts.pop()
+            trace.record(statement, time.perf_counter() - start, site)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(context):
+            conn = context.connection
+            if conn is not None and conn.info.get(key):
+                conn.info[key].pop()
+
+query_log = QueryLog()
+
+def traced(name):
+    """Traces a view callback (component interactions do not pass through the command tree)."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction, *args, **kwargs):
+            with query_log.trace(name):
+                return await func(self, interaction, *args, **kwargs)
+        return wrapper
+    return decorator
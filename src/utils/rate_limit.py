@@ -0,0 +1,119 @@
+# src/utils/rate_limit.py
+"""
+In-memory token buckets per user and per guild, checked before a command
+opens a DB session. A request that would only have to wait a moment is
+queued (the token is reserved and the caller sleeps); anything longer is
+rejected without doing any work.
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from src.utils.ack_deadline import ack_time_left
+
+# CONFIGURATION
+# group -> {scope: (burst capacity, tokens refilled per second)}
+RATE_LIMITS = {
+    "roll":    {"user": (3, 0.5), "guild": (40, 8.0)},
+    "browse":  {"user": (6, 1.0), "guild": (60, 15.0)},
+    "default": {"user": (5, 1.0), "guild": (60, 15.0)},
+}
+MAX_QUEUE_SECONDS = 2.0   # Waits up to this long are queued, longer ones rejected
+MAX_BUCKETS = 50000       # Least recently used buckets are dropped beyond this
+
+class TokenBucket:
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity, rate, now):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        # May go negative: that reserves a future token for a queued request
+        self.tokens -= 1
+
+class RateLimiter:
+    def __init__(self, limits=None, max_queue_seconds=MAX_QUEUE_SECONDS, clock=time.monotonic):
+        self.limits = limits or RATE_LIMITS
+        self.max_queue_seconds = max_queue_seconds
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self.stats = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _bucket(self, group, scope, key, now):
+        bucket_key = (group, scope, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            capacity, rate = self.limits[group][scope]
+            bucket = TokenBucket(capacity, rate, now)
+            self._buckets[bucket_key] = bucket
+            if len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+        return bucket
+
+    def reserve(self, group, user_id, guild_id, max_wait=None):
+        """
+        Returns how long the caller must wait before running (0 = run now),
+        or None if the request is rejected. Tokens are only taken when not rejected.
+        `max_wait` lowers the queueing limit for this request (e.g. to what is left of its ack budget).
+        """
+        group = group if group in self.limits else "default"
+        counts = self.stats.setdefault(group, {"allowed": 0, "queued": 0, "rejected": 0})
+        now = self.clock()
+
+        buckets = [self._bucket(group, "user", str(user_id), now)]
+        if guild_id is not None:
+            buckets.append(self._bucket(group, "guild", str(guild_id), now))
+
+        wait = max(bucket.wait_time(now) for bucket in buckets)
+        limit = self.max_queue_seconds if max_wait is None else min(self.max_queue_seconds, max_wait)
+        if wait > limit:
+            counts["rejected"] += 1
+            return None
+
+        for bucket in buckets:
+            bucket.take()
+        counts["queued" if wait > 0 else "allowed"] += 1
+        return wait
+
+    async def acquire(self, group, user_id, guild_id, max_wait=None):
+        """True once the request may run; False if it was rejected."""
+        wait = self.reserve(group, user_id, guild_id, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+rate_limiter = RateLimiter()
+
+def rate_limited(group):
+    """
+    Throttles a command/button callback before it touches the DB.
+    Put it above @serialized so rejected requests never wait on the user lock.
+    Queueing happens before the callback defers, so it only waits as long as the
+    interaction's ack budget allows (src/utils/ack_deadline.py); longer waits are rejected.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction, *args, **kwargs):
+            max_wait = ack_time_left(interaction)
+            if not await rate_limiter.acquire(group, interaction.user.id, interaction.guild_id, max_wait):
+                await interaction.response.send_message("⏳ Slow down! Try again in a few seconds.", ephemeral=True)
+                return
+            return await func(self, interaction, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,24 +1,52 @@
-import cloudscraper
+"""
+SoFIFA scraper.
+
+Pages are fetched by a bounded pool of threads and parsed in a process pool
+(lxml when installed, html.parser otherwise). Results are written in page
+order, and a checkpoint file records finished offsets and seen player IDs,
+so an interrupted run resumes where it stopped:
+
+    python -m src.utils.scrape_players            # resume (or start) a scrape
+    python -m src.utils.scrape_players --fresh    # ignore the checkpoint
+    python -m src.utils.scrape_players --from-dir saved_pages/   # offline, from offset_<n>.html files
+"""
 from bs4 import BeautifulSoup
-import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import importlib.util
+import json
 import os
 import random
 import re
+import threading
+import time
 
 # --- PATH CONFIGURATION ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 OUTPUT_DIR = os.path.join(project_root, "data")
+CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "scrape_checkpoint.json")
 
 # --- CONFIGURATION ---
 # Using the sorted URL to guarantee we find everyone
 BASE_URL = "https://sofifa.com/players?type=all&r=260013&set=true&gender=0&units=mks&currency=EUR&col=oa&sort=desc"
-TOTAL_PAGES = 900 
+TOTAL_PAGES = 900
+PAGE_SIZE = 60
+FETCH_WORKERS = 4          # Concurrent page downloads (keep it polite)
+PARSE_WORKERS = 2          # Processes parsing HTML; 0 parses on the fetch thread
+REQUEST_DELAY = (2, 4)     # Seconds each fetcher waits before a request
+MAX_RETRIES = 3
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+OUTPUT_FILES = {
+    "ultra_rare": "ultra_rare_players_list.txt",
+    "rare": "rare_players.txt",
+    "common": "common_players.txt",
+}
 
 def calculate_value(current, potential):
     # 1. Effective Rating (85% Current, 15% Potential)
     raw_rating = (0.85 * current) + (0.15 * potential)
-    
+
     # --- PIECEWISE LOGIC ---
     if raw_rating >= 85:
         final_value = int(raw_rating * 10)
@@ -45,151 +73,272 @@ def get_clean_rating(td_element):
     """Converts '83+1' or '83-2' into just integer 83."""
     if not td_element: return 0
     text = td_element.get_text(strip=True)
-    
+
     # Split by '+' or '-' and take the first part
     if '+' in text:
         text = text.split('+')[0]
     if '-' in text:
         text = text.split('-')[0]
-        
+
     try:
         return int(text)
     except ValueError:
         return 0
 # ---------------------------------------------
 
-def scrape_sofifa():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-
-    f_ultra = open(os.path.join(OUTPUT_DIR, "ultra_rare_players_list.txt"), "w", encoding="utf-8")
-    f_rare = open(os.path.join(OUTPUT_DIR, "rare_players.txt"), "w", encoding="utf-8")
-    f_common = open(os.path.join(OUTPUT_DIR, "common_players.txt"), "w", encoding="utf-8")
-
-    files = {
-        "ultra_rare": f_ultra,
-        "rare": f_rare,
-        "semi_rare": f_common,
-        "uncommon": f_common,
-        "common": f_common,
-        "trash": None
-    }
-
-    seen_ids = set()
-    # Updated Scraper headers to match debug script success
-    scraper = cloudscraper.create_scraper(browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True})
-    
-    print(f"Starting scrape (~{TOTAL_PAGES} pages)...")
-
-    for page in range(TOTAL_PAGES):
+def parse_row(row):
+    """One <tr> -> (player_id, category, line), or None if it has no player link."""
+    # 1. NAME & ID
+    name_link = row.select_one('a[href^="/player/"]')
+    if not name_link: return None
+
+    player_id = name_link['href'].split('/')[2]
+
+    short_name = name_link.get_text(strip=True)
+    full_name = name_link.get('data-tooltip')
+    if not full_name:
+        full_name = clean_name_from_slug(name_link['href'])
+
+    if "." in short_name:
+        name = full_name if full_name else short_name
+    else:
+        name = short_name
+
+    # 2. POSITIONS
+    name_col = row.select_one('td:nth-of-type(2)')
+    pos_list = []
+    if name_col:
+        candidates = name_col.find_all(['a', 'span'])
+        for tag in candidates:
+            text = tag.get_text(strip=True)
+            if re.match(r'^[A-Z]{2,3}$', text):
+                pos_list.append(text)
+
+    positions = "/".join(list(dict.fromkeys(pos_list)))
+    if not positions: positions = "N/A"
+
+    # 3. IMAGE
+    img_tag = row.select_one('img[data-src]') or row.select_one('img[src*="players"]')
+    image_url = "N/A"
+    if img_tag:
+        raw_url = img_tag.get('data-src') or img_tag.get('src')
+        image_url = raw_url.replace('60.png', '180.png')
+
+    # 4. NATIONALITY
+    nation_img = row.select_one('img[src*="flags"], a[href^="/players?na"] img')
+    nationality = nation_img.get('title') if nation_img else "N/A"
+
+    # 5. RATINGS
+    current_ovr = get_clean_rating(row.select_one('td[data-col="oa"]'))
+    potential_ovr = get_clean_rating(row.select_one('td[data-col="pt"]'))
+
+    # 6. CLUB
+    team_link = row.select_one('a[href^="/team/"]')
+    club = "Free Agent"
+    if team_link:
+        club = team_link.get_text(strip=True)
+        club = re.sub(r'\d{4}$', '', club).strip()
+
+    final_value, category = calculate_value(current_ovr, potential_ovr)
+    line = f"{name}, {positions}, {club}, {nationality}, Value: {final_value}, {image_url}, {player_id}\n"
+    return player_id, category, line
+
+def parse_page(html):
+    """
+    Page HTML -> (row count, [(player_id, category, line)]).
+    Module-level and free of shared state so it can run in a worker process.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    rows = soup.select('tbody tr')
+
+    players = []
+    for row in rows:
         try:
-            offset = page * 60
-            url = f"{BASE_URL}&offset={offset}"
-            
-            response = scraper.get(url, timeout=15)
-            if response.status_code != 200:
-                print(f"❌ Failed to load page {page + 1} - Status: {response.status_code}")
-                time.sleep(10)
-                continue
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            rows = soup.select('tbody tr')
-
-            if not rows:
-                print(f"⚠️ Page {page + 1} loaded but no rows found. Reached end of database.")
-                break 
-
-            count = 0
-            
-            for row in rows:
-                try:
-                    # 1. NAME & ID
-                    name_link = row.select_one('a[href^="/player/"]')
-                    if not name_link: continue
-                    
-                    player_id = name_link['href'].split('/')[2]
-                    if player_id in seen_ids:
-                        continue 
-                    seen_ids.add(player_id)
-
-                    short_name = name_link.get_text(strip=True)
-                    full_name = name_link.get('data-tooltip')
-                    if not full_name:
-                        full_name = clean_name_from_slug(name_link['href'])
-                    
-                    if "." in short_name:
-                        name = full_name if full_name else short_name
-                    else:
-                        name = short_name
-
-                    # 2. POSITIONS
-                    name_col = row.select_one('td:nth-of-type(2)')
-                    pos_list = []
-                    if name_col:
-                        candidates = name_col.find_all(['a', 'span'])
-                        for tag in candidates:
-                            text = tag.get_text(strip=True)
-                            if re.match(r'^[A-Z]{2,3}$', text):
-                                pos_list.append(text)
-                    
-                    positions = "/".join(list(dict.fromkeys(pos_list))) 
-                    if not positions: positions = "N/A"
-
-                    # 3. IMAGE
-                    img_tag = row.select_one('img[data-src]') or row.select_one('img[src*="players"]')
-                    image_url = "N/A"
-                    if img_tag:
-                        raw_url = img_tag.get('data-src') or img_tag.get('src')
-                        image_url = raw_url.replace('60.png', '180.png') 
-
-                    # 4. NATIONALITY
-                    nation_img = row.select_one('img[src*="flags"], a[href^="/players?na"] img')
-                    nationality = nation_img.get('title') if nation_img else "N/A"
-
-                    # 5. RATINGS (FIXED WITH HELPER FUNCTION)
-                    ovr_td = row.select_one('td[data-col="oa"]')
-                    pot_td = row.select_one('td[data-col="pt"]')
-                    
-                    current_ovr = get_clean_rating(ovr_td)    # <--- FIXED
-                    potential_ovr = get_clean_rating(pot_td)  # <--- FIXED
-
-                    # 6. CLUB
-                    team_link = row.select_one('a[href^="/team/"]')
-                    club = "Free Agent"
-                    if team_link:
-                        club = team_link.get_text(strip=True)
-                        club = re.sub(r'\d{4}$', '', club).strip()
-
-                    # SAVE
-                    final_value, category = calculate_value(current_ovr, potential_ovr)
-                    
-                    line = f"{name}, {positions}, {club}, {nationality}, Value: {final_value}, {image_url}, {player_id}\n"
-
-                    if category != "trash" and files[category]:
-                        files[category].write(line)
-                        count += 1
+            player = parse_row(row)
+        except Exception as e:
+            print(f"Skipping player error: {e}")
+            continue
+        if player:
+            players.append(player)
+    return len(rows), players
 
-                except Exception as e:
-                    # Now we will see if something else breaks!
-                    print(f"Skipping player error: {e}")
-                    continue
-            
-            print(f"✅ Page {page + 1}: Saved {count} Players (Total Unique: {len(seen_ids)})")
-            
-            if count == 0 and len(rows) > 0:
-                 print("⚠️ Zero new players found on this page. Stopping.")
-                 break
+# --- FETCHERS ---
+# A fetcher is any callable: offset -> (status_code, html)
+
+class CloudscraperFetcher:
+    """Live SoFIFA pages. cloudscraper sessions are not thread-safe, so each fetch thread gets its own."""
+    def __init__(self, base_url=BASE_URL, timeout=15):
+        self.base_url = base_url
+        self.timeout = timeout
+        self._local = threading.local()
 
-            time.sleep(random.uniform(2, 4))
+    def _scraper(self):
+        if not hasattr(self._local, "scraper"):
+            import cloudscraper
+            self._local.scraper = cloudscraper.create_scraper(browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True})
+        return self._local.scraper
 
+    def __call__(self, offset):
+        response = self._scraper().get(f"{self.base_url}&offset={offset}", timeout=self.timeout)
+        return response.status_code, response.content
+
+class DirectoryFetcher:
+    """Saved pages named offset_<n>.html; a missing file reads as an empty page (the end)."""
+    def __init__(self, pages_dir):
+        self.pages_dir = pages_dir
+
+    def __call__(self, offset):
+        path = os.path.join(self.pages_dir, f"offset_{offset}.html")
+        if not os.path.exists(path):
+            return 200, "<table><tbody></tbody></table>"
+        with open(path, "rb") as f:
+            return 200, f.read()
+
+# --- CHECKPOINT ---
+
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.done_offsets = set()
+        self.seen_ids = set()
+        self.finished = False
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.done_offsets = set(data.get("done_offsets", []))
+            self.seen_ids = set(data.get("seen_ids", []))
+            self.finished = data.get("finished", False)
+        return self
+
+    def save(self):
+        data = {
+            "done_offsets": sorted(self.done_offsets),
+            "seen_ids": sorted(self.seen_ids),
+            "finished": self.finished,
+        }
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+# --- PIPELINE ---
+
+def fetch_page(fetcher, offset, delay=REQUEST_DELAY, retries=MAX_RETRIES):
+    """HTML for one offset, or None once every retry failed."""
+    for attempt in range(1, retries + 1):
+        if delay:
+            time.sleep(random.uniform(*delay))
+        try:
+            status, html = fetcher(offset)
+            if status == 200:
+                return html
+            print(f"❌ Failed to load offset {offset} - Status: {status} (attempt {attempt}/{retries})")
         except Exception as e:
-            print(f"Page Error: {e}")
+            print(f"Page Error at offset {offset}: {e} (attempt {attempt}/{retries})")
+        time.sleep(min(10, 2 ** attempt) if delay else 0)
+    return None
+
+def scrape_sofifa(fetcher=None, total_pages=TOTAL_PAGES, output_dir=OUTPUT_DIR, checkpoint_path=CHECKPOINT_FILE,
+                  fetch_workers=FETCH_WORKERS, parse_workers=PARSE_WORKERS, delay=REQUEST_DELAY, fresh=False):
+    os.makedirs(output_dir, exist_ok=True)
+    fetcher = fetcher or CloudscraperFetcher()
+
+    checkpoint = Checkpoint(checkpoint_path)
+    if not fresh:
+        checkpoint.load()
+    resuming = bool(checkpoint.done_offsets)
+    if checkpoint.finished and not fresh:
+        print("✅ Checkpoint says the last scrape finished. Use --fresh to start over.")
+        return checkpoint
+
+    # Append when resuming so the pages already written are kept
+    mode = "a" if resuming else "w"
+    files = {category: open(os.path.join(output_dir, name), mode, encoding="utf-8") for category, name in OUTPUT_FILES.items()}
+
+    offsets = [page * PAGE_SIZE for page in range(total_pages) if page * PAGE_SIZE not in checkpoint.done_offsets]
+    print(f"Starting scrape ({len(offsets)} pages left, {len(checkpoint.seen_ids)} players already seen)...")
 
-    f_ultra.close()
-    f_rare.close()
-    f_common.close()
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
 
-    print(f"Scrape Complete. Total Unique Players: {len(seen_ids)}")
+    def fetch_and_parse(offset):
+        html = fetch_page(fetcher, offset, delay)
+        if html is None:
+            return None
+        if parse_pool:
+            return parse_pool.submit(parse_page, html).result()
+        return parse_page(html)
+
+    # Results are consumed in page order; only a window of pages is in flight at once
+    window = max(1, fetch_workers * 2)
+    failed = []
+    reached_end = False
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+            in_flight = []
+            next_index = 0
+            while next_index < len(offsets) or in_flight:
+                while next_index < len(offsets) and len(in_flight) < window:
+                    offset = offsets[next_index]
+                    in_flight.append((offset, fetch_pool.submit(fetch_and_parse, offset)))
+                    next_index += 1
+
+                offset, future = in_flight.pop(0)
+                result = future.result()
+                page = offset // PAGE_SIZE + 1
+                if result is None:
+                    print(f"⚠️ Page {page} failed; it will be retried on the next run.")
+                    failed.append(offset)
+                    continue
+
+                row_count, players = result
+                if row_count == 0:
+                    print(f"⚠️ Page {page} loaded but no rows found. Reached end of database.")
+                    reached_end = True
+                    break
+
+                count = 0
+                for player_id, category, line in players:
+                    if player_id in checkpoint.seen_ids:
+                        continue
+                    checkpoint.seen_ids.add(player_id)
+                    if category in files:
+                        files[category].write(line)
+                        count += 1
+
+                # Lines hit the disk before the checkpoint claims the page is done
+                for f in files.values():
+                    f.flush()
+                checkpoint.done_offsets.add(offset)
+                checkpoint.save()
+                print(f"✅ Page {page}: Saved {count} Players (Total Unique: {len(checkpoint.seen_ids)})")
+
+                if count == 0:
+                    print("⚠️ Zero new players found on this page. Stopping.")
+                    reached_end = True
+                    break
+
+            # Stop fetching pages past the end
+            for _, future in in_flight:
+                future.cancel()
+    finally:
+        if parse_pool:
+            parse_pool.shutdown(cancel_futures=True)
+        for f in files.values():
+            f.close()
+
+    # A failed page keeps the run resumable even if later pages reached the end
+    checkpoint.finished = not failed and (reached_end or all(o in checkpoint.done_offsets for o in offsets))
+    checkpoint.save()
+    print(f"Scrape Complete. Total Unique Players: {len(checkpoint.seen_ids)}")
+    return checkpoint
 
 if __name__ == "__main__":
-    scrape_sofifa()
\ No newline at end of file
+    import sys
+
+    fetcher = None
+    if "--from-dir" in sys.argv:
+        fetcher = DirectoryFetcher(sys.argv[sys.argv.index("--from-dir") + 1])
+    scrape_sofifa(fetcher=fetcher, fresh="--fresh" in sys.argv, delay=None if fetcher else REQUEST_DELAY)
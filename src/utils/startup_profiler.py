@@ -0,0 +1,140 @@
+# src/utils/startup_profiler.py
+"""
+Boot timing.
+
+Import as early as possible (first thing in main.py): the process clock starts
+here. Phases are timed with `profiler.phase(group, name)`, and optional import
+timing wraps every module's exec_module to record inclusive and self time.
+The report is printed once the bot is ready and kept for the `!startup` command.
+"""
+import importlib.abc
+import sys
+import time
+from contextlib import contextmanager
+
+PROCESS_START = time.perf_counter()
+
+class _TimedLoader:
+    """Wraps a module's loader for one exec_module call, then puts the real loader back."""
+    def __init__(self, loader, name, timer):
+        self._loader = loader
+        self._name = name
+        self._timer = timer
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Restore first, so nothing ever sees the wrapper as the module's loader
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+
+        timer = self._timer
+        timer._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            inclusive = time.perf_counter() - start
+            children = timer._stack.pop()
+            if timer._stack:
+                timer._stack[-1] += inclusive
+            timer.timings[self._name] = (inclusive, inclusive - children)
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        self.timings = {} # module -> (inclusive seconds, self seconds)
+        self._stack = []
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, name, self)
+                return spec
+        return None
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+class StartupProfiler:
+    def __init__(self, start=PROCESS_START):
+        self.start = start
+        self.phases = [] # (group, name, started at, seconds, ok)
+        self.import_timer = None
+        self.finished_at = None
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def start_import_timing(self):
+        self.import_timer = ImportTimer()
+        self.import_timer.install()
+
+    def stop_import_timing(self):
+        if self.import_timer:
+            self.import_timer.uninstall()
+
+    def mark(self, group, name, seconds, ok=True, started_at=None):
+        if started_at is None:
+            started_at = self.elapsed() - seconds
+        self.phases.append((group, name, started_at, seconds, ok))
+
+    @contextmanager
+    def phase(self, group, name):
+        started_at = self.elapsed()
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.mark(group, name, time.perf_counter() - start, ok, started_at)
+
+    async def timed(self, group, name, coro):
+        """Awaits `coro` as a phase. Failures are recorded and logged, not raised (warmup must not kill boot)."""
+        try:
+            with self.phase(group, name):
+                return await coro
+        except Exception as e:
+            print(f"❌ Startup step {name} failed: {e}")
+            return None
+
+    def finish(self):
+        self.finished_at = self.elapsed()
+
+    def slowest_imports(self, limit=10):
+        if not self.import_timer:
+            return []
+        ranked = sorted(self.import_timer.timings.items(), key=lambda item: item[1][1], reverse=True)
+        return [(name, inclusive, self_time) for name, (inclusive, self_time) in ranked[:limit]]
+
+    def report(self, import_limit=10):
+        lines = ["--- Startup Report ---"]
+        for group, name, started_at, seconds, ok in sorted(self.phases, key=lambda phase: phase[2]):
+            flag = "" if ok else "  ❌"
+            lines.append(f"  {started_at:7.3f}s +{seconds * 1000:8.1f} ms  [{group}] {name}{flag}")
+
+        imports = self.slowest_imports(import_limit)
+        if imports:
+            lines.append(f"  Slowest imports (self time, {len(self.import_timer.timings)} modules timed):")
+            for name, inclusive, self_time in imports:
+                lines.append(f"    {self_time * 1000:8.1f} ms self / {inclusive * 1000:8.1f} ms total  {name}")
+
+        if self.finished_at is not None:
+            lines.append(f"  Ready after {self.finished_at:.3f}s")
+        return "\n".join(lines)
+
+profiler = StartupProfiler()
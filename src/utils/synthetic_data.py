@@ -0,0 +1,307 @@
+# src/utils/synthetic_data.py
+"""
+Fast synthetic dataset generator.
+
+Builds a production-sized database (catalog, guilds, users, collections,
+lineups, shortlists and market listings) from a seeded RNG, so the same
+parameters always produce the same rows. Rows are generated guild by guild as
+plain tuples and written in chunks: COPY on PostgreSQL (psycopg2), executemany
+through SQLAlchemy Core elsewhere. A million cards take well under a minute.
+
+Collections look like the live game: the catalog follows the real data files'
+rarity mix (or is the real catalog with --real-catalog), owned cards follow the
+roll odds, a guild owns each player at most once, a few heavy collectors own
+most of a guild's cards, and every collector with the cards for it has a 4-3-3.
+
+Usage (the target database's game tables are WIPED):
+    python -m src.utils.synthetic_data --database-url sqlite:////tmp/touchline.db --yes
+    python -m src.utils.synthetic_data --database-url postgresql://localhost/touchline_dev --scale xl --yes
+    python -m src.utils.synthetic_data --database-url ... --cards 2000000 --guilds 200 --seed 7 --yes
+"""
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, text
+from src.database.migrations import run_migrations
+from src.database.models import Card, MarketListing, PlayerBase, Shortlist, User
+from src.utils.catalog import iter_catalog, record_hash
+from src.utils.catalog_sync import bump_catalog_version
+
+SCALES = {
+    # players in the catalog, users and guilds, cards owned, shortlist entries per user, share of collectors with a listing
+    "tiny":  {"players": 300,    "users": 40,     "guilds": 2,  "cards": 400,       "shortlists": 3, "listings": 0.1},
+    "small": {"players": 5_000,  "users": 1_000,  "guilds": 10, "cards": 25_000,    "shortlists": 3, "listings": 0.05},
+    "full":  {"players": 20_000, "users": 10_000, "guilds": 50, "cards": 500_000,   "shortlists": 3, "listings": 0.05},
+    "xl":    {"players": 20_000, "users": 20_000, "guilds": 80, "cards": 1_000_000, "shortlists": 3, "listings": 0.05},
+}
+
+CHUNK_SIZE = 10_000
+
+# Share of each rarity in the catalog (the real data files: ~17.7k common, 833 rare, ~100 ultra rare and legends)
+CATALOG_RARITY_WEIGHTS = [("Common", 945), ("Rare", 44), ("Ultra Rare", 5), ("Legend", 5)]
+# Share of each rarity among owned cards (GachaService.determine_rarity: 98/101, 2/101, 1/101 and 1/2001)
+OWNED_RARITY_WEIGHTS = [("Common", 9_700), ("Rare", 198), ("Ultra Rare", 99), ("Legend", 5)]
+RATING_RANGES = {"Common": (450, 650), "Rare": (650, 780), "Ultra Rare": (780, 880), "Legend": (880, 990)}
+
+ROLE_POSITIONS = {
+    "GK": {"GK"},
+    "D": {"CB", "LB", "RB", "LWB", "RWB"},
+    "M": {"CM", "CDM", "CAM", "LM", "RM"},
+    "F": {"ST", "CF", "LW", "RW"},
+}
+POSITIONS = {
+    "GK": ["GK"],
+    "D": ["CB", "LB", "RB", "CB/RB", "LB/LWB"],
+    "M": ["CM", "CDM", "CAM", "CM/CAM", "LM/RM"],
+    "F": ["ST", "CF", "LW", "RW", "RW/ST"],
+}
+ROLE_WEIGHTS = [("GK", 10), ("D", 35), ("M", 35), ("F", 20)]
+LINEUP_SLOTS = [("GK", "GK"), ("D1", "D"), ("D2", "D"), ("D3", "D"), ("D4", "D"),
+                ("M1", "M"), ("M2", "M"), ("M3", "M"), ("F1", "F"), ("F2", "F"), ("F3", "F")]
+FIRST_NAMES = ["Luca", "Mateo", "Kai", "Jonas", "Rafael", "Theo", "Emil", "Diego", "Noah", "Sami", "Iker", "Leon"]
+LAST_NAMES = ["Silva", "Moreau", "Kovac", "Berg", "Okafor", "Rossi", "Lindqvist", "Haddad", "Novak", "Ortega"]
+CITIES = ["Porto", "Lyon", "Bremen", "Sevilla", "Torino", "Leeds", "Gent", "Basel", "Malmo", "Ajaccio"]
+CLUB_SUFFIXES = ["FC", "United", "City", "Athletic", "Rovers", "SC"]
+NATIONS = ["Spain", "France", "Brazil", "Germany", "Italy", "Nigeria", "Japan", "Argentina"]
+
+# Every column is written explicitly: COPY does not apply the models' Python-side defaults
+COLUMNS = {
+    PlayerBase.__table__: ["id", "name", "club", "nationality", "positions", "rating", "rarity",
+                           "image_url", "content_hash", "retired"],
+    User.__table__: ["id", "discord_id", "guild_id", "username", "coins", "club_name", "favorite_club",
+                     "rolls_remaining", "claims_remaining", "max_rolls", "free_claims",
+                     "last_roll_reset", "last_claim_reset", "upgrade_stadium", "upgrade_board",
+                     "upgrade_training", "upgrade_transfer", "upgrade_scout", "tutorial_flags",
+                     "tutorial_progress", "team_rewards_flags", "redeemed_referral", "roll_refreshes", "formation"],
+    Card.__table__: ["id", "user_id", "player_base_id", "position_in_xi", "obtained_at", "sort_priority"],
+    Shortlist.__table__: ["user_id", "player_base_id"],
+    MarketListing.__table__: ["user_id", "card_id", "listed_price", "available_at", "listed_at"],
+}
+TABLES = list(COLUMNS) # Insert order; wiped in reverse
+
+def role_of(positions):
+    """GK / D / M / F from a player's first listed position, or None."""
+    first = positions.split("/")[0].strip()
+    return next((role for role, names in ROLE_POSITIONS.items() if first in names), None)
+
+def _weighted(rng, weights, k=1):
+    names, counts = zip(*weights)
+    return rng.choices(names, weights=counts, k=k)
+
+def resolve_spec(scale="small", **overrides):
+    """A scale preset with any non-None overrides applied."""
+    spec = dict(SCALES[scale])
+    spec.update({key: value for key, value in overrides.items() if value is not None})
+    return spec
+
+def generate_players(spec, rng):
+    clubs = [f"{city} {suffix}" for city in CITIES for suffix in CLUB_SUFFIXES]
+    # The first IDs cover every rarity, so a roll never finds its rarity empty (even at tiny scale)
+    guaranteed = [rarity for rarity, _ in CATALOG_RARITY_WEIGHTS]
+    players = []
+    for player_id in range(1, spec["players"] + 1):
+        if player_id <= len(guaranteed):
+            rarity = guaranteed[player_id - 1]
+        else:
+            rarity = _weighted(rng, CATALOG_RARITY_WEIGHTS)[0]
+        row = {
+            "id": player_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {player_id}",
+            "club": rng.choice(clubs),
+            "nationality": rng.choice(NATIONS),
+            "positions": rng.choice(POSITIONS[_weighted(rng, ROLE_WEIGHTS)[0]]),
+            "rating": rng.randint(*RATING_RANGES[rarity]),
+            "rarity": rarity,
+            "image_url": None,
+        }
+        players.append(row)
+    return players
+
+def real_players():
+    """The catalog from the data files (last line wins for a repeated ID, like the loader)."""
+    return list({row["id"]: row for row in iter_catalog()}.values())
+
+def player_rows(players):
+    return [
+        (p["id"], p["name"], p["club"], p["nationality"], p["positions"], p["rating"], p["rarity"],
+         p["image_url"], record_hash(p), False)
+        for p in players
+    ]
+
+def generate_guild(guild, spec, players, rng, first_user_id, first_card_id, now):
+    """One guild's rows: {table: [tuple]} in COLUMNS order."""
+    guild_id = str(900_000 + guild)
+    users_per_guild = spec["users"] // spec["guilds"]
+    cards_per_guild = min(spec["cards"] // spec["guilds"], len(players))
+    clubs = sorted({p["club"] for p in players[:500]})
+
+    user_ids = list(range(first_user_id, first_user_id + users_per_guild))
+    users = []
+    for user_id in user_ids:
+        users.append((
+            user_id, str(100_000 + user_id), guild_id, f"user{user_id}", rng.randint(0, 50_000), f"Club {user_id}",
+            rng.choice(clubs) if rng.random() < 0.3 else None,
+            9, 1, 9, 0, now, now,
+            rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 3),
+            0, 0, 0, False, 0, "4-3-3",
+        ))
+
+    # Owned players follow the roll odds; a rarity the guild has exhausted falls back to the biggest pool left
+    unowned = {}
+    for index, p in enumerate(players):
+        unowned.setdefault(p["rarity"], []).append(index)
+    for pool in unowned.values():
+        rng.shuffle(pool)
+    picks = []
+    for rarity in _weighted(rng, OWNED_RARITY_WEIGHTS, k=cards_per_guild):
+        pool = unowned.get(rarity) or max(unowned.values(), key=len)
+        picks.append(pool.pop())
+
+    # A few heavy collectors own most of the cards
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(user_ids))]
+    owners = rng.choices(user_ids, weights=weights, k=cards_per_guild) if user_ids else []
+
+    card_ids = range(first_card_id, first_card_id + cards_per_guild)
+    by_owner = {}
+    for card_id, owner, index in zip(card_ids, owners, picks):
+        by_owner.setdefault(owner, []).append((card_id, index))
+    lineup = {}
+    listings = []
+    for owner, owned in by_owner.items():
+        # First compatible card per 4-3-3 slot
+        by_role = {}
+        for card in owned:
+            by_role.setdefault(role_of(players[card[1]]["positions"]), []).append(card)
+        for slot, role in LINEUP_SLOTS:
+            if by_role.get(role):
+                lineup[by_role[role].pop(0)[0]] = slot
+        if rng.random() < spec["listings"]:
+            bench = [card for card in owned if card[0] not in lineup]
+            if bench:
+                listed_id, index = rng.choice(bench)
+                # Half already sold, half still waiting
+                listings.append((owner, listed_id, players[index]["rating"], now + timedelta(hours=rng.choice([-1, 6])), now))
+
+    cards = []
+    for card_id, owner, index in zip(card_ids, owners, picks):
+        obtained_at = now - timedelta(minutes=card_id)
+        cards.append((card_id, owner, players[index]["id"], lineup.get(card_id), obtained_at, int(obtained_at.timestamp())))
+
+    shortlists = []
+    sample_size = min(spec["shortlists"], len(players))
+    for owner in user_ids:
+        for index in rng.sample(range(len(players)), sample_size):
+            shortlists.append((owner, players[index]["id"]))
+
+    return {User.__table__: users, Card.__table__: cards, Shortlist.__table__: shortlists, MarketListing.__table__: listings}
+
+def generate(spec, seed=42, now=None, players=None):
+    """Yields (table, [tuple]) batches in insert order: the catalog, then each guild's rows."""
+    rng = random.Random(seed)
+    now = now or datetime(2025, 1, 1)
+    players = players or generate_players(spec, rng)
+    yield PlayerBase.__table__, player_rows(players)
+
+    user_id = card_id = 1
+    for guild in range(spec["guilds"]):
+        rows = generate_guild(guild, spec, players, rng, user_id, card_id, now)
+        user_id += len(rows[User.__table__])
+        card_id += len(rows[Card.__table__])
+        for table in TABLES[1:]:
+            yield table, rows[table]
+
+def _copy_value(value):
+    return "" if value is None else value # Unquoted empty field = NULL in CSV COPY
+
+def copy_rows(conn, table, rows):
+    """COPY FROM STDIN through the connection's psycopg2 cursor (same transaction)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+    buffer.seek(0)
+    columns = ", ".join(COLUMNS[table])
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+def insert_rows(conn, table, rows):
+    columns = COLUMNS[table]
+    conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+def wipe(conn):
+    if conn.dialect.name == "postgresql":
+        names = ", ".join(table.name for table in reversed(TABLES))
+        conn.execute(text(f"TRUNCATE TABLE {names} RESTART IDENTITY CASCADE"))
+        return
+    for table in reversed(TABLES):
+        conn.execute(delete(table))
+
+def build(engine, spec, seed=42, chunk_size=CHUNK_SIZE, players=None, now=None, log=print):
+    """Replaces the game tables' rows with a generated dataset in one transaction. Returns {table: rows}."""
+    run_migrations(engine)
+    counts = {table.name: 0 for table in TABLES}
+    start = time.perf_counter()
+
+    with engine.begin() as conn:
+        use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+        write = copy_rows if use_copy else insert_rows
+        wipe(conn)
+        for table, rows in generate(spec, seed, now, players):
+            for offset in range(0, len(rows), chunk_size):
+                write(conn, table, rows[offset:offset + chunk_size])
+            counts[table.name] += len(rows)
+            if table is PlayerBase.__table__:
+                log(f"   • player_base: {len(rows):,} rows ({time.perf_counter() - start:.1f}s)")
+            elif table is Card.__table__ and counts["cards"] // 100_000 > (counts["cards"] - len(rows)) // 100_000:
+                log(f"   • cards: {counts['cards']:,} rows ({time.perf_counter() - start:.1f}s)")
+
+        if conn.dialect.name == "postgresql":
+            # Rows were written with explicit IDs; move the serial sequences past them
+            for table in (User.__table__, Card.__table__):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+                ))
+        bump_catalog_version(conn) # A running bot reloads its catalog cache
+
+    log(f"--- Generated {', '.join(f'{count:,} {name}' for name, count in counts.items())} "
+        f"in {time.perf_counter() - start:.1f}s ({'COPY' if use_copy else 'executemany'}) ---")
+    return counts
+
+def main(argv=None):
+    import argparse
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description="Fill a database with a seeded synthetic dataset. Its game tables are wiped.")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--scale", default="small", choices=list(SCALES), help="Preset; the flags below override it.")
+    for name in ("players", "users", "guilds", "cards", "shortlists"):
+        parser.add_argument(f"--{name}", type=int)
+    parser.add_argument("--listings", type=float, help="Share of collectors with a market listing.")
+    parser.add_argument("--real-catalog", action="store_true", help="Use the players from src/data instead of generated ones.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--yes", action="store_true", help="Confirm that the target database may be wiped.")
+    args = parser.parse_args(argv)
+
+    if not args.yes:
+        parser.error("this wipes users, cards, player_base, shortlists and market_listings; pass --yes")
+    spec = resolve_spec(args.scale, players=args.players, users=args.users, guilds=args.guilds,
+                        cards=args.cards, shortlists=args.shortlists, listings=args.listings)
+    players = real_players() if args.real_catalog else None
+    if args.real_catalog and not players:
+        parser.error("no catalog data files found in src/data")
+
+    print(f"🔌 Connecting to {args.database_url.split('@')[-1]}...")
+    engine = create_engine(args.database_url)
+    build(engine, spec, seed=args.seed, chunk_size=args.chunk_size, players=players)
+    engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# src/utils/user_locks.py
+"""
+Per-(discord_id, guild_id) asyncio locks.
+
+A user's mutating commands run one at a time inside this process, while
+different users run fully in parallel. Locks live in a WeakValueDictionary,
+so an idle user's lock disappears as soon as nobody holds or waits on it.
+"""
+import asyncio
+import functools
+import time
+import weakref
+from contextlib import asynccontextmanager
+from src.utils.ack_deadline import ack_time_left
+
+class UserBusy(Exception):
+    """A user's lock was not free within the allowed wait."""
+
+class UserLockRegistry:
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+        self.stats = {"acquired": 0, "contended": 0, "timeouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    def lock_for(self, discord_id, guild_id):
+        key = (str(discord_id), str(guild_id))
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, guild_id, *discord_ids, timeout=None):
+        """
+        Holds the locks of every listed user in this guild.
+        Keys are acquired in sorted order so two-party commands (trade, match) cannot deadlock.
+        Raises UserBusy if they are not all held within `timeout` seconds (None = wait as long as it takes).
+        """
+        keys = sorted({(str(d), str(guild_id)) for d in discord_ids})
+        locks = [self.lock_for(*key) for key in keys] # Strong refs keep them alive while held
+
+        start = time.perf_counter()
+        contended = any(lock.locked() for lock in locks)
+        acquired = []
+        try:
+            for lock in locks:
+                if timeout is None or not lock.locked():
+                    await lock.acquire()
+                else:
+                    remaining = timeout - (time.perf_counter() - start)
+                    try:
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError
+                        await asyncio.wait_for(lock.acquire(), remaining)
+                    except asyncio.TimeoutError:
+                        self.stats["timeouts"] += 1
+                        raise UserBusy() from None
+                acquired.append(lock)
+
+            waited = time.perf_counter() - start
+            self.stats["acquired"] += 1
+            self.stats["total_wait"] += waited
+            self.stats["max_wait"] = max(self.stats["max_wait"], waited)
+            if contended:
+                self.stats["contended"] += 1
+
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def snapshot(self):
+        acquired = self.stats["acquired"]
+        return dict(
+            self.stats,
+            live_locks=len(self._locks),
+            avg_wait_ms=(self.stats["total_wait"] / acquired * 1000) if acquired else 0.0,
+        )
+
+user_locks = UserLockRegistry()
+
+def serialized(func):
+    """
+    Runs a command/button callback under the invoking user's lock.
+    Put it directly above the function, below @app_commands.command / @discord.ui.button.
+    The callback defers only once it holds the lock, so the wait is bounded by the
+    interaction's ack budget: if the user's previous command is still running by
+    then, they get a "busy" reply instead of a failed interaction.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, interaction, *args, **kwargs):
+        try:
+            # Only this hold has a timeout, so UserBusy can't come from inside the callback
+            async with user_locks.hold(interaction.guild_id, interaction.user.id, timeout=ack_time_left(interaction)):
+                return await func(self, interaction, *args, **kwargs)
+        except UserBusy:
+            await interaction.response.send_message("⏳ Your last command is still running. Try again in a moment!", ephemeral=True)
+    return wrapper
@@ -1,6 +1,7 @@
 import discord
 from src.database.db import get_session
 from src.services.gacha_service import GachaService
+from src.utils.user_locks import serialized
 
 class FreeClaimView(discord.ui.View):
     def __init__(self, user_id, guild_id):
@@ -17,6 +18,7 @@ class FreeClaimView(discord.ui.View):
         return True
 
     @discord.ui.button(label="Yes, use Ticket", style=discord.ButtonStyle.green, emoji="🎫")
+    @serialized
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
         
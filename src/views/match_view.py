@@ -1,5 +1,5 @@
 import discord
-from src.database.db import get_session
+from src.database.db import session_scope
 from src.services.match_service import MatchService
 
 class MatchChallengeView(discord.ui.View):
@@ -16,30 +16,25 @@ class MatchChallengeView(discord.ui.View):
             await interaction.response.send_message("This challenge is not for you!", ephemeral=True)
             return
 
-        # Check balances
-        session = get_session()
-        service = MatchService(session)
-        
-        try:
+        # Check balances (session closed before we respond to Discord)
+        with session_scope() as session:
+            service = MatchService(session)
             # Verify balances again before starting
             c_data = service.get_team_power(self.challenger.id, interaction.guild_id)
             o_data = service.get_team_power(self.opponent.id, interaction.guild_id)
             
-            if c_data["user"].coins < self.wager:
-                await interaction.response.send_message(f"{self.challenger.mention} is broke! Match cancelled.", ephemeral=True)
-                self.stop()
-                return
-                
-            if o_data["user"].coins < self.wager:
-                await interaction.response.send_message("You don't have enough coins!", ephemeral=True)
-                return
-
-            self.accepted = True
-            self.stop() # Stop listening, let the Cog take over
-            await interaction.response.defer() # Acknowledge the click
+        if c_data["user"].coins < self.wager:
+            await interaction.response.send_message(f"{self.challenger.mention} is broke! Match cancelled.", ephemeral=True)
+            self.stop()
+            return
             
-        finally:
-            session.close()
+        if o_data["user"].coins < self.wager:
+            await interaction.response.send_message("You don't have enough coins!", ephemeral=True)
+            return
+
+        self.accepted = True
+        self.stop() # Stop listening, let the Cog take over
+        await interaction.response.defer() # Acknowledge the click
 
     @discord.ui.button(label="Decline", style=discord.ButtonStyle.red)
     async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
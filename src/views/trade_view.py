@@ -1,6 +1,7 @@
 import discord
-from src.database.db import get_session
+from src.database.db import session_scope
 from src.services.trade_service import TradeService
+from src.utils.user_locks import user_locks
 
 # --- MODAL FOR ADDING COINS ---
 class AddCoinsModal(discord.ui.Modal, title="Add Coins to Trade"):
@@ -25,10 +26,8 @@ class AddCoinsModal(discord.ui.Modal, title="Add Coins to Trade"):
             return await interaction.response.send_message("❌ Please enter a valid positive number.", ephemeral=True)
 
         # Check Balance
-        session = get_session()
-        service = TradeService(session)
-        has_funds = service.check_balance(interaction.user.id, interaction.guild.id, val)
-        session.close()
+        with session_scope() as session:
+            has_funds = TradeService(session).check_balance(interaction.user.id, interaction.guild.id, val)
 
         if not has_funds:
             return await interaction.response.send_message(f"❌ You don't have **{val:,}** coins!", ephemeral=True)
@@ -59,10 +58,8 @@ class CounterOfferModal(discord.ui.Modal, title="Make Counter Offer"):
 
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        session = get_session()
-        service = TradeService(session)
-        result = service.validate_offer(interaction.user.id, interaction.guild_id, self.offer_input.value)
-        session.close()
+        with session_scope() as session:
+            result = TradeService(session).validate_offer(interaction.user.id, interaction.guild_id, self.offer_input.value)
 
         if not result["success"]:
             await interaction.followup.send(result["message"], ephemeral=True)
@@ -126,37 +123,27 @@ class TradingView(discord.ui.View):
              if self.message: await self.message.edit(embed=embed, view=self)
              elif interaction.message: await interaction.message.edit(embed=embed, view=self)
 
-             session = get_session()
-             service = TradeService(session)
-             
              ids_a = [c.id for c in self.cards_a]
              ids_b = [c.id for c in self.cards_b]
              
              # Pass user IDs explicitly to handle money-only trades safely
-             res = service.execute_multi_trade(
-                 interaction.guild.id,
-                 self.user_a.id, self.user_b.id, 
-                 ids_a, ids_b, 
-                 self.coins_a, self.coins_b
-             )
+             async with user_locks.hold(interaction.guild.id, self.user_a.id, self.user_b.id):
+                 with session_scope() as session:
+                     res = TradeService(session).execute_multi_trade(
+                         interaction.guild.id,
+                         self.user_a.id, self.user_b.id, 
+                         ids_a, ids_b, 
+                         self.coins_a, self.coins_b
+                     )
              
              if res["success"]:
                  embed.title = "✅ Trade Completed!"
                  embed.description = f"**Trade Summary:**\n{offer_a_str}\n↔\n{offer_b_str}"
                  
                  # --- TUTORIAL HOOK ---
-                 try:
-                     from src.services.tutorial_service import TutorialService
-                     tut = TutorialService(session)
-                     msg_a = tut.complete_step(self.user_a.id, interaction.guild.id, "7_trade")
-                     msg_b = tut.complete_step(self.user_b.id, interaction.guild.id, "7_trade")
-                     
-                     if msg_a: await interaction.channel.send(f"{self.user_a.mention} {msg_a}")
-                     if msg_b: await interaction.channel.send(f"{self.user_b.mention} {msg_b}")
-                 except ImportError:
-                     pass # Tutorial Service not found
-                 except Exception as e:
-                     print(f"Tutorial Hook Error: {e}")
+                 bus = self.bot.tutorial_bus
+                 bus.publish(self.user_a.id, interaction.guild.id, "7_trade", lambda msg: interaction.channel.send(f"{self.user_a.mention} {msg}"))
+                 bus.publish(self.user_b.id, interaction.guild.id, "7_trade", lambda msg: interaction.channel.send(f"{self.user_b.mention} {msg}"))
                  # ---------------------
 
              else:
@@ -164,8 +151,6 @@ class TradingView(discord.ui.View):
                  embed.description = res["message"]
                  embed.color = discord.Color.red()
              
-             session.close()
-             
              if self.message: await self.message.edit(embed=embed, view=None)
              elif interaction.message: await interaction.message.edit(embed=embed, view=None)
              return
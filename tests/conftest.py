@@ -1,15 +1,24 @@
 # tests/conftest.py
+import os
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from src.database.models import Base, User, PlayerBase, Card
 
 # Use in-memory SQLite for speed and isolation
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
+# src.config refuses to import without these, and the services pull in src.database.db
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+
+from src.database.models import Base, User, PlayerBase, Card
+from src.database.user_state import user_state_cache
+
 @pytest.fixture(scope="function")
 def session():
     """Creates a new database session for a test."""
+    # Every test starts from a fresh DB, so cached profiles from earlier tests are stale
+    user_state_cache.clear()
     engine = create_engine(TEST_DATABASE_URL)
     Base.metadata.create_all(engine)  # Create tables
     Session = sessionmaker(bind=engine)
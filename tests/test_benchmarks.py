@@ -0,0 +1,43 @@
+# tests/test_benchmarks.py
+import random
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from benchmarks.bench_services import BENCHMARKS, Targets
+from benchmarks.run import compare, run_benchmarks
+from src.database.models import Card, MarketListing, User
+from src.utils.query_log import QueryLog
+from src.utils.synthetic_data import build, resolve_spec
+
+def test_benchmarks_run_on_tiny_dataset():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    counts = build(engine, resolve_spec("tiny"), seed=1, log=lambda line: None)
+    Session = sessionmaker(bind=engine)
+
+    session = Session()
+    assert session.scalar(select(func.count(Card.id))) == counts["cards"]
+    assert session.scalar(select(func.count(User.id))) == counts["users"]
+    assert session.scalar(select(func.count(MarketListing.id))) == counts["market_listings"] > 0
+    targets = Targets(session, random.Random(1), sample_size=20)
+    session.close()
+
+    log = QueryLog(enabled=True, slow_ms=float("inf"), max_queries=10**9, repeat_threshold=10**9)
+    log.install(engine)
+    results = run_benchmarks(Session, log, targets, runs=2, warmup=0, log=lambda line: None)
+
+    assert set(results) == set(BENCHMARKS)
+    assert all(r["runs"] >= 1 and r["queries"] > 0 and r["median_ms"] >= r["min_ms"] for r in results.values())
+
+    # Once the claimers are used up, claim() says so instead of raising
+    while targets.claimers:
+        targets.claim()
+    assert targets.claim() is None
+
+def test_compare_flags_slowdowns_and_extra_queries():
+    baseline = {"sort": {"median_ms": 10.0, "queries": 3}, "roll": {"median_ms": 4.0, "queries": 7}}
+    results = {
+        "sort": {"median_ms": 12.0, "queries": 3},  # Within 25%
+        "roll": {"median_ms": 6.0, "queries": 8},   # Slower and one more statement
+        "new": {"median_ms": 1.0, "queries": 1},    # Not in the baseline yet
+    }
+    assert compare(results, baseline, tolerance=0.25) == [("roll", "median_ms", 4.0, 6.0), ("roll", "queries", 7, 8)]
@@ -0,0 +1,11 @@
+# tests/test_catalog.py
+from src.utils.catalog import parse_line
+
+LINE = "Bradley Barcola, LW/RW/LM, Paris Saint-Germain, France, Value: 826, https://cdn.sofifa.net/x.png, 264652"
+
+def test_parse_line():
+    row = parse_line(LINE, "Rare")
+    assert row["id"] == 264652
+    assert row["rating"] == 826
+    assert row["club"] == "Paris Saint-Germain"
+    assert parse_line("not, a, player", "Rare") is None
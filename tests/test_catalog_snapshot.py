@@ -0,0 +1,52 @@
+# tests/test_catalog_snapshot.py
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models import Base
+from src.services.catalog_cache import CatalogCache
+from src.utils.catalog_snapshot import CatalogSnapshot, open_snapshot, write_snapshot
+from src.utils.catalog_sync import sync_catalog
+
+ROWS = [
+    {"id": 999001, "name": "Pelé", "rating": 1000, "rarity": "Legend", "club": "Santos", "nationality": "Brazil", "positions": "ST"},
+    {"id": 264652, "name": "Bradley Barcola", "rating": 826, "rarity": "Rare", "club": "Paris Saint-Germain", "nationality": "France", "positions": "LW/RW/LM", "retired": True},
+    {"id": 259532, "name": "Joan García", "rating": 834, "rarity": "Rare", "club": "FC Barcelona", "nationality": "Spain", "positions": "GK"},
+]
+
+def test_snapshot_roundtrip(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    write_snapshot(path, ROWS, catalog_version=7)
+
+    with CatalogSnapshot(path) as snapshot:
+        assert (len(snapshot), snapshot.catalog_version) == (3, 7)
+        assert [row["id"] for row in snapshot] == [259532, 264652, 999001] # Sorted by id
+        assert snapshot.get(999001) == dict(ROWS[0], retired=False)
+        assert snapshot.get(264652)["retired"] is True
+        assert snapshot.get(1) is None
+        assert list(snapshot.iter_rollable()) == [(259532, "Rare", "FC Barcelona"), (999001, "Legend", "Santos")]
+
+    # Anything else is ignored rather than crashing the bot
+    (tmp_path / "junk").write_bytes(b"not a snapshot at all")
+    assert open_snapshot(str(tmp_path / "junk")) is None
+    assert open_snapshot(str(tmp_path / "missing")) is None
+
+def test_catalog_cache_uses_snapshot_of_current_version(tmp_path):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    data = tmp_path / "rare.txt"
+    data.write_text("Joan García, GK, FC Barcelona, Spain, Value: 834, https://cdn.sofifa.net/y.png, 259532", encoding="utf-8")
+    sync_catalog(engine, {str(data): "Rare"}, log=lambda _: None)
+
+    path = str(tmp_path / "catalog.snapshot")
+    cache = CatalogCache(session_factory=sessionmaker(bind=engine), snapshot_path=path)
+
+    # 1. No snapshot yet: loads from the DB and writes one
+    cache.load()
+    assert cache.stats["snapshot_loads"] == 0
+    with CatalogSnapshot(path) as snapshot:
+        assert snapshot.catalog_version == 1
+
+    # 2. Next start maps it instead of querying player_base
+    fresh = CatalogCache(session_factory=sessionmaker(bind=engine), snapshot_path=path)
+    fresh.load()
+    assert fresh.stats["snapshot_loads"] == 1
+    assert fresh.ids_by_rarity == {"Rare": [259532]}
@@ -0,0 +1,132 @@
+# tests/test_catalog_sync.py
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+from src.database.models import Base, PlayerBase
+from src.services.catalog_cache import CatalogCache
+from src.utils.catalog_sync import CatalogSyncError, get_catalog_version, sync_catalog
+
+BARCOLA = "Bradley Barcola, LW/RW/LM, Paris Saint-Germain, France, Value: 826, https://cdn.sofifa.net/x.png, 264652"
+GARCIA = "Joan García, GK, FC Barcelona, Spain, Value: 834, https://cdn.sofifa.net/y.png, 259532"
+YAMAL = "Lamine Yamal, RW, FC Barcelona, Spain, Value: 900, https://cdn.sofifa.net/z.png, 277643"
+
+def make_engine():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return engine
+
+def write(path, *lines):
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return {str(path): "Rare"}
+
+def test_sync_applies_only_the_diff(tmp_path):
+    engine = make_engine()
+    files = write(tmp_path / "rare.txt", BARCOLA, GARCIA)
+    logs = []
+
+    first = sync_catalog(engine, files, log=logs.append)
+    assert len(first["insert"]) == 2
+
+    # Nothing changed: no writes, no version bump
+    again = sync_catalog(engine, files, log=logs.append)
+    assert (again["unchanged"], again["insert"], again["update"]) == (2, [], [])
+
+    # One rating changed, García left the files, Yamal is new
+    files = write(tmp_path / "rare.txt", BARCOLA.replace("Value: 826", "Value: 850"), YAMAL)
+    diff = sync_catalog(engine, files, log=logs.append)
+    assert [row["id"] for row in diff["insert"]] == [277643]
+    assert [(row["id"], row["changed"]) for row in diff["update"]] == [(264652, ["rating"])]
+    assert diff["retire"] == [259532]
+
+    with Session(engine) as session:
+        assert session.get(PlayerBase, 264652).rating == 850
+        assert session.get(PlayerBase, 259532).retired is True
+        assert get_catalog_version(session.connection()) == 2
+
+    # Coming back un-retires the player
+    files = write(tmp_path / "rare.txt", BARCOLA.replace("Value: 826", "Value: 850"), YAMAL, GARCIA)
+    diff = sync_catalog(engine, files, log=logs.append)
+    assert [row["id"] for row in diff["update"]] == [259532]
+    with Session(engine) as session:
+        assert session.get(PlayerBase, 259532).retired is False
+
+def test_sync_logs_every_chunk(tmp_path):
+    engine = make_engine()
+    logs = []
+
+    sync_catalog(engine, write(tmp_path / "rare.txt", BARCOLA, GARCIA, "malformed line", ""), chunk_size=1, log=logs.append)
+    assert sum("upsert chunk" in line for line in logs) == 2
+
+    with Session(engine) as session:
+        assert session.query(PlayerBase).count() == 2
+
+def test_dry_run_writes_nothing(tmp_path):
+    engine = make_engine()
+    logs = []
+
+    diff = sync_catalog(engine, write(tmp_path / "rare.txt", BARCOLA), dry_run=True, log=logs.append)
+
+    assert len(diff["insert"]) == 1
+    assert any("264652 Bradley Barcola" in line for line in logs)
+    with Session(engine) as session:
+        assert session.query(PlayerBase).count() == 0
+
+def test_rows_without_hash_are_backfilled_not_rewritten(tmp_path):
+    engine = make_engine()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO player_base (id, name, positions, club, nationality, image_url, rarity, rating, retired) "
+            "VALUES (264652, 'Bradley Barcola', 'LW/RW/LM', 'Paris Saint-Germain', 'France', "
+            "'https://cdn.sofifa.net/x.png', 'Rare', 826, 0)"
+        ))
+
+    diff = sync_catalog(engine, write(tmp_path / "rare.txt", BARCOLA), log=lambda _: None)
+
+    assert (diff["update"], len(diff["backfill"])) == ([], 1)
+    with Session(engine) as session:
+        assert session.get(PlayerBase, 264652).content_hash is not None
+        assert get_catalog_version(session.connection()) == 0
+
+def test_catalog_cache_reloads_after_sync(tmp_path):
+    engine = make_engine()
+    cache = CatalogCache(session_factory=sessionmaker(bind=engine))
+    sync_catalog(engine, write(tmp_path / "rare.txt", BARCOLA, GARCIA), log=lambda _: None)
+
+    cache.load()
+    assert sorted(cache.ids_by_rarity["Rare"]) == [259532, 264652]
+    assert cache.pick("Rare", club="barcelona") == 259532
+
+    # Retired players stop being rollable once the bot sees the new version
+    sync_catalog(engine, write(tmp_path / "rare.txt", BARCOLA), log=lambda _: None)
+    assert cache.current_version() != cache.version
+    cache.load()
+    assert cache.ids_by_rarity["Rare"] == [264652]
+    assert cache.pick("Rare", club="barcelona") is None
+
+def test_broken_data_files_abort_instead_of_retiring(tmp_path):
+    engine = make_engine()
+    files = write(tmp_path / "rare.txt", BARCOLA, GARCIA)
+    sync_catalog(engine, files, log=lambda _: None)
+
+    with pytest.raises(CatalogSyncError, match="not found"):
+        sync_catalog(engine, {str(tmp_path / "missing.txt"): "Rare"}, log=lambda _: None)
+    with pytest.raises(CatalogSyncError, match="no parsable rows"):
+        sync_catalog(engine, write(tmp_path / "rare.txt", "not a player line"), log=lambda _: None)
+
+    with Session(engine) as session:
+        assert session.query(PlayerBase).filter_by(retired=True).count() == 0
+
+@patch("src.utils.catalog_sync.RETIRE_GUARD_MIN", 0)
+def test_mass_retirement_needs_force(tmp_path):
+    engine = make_engine()
+    sync_catalog(engine, write(tmp_path / "rare.txt", BARCOLA, GARCIA, YAMAL), log=lambda _: None)
+
+    files = write(tmp_path / "rare.txt", BARCOLA)
+    with pytest.raises(CatalogSyncError, match="--force"):
+        sync_catalog(engine, files, log=lambda _: None)
+    with Session(engine) as session:
+        assert session.query(PlayerBase).filter_by(retired=True).count() == 0
+
+    diff = sync_catalog(engine, files, force=True, log=lambda _: None)
+    assert diff["retire"] == [259532, 277643]
@@ -0,0 +1,70 @@
+# tests/test_check_images.py
+import asyncio
+from datetime import datetime, timedelta
+from aiohttp import web
+from src.database.models import PlayerBase
+from src.utils.check_images import check_urls, save_results, select_stale
+
+async def start_stub_cdn():
+    async def image(request):
+        return web.Response(body=b"\x89PNG", content_type="image/png")
+
+    async def head_refused(request):
+        if request.method == "HEAD":
+            return web.Response(status=405)
+        return web.Response(body=b"\x89PNG", content_type="image/png")
+
+    async def html_page(request):
+        return web.Response(text="<html>moved</html>", content_type="text/html")
+
+    async def flaky(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_route("*", "/ok", image)
+    app.router.add_route("*", "/head-refused", head_refused)
+    app.router.add_route("*", "/page", html_page)
+    app.router.add_route("*", "/flaky", flaky)
+    # /missing is not routed: 404
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+def test_check_urls_against_stub_server():
+    async def run():
+        runner, base = await start_stub_cdn()
+        try:
+            paths = ["/ok", "/head-refused", "/page", "/flaky", "/missing"]
+            return await check_urls(list(enumerate(f"{base}{p}" for p in paths)), concurrency=2, per_host=2, timeout=5)
+        finally:
+            await runner.cleanup()
+
+    results = asyncio.run(run())
+    assert {player_id: status for player_id, (status, _) in results.items()} == {
+        0: "ok", 1: "ok", 2: "broken", 3: "error", 4: "broken"
+    }
+
+def test_results_are_persisted_and_only_stale_rows_rechecked(session):
+    now = datetime.utcnow()
+    for player in session.query(PlayerBase).all():
+        player.image_url = f"https://cdn.example/{player.id}.png"
+    session.commit()
+
+    conn = session.connection()
+    assert sorted(pid for pid, _ in select_stale(conn, now)) == [1, 2, 3]
+
+    save_results(conn, {1: ("ok", "200"), 2: ("broken", "404"), 3: ("error", "TimeoutError")}, now)
+    session.commit()
+
+    # Fresh results are skipped, errors always come back
+    assert [pid for pid, _ in select_stale(session.connection(), now)] == [3]
+    later = now + timedelta(days=30)
+    assert sorted(pid for pid, _ in select_stale(session.connection(), later)) == [1, 2, 3]
+
+    # Embeds skip the known-bad image
+    assert session.get(PlayerBase, 1).display_image == "https://cdn.example/1.png"
+    assert session.get(PlayerBase, 2).display_image is None
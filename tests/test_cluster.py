@@ -0,0 +1,44 @@
+# tests/test_cluster.py
+import asyncio
+import json
+from sqlalchemy import create_engine
+from src.services.cluster_bus import ClusterBus
+from src.utils.cluster import (
+    MAX_PAYLOAD_BYTES, USER_STATE_INVALIDATE, cluster_env, decode_message, encode_messages, shard_ranges
+)
+
+def test_shard_ranges_cover_every_shard_once():
+    assert shard_ranges(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert shard_ranges(2, 5) == [[0], [1]] # Never more clusters than shards
+
+    env = cluster_env(1, [4, 5, 6], 10, 3, {"DISCORD_TOKEN": "x"})
+    assert (env["SHARD_IDS"], env["CLUSTER_ID"], env["DISCORD_TOKEN"]) == ("4,5,6", "1", "x")
+
+def test_large_invalidations_are_split_under_notify_limit():
+    ids = [str(10**17 + i) for i in range(1000)]
+    payloads = encode_messages(USER_STATE_INVALIDATE, 0, "discord_ids", ids)
+
+    assert len(payloads) > 1
+    assert all(len(p.encode("utf-8")) <= MAX_PAYLOAD_BYTES for p in payloads)
+    assert [i for p in payloads for i in decode_message(p)["discord_ids"]] == ids
+    assert decode_message("not json") is None
+
+def test_local_bus_dispatches_to_handlers():
+    bus = ClusterBus(engine=create_engine("sqlite://"), cluster_id=0)
+    received = []
+    bus.subscribe(USER_STATE_INVALIDATE, lambda m: received.append(m["discord_ids"]))
+
+    async def later(message):
+        received.append("async")
+    bus.subscribe(USER_STATE_INVALIDATE, later)
+
+    async def run():
+        await bus.start()
+        await bus.publish(USER_STATE_INVALIDATE, "discord_ids", ["100"])
+        # A peer's message arriving over NOTIFY is dispatched; our own echo is not
+        await bus._dispatch(json.dumps({"kind": USER_STATE_INVALIDATE, "origin": 1, "discord_ids": ["200"]}))
+        await bus._dispatch(json.dumps({"kind": USER_STATE_INVALIDATE, "origin": 0, "discord_ids": ["300"]}))
+        await bus.close()
+
+    asyncio.run(run())
+    assert received == [["100"], "async", ["200"], "async"]
@@ -0,0 +1,46 @@
+# tests/test_command_sync.py
+import asyncio
+import discord
+from discord import app_commands
+from src.utils.command_sync import sync_tree, tree_hash
+
+def make_tree(description="Roll for a player"):
+    tree = app_commands.CommandTree(discord.Client(intents=discord.Intents.none()))
+
+    @tree.command(name="r", description=description)
+    @app_commands.choices(mode=[app_commands.Choice(name="fast", value="fast")])
+    async def roll(interaction: discord.Interaction, mode: str = "fast"):
+        pass
+
+    synced = []
+    async def fake_sync(*, guild=None):
+        synced.append(guild)
+        return tree.get_commands(guild=guild)
+    tree.sync = fake_sync
+    return tree, synced
+
+def test_hash_covers_descriptions():
+    assert tree_hash(make_tree()[0]) == tree_hash(make_tree()[0])
+    assert tree_hash(make_tree()[0]) != tree_hash(make_tree("Roll a card")[0])
+
+def test_sync_skipped_until_tree_changes(tmp_path):
+    path = str(tmp_path / "hashes.json")
+
+    async def run():
+        tree, synced = make_tree()
+        assert await sync_tree(tree, path=path) == 1
+        assert await sync_tree(tree, path=path) is None # Unchanged: no API call
+        assert await sync_tree(tree, force=True, path=path) == 1
+
+        # The dev guild is tracked separately
+        guild = discord.Object(id=775442968177541150)
+        tree.copy_global_to(guild=guild)
+        assert await sync_tree(tree, guild=guild, path=path) == 1
+        assert await sync_tree(tree, guild=guild, path=path) is None
+
+        changed, changed_synced = make_tree("Roll a card")
+        assert await sync_tree(changed, path=path) == 1
+        return synced, changed_synced
+
+    synced, changed_synced = asyncio.run(run())
+    assert len(synced) == 3 and len(changed_synced) == 1
@@ -0,0 +1,21 @@
+# tests/test_db.py
+import pytest
+from sqlalchemy import create_engine, exc, text
+from src.database.db import TimedQueuePool, pool_stats
+
+def test_timed_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+    before_checkouts, before_timeouts = pool_stats.checkouts, pool_stats.timeouts
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        # Pool is exhausted: the second checkout waits and times out
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert pool_stats.checkouts - before_checkouts == 2
+    assert pool_stats.timeouts - before_timeouts == 1
+    assert pool_stats.max_wait >= 0.1
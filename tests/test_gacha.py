@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 from unittest.mock import patch
 from src.services.gacha_service import GachaService
 from src.database.models import Card, User
@@ -31,4 +32,23 @@ def test_duplicate_gives_coins(session):
         
         assert result["success"] is True
         assert result["is_duplicate"] is True
-        assert result["coins_gained"] > 0
\ No newline at end of file
+        assert result["coins_gained"] > 0
+
+def test_refills_are_derived_without_writes(session):
+    service = GachaService(session)
+
+    alice = session.query(User).filter_by(discord_id="100").first()
+    alice.rolls_remaining = 0
+    alice.last_roll_reset = datetime.utcnow() - timedelta(minutes=61)
+    session.commit()
+
+    # Reading sees a full stock but leaves the row alone
+    user = service.get_or_create_user("100", "999", "Alice")
+    assert service.available_rolls(user) == user.max_rolls
+    assert not session.dirty
+    assert user.rolls_remaining == 0
+
+    # Spending materializes the refill
+    with patch.object(GachaService, 'determine_rarity', return_value="Legend"):
+        result = service.roll_card("100", "999", "Alice")
+    assert result["rolls_remaining"] == user.max_rolls - 1
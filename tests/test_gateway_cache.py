@@ -0,0 +1,25 @@
+# tests/test_gateway_cache.py
+from src.utils.gateway_cache import bot_options, resolve_policy
+
+def test_default_profile_keeps_previous_behaviour():
+    options = bot_options(resolve_policy("default", overrides={}))
+
+    assert options["intents"].members and options["intents"].message_content
+    assert options["member_cache_flags"].joined
+    assert options["chunk_guilds_at_startup"] is True
+    assert options["max_messages"] == 1000
+
+def test_low_profile_and_overrides():
+    options = bot_options(resolve_policy("low", overrides={}))
+    assert not options["intents"].members and not options["intents"].message_content
+    assert options["member_cache_flags"].value == 0
+    assert (options["chunk_guilds_at_startup"], options["max_messages"]) == (False, None)
+
+    # One setting can be changed without leaving the profile
+    policy = resolve_policy("low", overrides={"message_cache_size": "200", "message_content": "true"})
+    assert (policy["message_cache_size"], policy["message_content"], policy["members_intent"]) == (200, True, False)
+
+    # A member cache that needs the members intent is downgraded instead of crashing discord.py
+    policy = resolve_policy("default", overrides={"members_intent": "false"})
+    assert (policy["member_cache"], policy["chunk_at_startup"]) == ("voice", False)
+    bot_options(policy)
@@ -0,0 +1,53 @@
+# tests/test_load.py
+import asyncio
+import random
+from unittest.mock import patch
+import pytest
+from benchmarks.bench_services import Targets
+from benchmarks.fakes import FakeBot, FakeGuild, FakeInteraction, FakeUser
+from benchmarks.load import LoadTest, classify, parse_mix, rate_limits_disabled
+from src.database.db import SessionLocal, engine
+from src.database.user_state import user_state_cache
+from src.services.tutorial_events import TutorialEventBus
+from src.utils.synthetic_data import build, resolve_spec
+
+def test_fake_interaction_enforces_one_response():
+    interaction = FakeInteraction(None, FakeUser("100"), FakeGuild("999"))
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await interaction.followup.send("too early")
+        await interaction.response.defer()
+        with pytest.raises(RuntimeError):
+            await interaction.response.send_message("twice")
+        await interaction.followup.send("❌ You have no claims left!")
+
+    asyncio.run(run())
+    assert interaction.texts() == ["❌ You have no claims left!"]
+    assert classify(interaction) == "rejected"
+
+def test_parse_mix():
+    assert parse_mix("roll=3, team_view") == {"roll": 3.0, "team_view": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("dance=1")
+
+def test_load_test_drives_the_real_callbacks():
+    # The cogs use the app's engine: in-memory SQLite, one connection per thread
+    user_state_cache.clear()
+    build(engine, resolve_spec("tiny"), seed=5, log=lambda line: None)
+    session = SessionLocal()
+    try:
+        targets = Targets(session, random.Random(5), sample_size=40)
+    finally:
+        session.close()
+
+    test = LoadTest(FakeBot(TutorialEventBus()), targets, concurrency=4, max_requests=60, claim_rate=1.0, seed=5)
+    # Seeded rolls: the same rarities (and outcomes) every run
+    with rate_limits_disabled(), patch("src.services.gacha_service.random", random.Random(5)):
+        results = asyncio.run(test.run())
+    user_state_cache.clear()
+
+    assert not results["exceptions"]
+    assert {"roll", "claim", "collection", "team_view", "team_set"} <= set(results["ops"])
+    assert all(r["outcomes"].get("error", 0) == 0 for r in results["ops"].values())
+    assert sum(r["count"] for r in results["ops"].values()) == results["interactions"] >= 60
@@ -0,0 +1,58 @@
+# tests/test_loop_watchdog.py
+import asyncio
+import time
+from types import SimpleNamespace
+from src.utils.loop_watchdog import LoopWatchdog, block_seconds
+from src.utils.metrics import LoopLagMonitor
+
+def slow_sort():
+    time.sleep(0.3) # A synchronous service call on the loop
+
+async def sort_command(interaction):
+    slow_sort()
+
+def test_watchdog_captures_the_blocking_command():
+    monitor = LoopLagMonitor(interval=0.02)
+    watchdog = LoopWatchdog(monitor, threshold=0.1, check_interval=0.01)
+    blocks_before = block_seconds.count("/sort")
+
+    async def run():
+        await monitor.start()
+        await watchdog.start()
+        await asyncio.sleep(0.05) # Let the heartbeat start
+
+        interaction = SimpleNamespace(command=SimpleNamespace(qualified_name="sort"))
+        await sort_command(interaction)
+        await asyncio.sleep(0.05) # The monitor wakes up late and reports the block
+
+        await watchdog.close()
+        await monitor.close()
+
+    asyncio.run(run())
+
+    block = watchdog.recent[-1]
+    assert block["command"] == "/sort"
+    assert block["blocked_seconds"] >= 0.2
+    assert "in slow_sort" in block["site"]
+    assert any("time.sleep(0.3)" in line for line in block["stack"])
+    assert block_seconds.count("/sort") == blocks_before + 1
+
+    report = watchdog.report()
+    assert "/sort: 1x" in report and "slow_sort" in report
+
+def test_short_stalls_are_ignored():
+    monitor = LoopLagMonitor(interval=0.02)
+    watchdog = LoopWatchdog(monitor, threshold=0.2, check_interval=0.01)
+
+    async def run():
+        await monitor.start()
+        await watchdog.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.05)
+        await asyncio.sleep(0.05)
+        await watchdog.close()
+        await monitor.close()
+
+    asyncio.run(run())
+    assert not watchdog.recent
+    assert watchdog.report().startswith("No event loop blocks")
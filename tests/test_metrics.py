@@ -0,0 +1,102 @@
+# tests/test_metrics.py
+import asyncio
+from unittest.mock import patch
+import aiohttp
+from aiohttp import web
+from sqlalchemy import create_engine, text
+from src.services.gacha_service import GachaService
+from src.utils.bot_metrics import add_metrics_route, authorized, can_serve_on, collect_runtime
+from src.utils.metrics import MetricsRegistry, instrument_engine, query_errors, query_seconds, service_outcomes, stage_seconds
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    latency = registry.histogram("cmd_seconds", "Latency.", ("command",), buckets=(0.1, 1.0))
+    errors = registry.counter("cmd_errors_total", "Errors.", ("command",))
+    latency.observe(0.05, "roll")
+    latency.observe(0.5, "roll")
+    latency.observe(3.0, "roll")
+    errors.inc('say "hi"')
+    registry.add_collector(lambda: [("live", "gauge", "Live things.", [({}, 2), ({"kind": "skipped"}, None)])])
+
+    output = registry.render()
+    # Buckets are cumulative and +Inf equals the count
+    assert 'cmd_seconds_bucket{command="roll",le="0.1"} 1' in output
+    assert 'cmd_seconds_bucket{command="roll",le="1"} 2' in output
+    assert 'cmd_seconds_bucket{command="roll",le="+Inf"} 3' in output
+    assert 'cmd_seconds_count{command="roll"} 3' in output
+    assert 'cmd_errors_total{command="say \\"hi\\""} 1' in output
+    assert "# TYPE live gauge\nlive 2\n" in output
+
+def test_query_metrics_from_engine_events():
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    selects, inserts, errors = query_seconds.count("SELECT"), query_seconds.count("INSERT"), query_errors.get("SELECT")
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+        conn.execute(text("SELECT x FROM t")).all()
+        try:
+            conn.execute(text("SELECT nope FROM t"))
+        except Exception:
+            pass
+
+    assert query_seconds.count("INSERT") == inserts + 1
+    assert query_seconds.count("SELECT") == selects + 1
+    assert query_errors.get("SELECT") == errors + 1
+
+def test_roll_and_claim_record_stages(session):
+    new_rolls = service_outcomes.get("roll_card", "new")
+    picks = stage_seconds.count("roll_card", "pick_player")
+    taken = service_outcomes.get("claim_card", "taken")
+
+    service = GachaService(session)
+    with patch.object(GachaService, "determine_rarity", return_value="Legend"):
+        service.roll_card("100", "999", "Alice")
+    assert service_outcomes.get("roll_card", "new") == new_rolls + 1
+    assert stage_seconds.count("roll_card", "pick_player") == picks + 1
+
+    assert service.claim_card("100", "999", 1)["success"]
+    assert not service.claim_card("200", "999", 1)["success"]
+    assert service_outcomes.get("claim_card", "taken") == taken + 1
+
+def test_metrics_route_serves_runtime_gauges():
+    registry = MetricsRegistry()
+    registry.add_collector(collect_runtime)
+    body = registry.render()
+    assert "touchline_user_state_cache_hit_ratio" in body
+    assert "touchline_db_pool_checkouts_total" in body
+
+    async def run():
+        app = web.Application()
+        add_metrics_route(app)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession() as http:
+                async with http.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    return response.status, response.headers["Content-Type"], await response.text()
+        finally:
+            await runner.cleanup()
+
+    status, content_type, text_body = asyncio.run(run())
+    assert status == 200 and content_type.startswith("text/plain")
+    assert "touchline_db_query_seconds" in text_body
+
+def test_metrics_token():
+    class Request:
+        def __init__(self, headers):
+            self.headers = headers
+
+    assert authorized(Request({}), token="")
+    assert not authorized(Request({}), token="secret")
+    assert not authorized(Request({"Authorization": "Bearer wrong"}), token="secret")
+    assert authorized(Request({"Authorization": "Bearer secret"}), token="secret")
+
+    # Only loopback may be served without a token
+    assert can_serve_on("127.0.0.1", token="")
+    assert not can_serve_on("0.0.0.0", token="")
+    assert can_serve_on("0.0.0.0", token="secret")
@@ -0,0 +1,68 @@
+# tests/test_migrations.py
+from sqlalchemy import create_engine, text, inspect, Integer
+from src.database.flags import TUTORIAL_BITS, MILESTONE_BITS
+from src.utils.migrate_flags_to_bits import migrate_flags
+
+def make_legacy_engine():
+    """Minimal copy of the pre-bitmask schema (JSON flag columns)."""
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, tutorial_flags JSON, team_rewards_flags JSON)"))
+        conn.execute(text("CREATE TABLE global_tutorials (discord_id VARCHAR PRIMARY KEY, tutorial_flags JSON, tutorial_progress INTEGER)"))
+        conn.execute(text("""INSERT INTO users VALUES (1, '{"1_roll": true, "1_claim": false}', '[true, false, true]')"""))
+        conn.execute(text("INSERT INTO users VALUES (2, NULL, NULL)"))
+        conn.execute(text("""INSERT INTO global_tutorials VALUES ('100', '{"1_roll": true, "2_daily": true}', 1)"""))
+    return engine
+
+def test_flags_migrate_to_bitmasks():
+    engine = make_legacy_engine()
+    with engine.begin() as conn:
+        migrate_flags(conn)
+
+    with engine.connect() as conn:
+        users = dict(conn.execute(text("SELECT id, tutorial_flags FROM users")).fetchall())
+        teams = dict(conn.execute(text("SELECT id, team_rewards_flags FROM users")).fetchall())
+        tracker = conn.execute(text("SELECT tutorial_flags FROM global_tutorials")).scalar()
+
+    assert users == {1: TUTORIAL_BITS["1_roll"], 2: 0}
+    assert teams[1] == MILESTONE_BITS["full_team"] | MILESTONE_BITS["ovl_400"]
+    assert tracker == TUTORIAL_BITS["1_roll"] | TUTORIAL_BITS["2_daily"]
+
+    columns = {c["name"]: c["type"] for c in inspect(engine).get_columns("global_tutorials")}
+    assert isinstance(columns["tutorial_flags"], Integer)
+
+def test_flag_migration_is_idempotent():
+    engine = make_legacy_engine()
+    with engine.begin() as conn:
+        migrate_flags(conn)
+    with engine.begin() as conn:
+        migrate_flags(conn)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT tutorial_flags FROM users WHERE id = 1")).scalar() == TUTORIAL_BITS["1_roll"]
+
+def test_fresh_database_is_built_and_stamped():
+    from src.database.migrations import run_migrations, get_applied_versions, MIGRATIONS, HOT_PATH_INDEXES
+    engine = create_engine("sqlite:///:memory:")
+
+    applied = run_migrations(engine)
+    assert applied == [m[0] for m in MIGRATIONS]
+    assert get_applied_versions(engine) == set(applied)
+
+    indexes = {ix["name"] for table in ("cards", "shortlists", "market_listings", "player_base")
+               for ix in inspect(engine).get_indexes(table)}
+    assert {name for name, _, _ in HOT_PATH_INDEXES} <= indexes
+
+    # Second run is a no-op
+    assert run_migrations(engine) == []
+
+def test_legacy_database_gets_formation_and_indexes():
+    from src.database.migrations import run_migrations
+    engine = make_legacy_engine()
+
+    run_migrations(engine)
+
+    columns = {c["name"]: c["type"] for c in inspect(engine).get_columns("users")}
+    assert "formation" in columns
+    assert isinstance(columns["tutorial_flags"], Integer)
+    assert "ix_cards_user_id" in {ix["name"] for ix in inspect(engine).get_indexes("cards")}
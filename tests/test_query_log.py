@@ -0,0 +1,87 @@
+# tests/test_query_log.py
+import asyncio
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.database.models import Card
+from src.services.gacha_service import GachaService
+from src.services.match_service import MatchService
+from src.utils.query_log import QueryLog, statement_shape
+
+def make_log(session, **options):
+    log = QueryLog(enabled=True, slow_ms=10_000, max_queries=100, repeat_threshold=3, **options)
+    log.install(session.get_bind())
+    return log
+
+def give_cards(session, positions=("F1", "M1", "GK")):
+    for player_id, position in zip((1, 2, 3), positions):
+        session.add(Card(user_id=1, player_base_id=player_id, position_in_xi=position))
+    session.commit()
+    session.expunge_all() # Empty identity map: every relationship access would be a real query
+
+def test_statement_shape_collapses_literals_and_in_lists():
+    assert statement_shape("SELECT *  FROM cards\nWHERE id = 42 AND name = 'Messi'") == "SELECT * FROM cards WHERE id = ? AND name = ?"
+    assert statement_shape("SELECT x FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT x FROM t WHERE id IN (?, ?)")
+
+def test_lazy_loads_in_a_loop_are_flagged(session):
+    log = make_log(session)
+    give_cards(session)
+
+    with log.trace("/lazy") as trace:
+        cards = session.query(Card).all()
+        names = [card.details.name for card in cards] # One SELECT per card
+
+    assert len(names) == 3
+    report = log.recent[-1]
+    assert report["name"] == "/lazy" and report["reasons"] == ["n+1"]
+    shape, count, _, sites = report["repeats"][0]
+    assert count == 3 and "FROM player_base" in shape
+    assert sites == ["unknown"] # Only src/ frames count as a site, and this loop is in a test
+    assert "N+1 x3" in log.format_report(report)
+    assert len(trace.queries) == 4
+
+def test_eager_loaded_hot_paths_run_constant_queries(session):
+    log = make_log(session)
+    give_cards(session)
+
+    with log.trace("/sort") as trace:
+        assert GachaService(session).sort_collection("100", "999")["success"]
+    assert any(site.startswith("src/services/gacha_service.py:") and site.endswith("in sort_collection") for _, _, site in trace.queries)
+    with log.trace("/match"):
+        MatchService(session).get_team_power("100", "999")
+    assert not log.recent
+
+def test_thresholds_and_contextvar_follows_threads():
+    # One shared in-memory connection, usable from the worker thread
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    log = QueryLog(enabled=True, slow_ms=10_000, max_queries=2, repeat_threshold=3)
+    log.install(engine)
+
+    def lookups():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).all()
+            conn.execute(text("SELECT 2 + 2")).all()
+
+    async def command():
+        with log.trace("/threaded") as trace:
+            await asyncio.to_thread(lookups)
+        return trace
+
+    trace = asyncio.run(command())
+    assert len(trace.queries) == 2
+    assert log.recent[-1]["reasons"] == ["queries"]
+
+    # Statements outside a trace are not recorded
+    lookups()
+    assert len(trace.queries) == 2
+
+def test_logs_sharing_an_engine_only_record_their_own_traces():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    first = QueryLog(enabled=True, slow_ms=10_000, max_queries=100, repeat_threshold=100)
+    second = QueryLog(enabled=True, slow_ms=10_000, max_queries=100, repeat_threshold=100)
+    first.install(engine)
+    second.install(engine)
+
+    with second.trace("/second") as trace:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).all()
+    assert len(trace.queries) == 1
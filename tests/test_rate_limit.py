@@ -0,0 +1,39 @@
+# tests/test_rate_limit.py
+from src.utils.rate_limit import RateLimiter
+
+def make_limiter(now):
+    limits = {"roll": {"user": (2, 1.0), "guild": (100, 100.0)}}
+    return RateLimiter(limits=limits, max_queue_seconds=0.5, clock=lambda: now[0])
+
+def test_burst_then_queue_then_reject():
+    now = [0.0]
+    limiter = make_limiter(now)
+
+    assert limiter.reserve("roll", 1, 9) == 0 # Burst of 2
+    assert limiter.reserve("roll", 1, 9) == 0
+
+    now[0] = 0.6 # 0.6 token back: short wait gets queued
+    assert abs(limiter.reserve("roll", 1, 9) - 0.4) < 1e-9
+
+    # The queued request reserved the next token, so the following one would wait too long
+    assert limiter.reserve("roll", 1, 9) is None
+    assert limiter.stats["roll"] == {"allowed": 2, "queued": 1, "rejected": 1}
+
+def test_users_have_separate_buckets():
+    now = [0.0]
+    limiter = make_limiter(now)
+    for _ in range(2):
+        limiter.reserve("roll", 1, 9)
+
+    assert limiter.reserve("roll", 1, 9) is None
+    assert limiter.reserve("roll", 2, 9) == 0
+
+def test_queueing_is_capped_by_the_ack_budget():
+    now = [0.0]
+    limiter = make_limiter(now)
+    for _ in range(2):
+        limiter.reserve("roll", 1, 9)
+
+    now[0] = 0.6 # A 0.4s wait fits the queue limit but not an interaction with only 0.2s left to ack
+    assert limiter.reserve("roll", 1, 9, max_wait=0.2) is None
+    assert abs(limiter.reserve("roll", 1, 9, max_wait=1.0) - 0.4) < 1e-9
@@ -0,0 +1,61 @@
+# tests/test_scrape_players.py
+import os
+from src.utils.scrape_players import Checkpoint, DirectoryFetcher, parse_page, scrape_sofifa
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "sofifa_page.html")
+
+def read_fixture():
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+def test_parse_page_fixture():
+    row_count, players = parse_page(read_fixture())
+
+    assert row_count == 4 # The ad row counts as a row but yields no player
+    by_id = {player_id: (category, line) for player_id, category, line in players}
+    assert set(by_id) == {"231747", "264652", "270001"}
+
+    category, line = by_id["231747"]
+    assert category == "ultra_rare"
+    assert line == "Kylian Mbappé Lottin, ST/LW, Real Madrid, France, Value: 914, https://cdn.sofifa.net/players/231/747/26_180.png, 231747\n"
+    assert by_id["270001"][1].startswith("Youth Prospect, CM, Free Agent, Spain,")
+
+def test_scrape_resumes_from_checkpoint(tmp_path):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    html = read_fixture()
+    (pages / "offset_0.html").write_bytes(html)
+    # Second page: one repeat (Mbappé) and one new player
+    (pages / "offset_60.html").write_bytes(html.replace(b"270001", b"270002").replace(b"264652", b"264653"))
+
+    out = tmp_path / "data"
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    offline = DirectoryFetcher(str(pages))
+
+    # 1. First run dies on the second page
+    def flaky(offset):
+        if offset == 60:
+            raise ConnectionError("network down")
+        return offline(offset)
+
+    scrape_sofifa(fetcher=flaky, total_pages=3, output_dir=str(out), checkpoint_path=checkpoint_path,
+                  fetch_workers=2, parse_workers=0, delay=None)
+    checkpoint = Checkpoint(checkpoint_path).load()
+    assert checkpoint.done_offsets == {0}
+    assert not checkpoint.finished
+
+    # 2. Resume only fetches what is missing, in a process pool
+    fetched = []
+    def recording(offset):
+        fetched.append(offset)
+        return offline(offset)
+
+    checkpoint = scrape_sofifa(fetcher=recording, total_pages=3, output_dir=str(out), checkpoint_path=checkpoint_path,
+                               fetch_workers=2, parse_workers=1, delay=None)
+
+    assert 0 not in fetched
+    assert checkpoint.finished
+    assert len(checkpoint.seen_ids) == 5
+    lines = (out / "ultra_rare_players_list.txt").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1 # Mbappé is written once across both runs
+    assert len((out / "common_players.txt").read_text(encoding="utf-8").splitlines()) == 2
@@ -0,0 +1,46 @@
+# tests/test_startup_profiler.py
+import asyncio
+import sys
+import time
+from src.utils.startup_profiler import StartupProfiler
+
+def test_phases_and_failed_warmup_jobs_are_reported():
+    profiler = StartupProfiler(start=time.perf_counter())
+
+    async def ok():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def broken():
+        raise RuntimeError("webhook port in use")
+
+    async def run():
+        with profiler.phase("startup", "cogs"):
+            pass
+        return await asyncio.gather(profiler.timed("warmup", "catalog", ok()), profiler.timed("warmup", "webhook", broken()))
+
+    # A failing warmup job is logged, not raised
+    assert asyncio.run(run()) == ["done", None]
+    profiler.finish()
+
+    report = profiler.report()
+    assert "[warmup] catalog" in report
+    assert "[warmup] webhook  ❌" in report
+    assert "Ready after" in report
+
+def test_import_timing(tmp_path):
+    (tmp_path / "slow_boot_module.py").write_text("import time\ntime.sleep(0.02)\nVALUE = 1\n")
+    sys.path.insert(0, str(tmp_path))
+    profiler = StartupProfiler()
+    profiler.start_import_timing()
+    try:
+        import slow_boot_module
+    finally:
+        profiler.stop_import_timing()
+        sys.path.remove(str(tmp_path))
+
+    assert slow_boot_module.VALUE == 1
+    # The real loader is back in place once the module is executed
+    assert "Timed" not in type(slow_boot_module.__loader__).__name__
+    name, inclusive, self_time = profiler.slowest_imports(1)[0]
+    assert name == "slow_boot_module" and self_time >= 0.02
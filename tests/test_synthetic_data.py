@@ -0,0 +1,62 @@
+# tests/test_synthetic_data.py
+from collections import Counter
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+from src.database.models import Card, CatalogMeta, MarketListing, PlayerBase, User
+from src.utils.synthetic_data import COLUMNS, build, generate, resolve_spec
+
+def collect(spec, seed):
+    rows = {}
+    for table, batch in generate(spec, seed):
+        rows.setdefault(table.name, []).extend(dict(zip(COLUMNS[table], row)) for row in batch)
+    return rows
+
+def test_generation_is_seeded_and_keeps_game_rules():
+    spec = resolve_spec("tiny", cards=500)
+    rows = collect(spec, seed=7)
+    assert rows == collect(spec, seed=7)
+    assert rows != collect(spec, seed=8)
+    assert len(rows["cards"]) == 500 and len(rows["users"]) == 40
+
+    guild_of = {user["id"]: user["guild_id"] for user in rows["users"]}
+    owned = [(guild_of[card["user_id"]], card["player_base_id"]) for card in rows["cards"]]
+    assert len(owned) == len(set(owned)) # A player is owned at most once per guild
+
+    lineups = {}
+    for card in rows["cards"]:
+        if card["position_in_xi"]:
+            lineups.setdefault(card["user_id"], []).append(card["position_in_xi"])
+    assert all(len(slots) == len(set(slots)) for slots in lineups.values())
+    assert any(len(slots) == 11 for slots in lineups.values())
+
+    # Heavy collectors: the top profile of a guild owns far more than the median one
+    per_user = sorted(Counter(card["user_id"] for card in rows["cards"]).values(), reverse=True)
+    assert per_user[0] > 3 * per_user[len(per_user) // 2]
+
+def test_owned_cards_follow_the_roll_odds():
+    rows = collect(resolve_spec("tiny", players=2_000, users=100, guilds=1, cards=1_500), seed=3)
+    rarity = {player["id"]: player["rarity"] for player in rows["player_base"]}
+    owned = Counter(rarity[card["player_base_id"]] for card in rows["cards"])
+    assert owned["Common"] / len(rows["cards"]) > 0.9
+    assert owned["Legend"] <= 5
+
+def test_every_rarity_is_in_the_catalog():
+    # Rolls pick a rarity first; a tiny catalog without Legends would fail those rolls
+    rows = collect(resolve_spec("tiny", players=10, cards=10), seed=1)
+    assert {player["rarity"] for player in rows["player_base"]} == {"Common", "Rare", "Ultra Rare", "Legend"}
+
+def test_build_writes_every_table():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    counts = build(engine, resolve_spec("tiny"), seed=1, log=lambda line: None)
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Card)) == counts["cards"] == 400
+        assert conn.scalar(select(func.count()).select_from(User)) == counts["users"]
+        assert conn.scalar(select(func.count()).select_from(MarketListing)) == counts["market_listings"] > 0
+        assert conn.scalar(select(func.count()).where(PlayerBase.content_hash.is_(None))) == 0
+        assert conn.scalar(select(CatalogMeta.value).where(CatalogMeta.key == "catalog_version")) == "1"
+
+    # Rebuilding replaces the rows instead of adding to them
+    build(engine, resolve_spec("tiny"), seed=1, log=lambda line: None)
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Card)) == 400
+        assert conn.scalar(select(CatalogMeta.value).where(CatalogMeta.key == "catalog_version")) == "2"
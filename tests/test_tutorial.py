@@ -0,0 +1,99 @@
+# tests/test_tutorial.py
+import asyncio
+from sqlalchemy.orm import Session
+from src.services.tutorial_events import TutorialEventBus, TutorialEvent
+from src.database.models import GlobalTutorial, User
+
+def make_bus(session):
+    return TutorialEventBus(session_factory=lambda: Session(bind=session.get_bind()))
+
+def test_batch_completes_tutorial(session):
+    bus = make_bus(session)
+
+    # Both steps of Tutorial 1 arrive in the same batch
+    batch = [
+        TutorialEvent("100", "999", "1_roll"),
+        TutorialEvent("100", "999", "1_claim"),
+    ]
+    results = bus.apply_batch(batch)
+
+    assert results[0][1] == "✅ **Tutorial Step Complete!** Check `/tutorial`."
+    assert "Completed" in results[1][1]
+
+    session.expire_all()
+    tracker = session.query(GlobalTutorial).filter_by(discord_id="100").first()
+    alice = session.query(User).filter_by(discord_id="100").first()
+    assert tracker.tutorial_progress == 1
+    assert alice.free_claims == 1
+
+def test_veterans_skip_the_queue(session):
+    session.add(GlobalTutorial(discord_id="100", tutorial_progress=8))
+    session.commit()
+
+    bus = make_bus(session)
+    bus.warm_completed_ids()
+
+    assert bus.publish("100", "999", "1_roll") is False
+    assert bus.publish("200", "999", "1_roll") is True
+    assert bus.queue.qsize() == 1
+    assert bus.stats["short_circuited"] == 1
+
+def test_notify_receives_message(session):
+    bus = make_bus(session)
+    sent = []
+
+    async def notify(msg):
+        sent.append(msg)
+
+    asyncio.run(bus._process([TutorialEvent("200", "999", "1_roll", notify)]))
+    assert len(sent) == 1
+
+def test_close_flushes_the_batch_the_consumer_holds(session):
+    bus = make_bus(session)
+    bus.batch_window = 10 # The consumer would otherwise keep waiting for more events
+
+    async def run():
+        bus._task = asyncio.create_task(bus._consume())
+        bus.publish("100", "999", "1_roll")
+        bus.publish("100", "999", "1_claim")
+        await asyncio.sleep(0.05) # Both events are now in the consumer's batch, not the queue
+        assert bus.queue.empty()
+        await bus.close()
+
+    asyncio.run(run())
+    session.expire_all()
+    assert session.query(GlobalTutorial).filter_by(discord_id="100").first().tutorial_progress == 1
+
+def test_failed_batch_is_retried_per_event(session):
+    bus = make_bus(session)
+    apply_batch = bus.apply_batch
+
+    def failing_apply(batch):
+        if any(event.discord_id == "bad" for event in batch):
+            raise RuntimeError("bad row")
+        return apply_batch(batch)
+
+    bus.apply_batch = failing_apply
+    batch = [TutorialEvent("bad", "999", "1_roll"), TutorialEvent("200", "999", "1_roll")]
+    asyncio.run(bus._process_safely(batch))
+
+    session.expire_all()
+    assert session.query(GlobalTutorial).filter_by(discord_id="200").first() is not None
+    assert bus.stats["failed"] == 1
+
+def test_consumer_runs_even_if_the_veteran_preload_fails(session):
+    bus = make_bus(session)
+
+    def broken_warm():
+        raise RuntimeError("connection reset")
+
+    bus.warm_completed_ids = broken_warm
+
+    async def run():
+        await bus.start()
+        bus.publish("100", "999", "1_roll")
+        await bus.close()
+
+    asyncio.run(run())
+    session.expire_all()
+    assert session.query(GlobalTutorial).filter_by(discord_id="100").first() is not None
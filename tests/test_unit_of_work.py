@@ -0,0 +1,42 @@
+# tests/test_unit_of_work.py
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from src.database.unit_of_work import UnitOfWork, get_user, commit
+from src.database.models import User
+from src.services.gacha_service import GachaService
+
+def test_user_loaded_once_and_committed_on_exit(session):
+    engine = session.get_bind()
+    user_selects = []
+
+    def count_user_selects(conn, cursor, statement, params, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM users" in statement:
+            user_selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_user_selects)
+    try:
+        with UnitOfWork(sessionmaker(bind=engine)) as uow:
+            alice = get_user(uow.session, 100, 999)
+            same = GachaService(uow.session).get_or_create_user("100", "999", "Alice")
+            assert same is alice
+
+            alice.coins += 5
+            commit(uow.session) # Only a flush inside the unit of work
+            assert alice.coins == 10005 # Not expired, no reload
+    finally:
+        event.remove(engine, "before_cursor_execute", count_user_selects)
+
+    assert len(user_selects) == 1
+    session.expire_all()
+    assert session.query(User).filter_by(discord_id="100").first().coins == 10005
+
+def test_unit_of_work_rolls_back_on_error(session):
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(sessionmaker(bind=session.get_bind())) as uow:
+            get_user(uow.session, 100, 999).coins = 0
+            commit(uow.session)
+            raise RuntimeError("handler failed")
+
+    session.expire_all()
+    assert session.query(User).filter_by(discord_id="100").first().coins == 10000
@@ -0,0 +1,92 @@
+# tests/test_user_locks.py
+import asyncio
+import gc
+from unittest.mock import patch
+import pytest
+from benchmarks.fakes import FakeGuild, FakeInteraction, FakeUser
+from src.utils.user_locks import UserBusy, UserLockRegistry, serialized
+
+def test_same_user_serialized_other_users_parallel():
+    registry = UserLockRegistry()
+    log = []
+
+    async def command(discord_id, name):
+        async with registry.hold(999, discord_id):
+            log.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            log.append(f"{name} end")
+
+    async def main():
+        await asyncio.gather(command(1, "a1"), command(1, "a2"), command(2, "b"))
+
+    asyncio.run(main())
+
+    # a2 only starts after a1 ends; b ran alongside a1
+    assert log.index("a2 start") > log.index("a1 end")
+    assert log.index("b start") < log.index("a1 end")
+    assert registry.stats["acquired"] == 3
+    assert registry.stats["contended"] == 1
+
+def test_two_party_locks_do_not_deadlock():
+    registry = UserLockRegistry()
+
+    async def trade(a, b):
+        async with registry.hold(999, a, b):
+            await asyncio.sleep(0.01)
+
+    async def main():
+        # Opposite argument order would deadlock without sorted acquisition
+        await asyncio.wait_for(asyncio.gather(trade(1, 2), trade(2, 1)), timeout=1)
+
+    asyncio.run(main())
+
+def test_idle_locks_are_released():
+    registry = UserLockRegistry()
+
+    async def main():
+        async with registry.hold(999, 1):
+            assert len(registry._locks) == 1
+
+    asyncio.run(main())
+    gc.collect()
+    assert len(registry._locks) == 0
+
+def test_bounded_wait_gives_up_while_the_lock_is_held():
+    registry = UserLockRegistry()
+
+    async def slow_command():
+        async with registry.hold(999, 1):
+            await asyncio.sleep(0.2)
+
+    async def main():
+        slow = asyncio.create_task(slow_command())
+        await asyncio.sleep(0.01)
+        with pytest.raises(UserBusy):
+            async with registry.hold(999, 1, timeout=0.05):
+                pass
+        async with registry.hold(999, 2, timeout=0): # A free lock never waits, even with no time left
+            pass
+        await slow
+
+    asyncio.run(main())
+    assert registry.stats["timeouts"] == 1
+
+def test_serialized_replies_busy_instead_of_missing_the_ack():
+    class Cog:
+        @serialized
+        async def sort(self, interaction):
+            await interaction.response.defer()
+            await asyncio.sleep(0.3)
+
+    def interaction():
+        return FakeInteraction(None, FakeUser("100"), FakeGuild("999"))
+
+    first, second = interaction(), interaction()
+
+    async def main():
+        with patch("src.utils.ack_deadline.ACK_BUDGET_SECONDS", 0.1):
+            await asyncio.gather(Cog().sort(first), Cog().sort(second))
+
+    asyncio.run(main())
+    assert first.texts() == []
+    assert second.texts() == ["⏳ Your last command is still running. Try again in a moment!"]
@@ -0,0 +1,77 @@
+# tests/test_user_state.py
+from src.database.user_state import UserState, UserStateCache, user_state_cache
+from src.database.models import Card, User
+from src.services.gacha_service import GachaService
+from src.services.vote_service import VoteService
+
+def test_cache_evicts_lru_and_expires():
+    now = [0]
+    cache = UserStateCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put(UserState(discord_id="1", guild_id="9", coins=1))
+    cache.put(UserState(discord_id="2", guild_id="9", coins=2))
+    assert cache.get(1, 9).coins == 1 # Touch 1 so 2 is the LRU entry
+
+    cache.put(UserState(discord_id="3", guild_id="9", coins=3))
+    assert cache.get(2, 9) is None
+    assert cache.stats["evictions"] == 1
+
+    now[0] = 11
+    assert cache.get(1, 9) is None
+    assert cache.stats["expired"] == 1
+
+def test_commits_write_through(session):
+    alice = session.query(User).filter_by(discord_id="100").first()
+    alice.coins = 123
+    session.commit()
+
+    cached = user_state_cache.get("100", "999")
+    assert cached is not None and cached.coins == 123
+
+def test_sql_expression_updates_invalidate(session):
+    alice = session.query(User).filter_by(discord_id="100").first()
+    alice.coins = 1
+    session.commit()
+
+    # New value only known by the database
+    alice.coins = User.coins + 5
+    session.commit()
+    assert user_state_cache.get("100", "999") is None
+
+def test_daily_cooldown_served_from_cache(session):
+    service = GachaService(session)
+    assert service.claim_daily("100", "999", "Alice")["success"]
+
+    # Second call is rejected by the cached last_daily_claim, before any query
+    session.close()
+    result = service.claim_daily("100", "999", "Alice")
+    assert not result["success"]
+    assert user_state_cache.stats["hits"] >= 1
+
+def test_bulk_vote_update_invalidates(session):
+    user_state_cache.put(UserState(discord_id="100", guild_id="999", coins=0))
+    VoteService(session).apply_rewards(["100"])
+    assert user_state_cache.get("100", "999") is None
+
+def test_card_count_follows_committed_card_writes(session):
+    alice, bob = (session.query(User).filter_by(discord_id=d).first() for d in ("100", "200"))
+    service = GachaService(session)
+    assert service.get_card_count(alice.id) == 0 # Miss: counted once, then cached
+
+    card = Card(user_id=alice.id, player_base_id=1)
+    session.add_all([card, Card(user_id=alice.id, player_base_id=2)])
+    session.commit()
+    assert user_state_cache.get_card_count(alice.id) == 2
+
+    # A trade moves the card (loaded first, like TradeService does); Bob's count was never cached
+    assert card.user_id == alice.id
+    card.user_id = bob.id
+    session.commit()
+    assert user_state_cache.get_card_count(alice.id) == 1
+    assert user_state_cache.get_card_count(bob.id) is None
+
+    # Rolled back writes never reach the cache
+    session.add(Card(user_id=alice.id, player_base_id=3))
+    session.flush()
+    session.rollback()
+    assert service.get_card_count(alice.id) == 1
+    assert user_state_cache.stats["card_count_misses"] == 2
@@ -0,0 +1,110 @@
+# tests/test_vote.py
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+import aiohttp
+from benchmarks.fakes import FakeBot
+from src.cogs.vote import VoteCog
+from src.services.vote_service import VoteService, RecentVotes
+from src.database.models import User
+
+def test_vote_rewards_every_guild_profile(session):
+    # Alice also plays in a second server
+    session.add(User(discord_id="100", guild_id="888", username="Alice", coins=0))
+    session.commit()
+
+    service = VoteService(session)
+    rewarded = service.apply_rewards([100, 200, 300])
+
+    assert rewarded == {"100": 2, "200": 1}
+
+    session.expire_all()
+    profiles = session.query(User).filter_by(discord_id="100").order_by(User.guild_id).all()
+    assert [p.coins for p in profiles] == [250, 10250]
+    assert all(p.roll_refreshes == 1 for p in profiles)
+
+def test_recent_votes_drops_retries_inside_window():
+    now = [0]
+    recent = RecentVotes(window_seconds=60, clock=lambda: now[0])
+
+    assert recent.begin((100, "upvote")) is True
+    assert recent.begin((100, "upvote")) is False # Retry while the first delivery is still queued
+    recent.done((100, "upvote"))
+    assert recent.begin((100, "upvote")) is False # Webhook retry
+
+    now[0] = 61
+    assert recent.begin((100, "upvote")) is True  # Next real vote
+
+def test_failed_vote_accepts_the_retry():
+    recent = RecentVotes(window_seconds=60, clock=lambda: 0)
+    assert recent.begin((100, "upvote")) is True
+    recent.failed((100, "upvote"))
+    assert recent.begin((100, "upvote")) is True
+
+def make_cog(apply_batch):
+    cog = VoteCog(FakeBot(None))
+    cog.apply_batch = apply_batch
+    cog.workers = [asyncio.create_task(cog.vote_worker()), asyncio.create_task(cog.dm_worker())]
+    return cog
+
+def apply_except_666(user_ids):
+    if 666 in user_ids:
+        raise RuntimeError("bad row")
+    return {str(user_id): 1 for user_id in user_ids}
+
+def test_one_bad_vote_does_not_drop_the_batch():
+    cog = SimpleNamespace(
+        apply_batch=apply_except_666, recent_votes=RecentVotes(window_seconds=60, clock=lambda: 0), vote_attempts={}
+    )
+    votes = [(100, "upvote"), (666, "upvote"), (200, "upvote")]
+    for vote in votes:
+        cog.recent_votes.begin(vote)
+
+    rewarded, applied, failed = asyncio.run(VoteCog.apply_votes(cog, votes))
+
+    assert rewarded == {"100": 1, "200": 1}
+    assert applied == [(100, "upvote"), (200, "upvote")]
+    assert failed == [(666, "upvote")]
+    assert cog.recent_votes.begin((100, "upvote")) is False # Rewarded: a retry is a duplicate
+    assert cog.recent_votes.begin((666, "upvote")) is False # Still in flight until it is retried
+
+@patch("src.cogs.vote.DM_INTERVAL_SECONDS", 0)
+def test_unload_applies_queued_votes_and_sends_their_dms():
+    sent = []
+
+    async def resolve_user(user_id):
+        async def send(embed):
+            if user_id == 100:
+                raise aiohttp.ClientError("connection reset")
+            sent.append(user_id)
+        return SimpleNamespace(send=send)
+
+    async def main():
+        cog = make_cog(apply_except_666)
+        cog.resolve_user = resolve_user
+        for vote in [(100, "upvote"), (200, "upvote"), (300, "upvote")]:
+            cog.recent_votes.begin(vote)
+            cog.vote_queue.put_nowait(vote)
+        await cog.cog_unload()
+        return cog
+
+    cog = asyncio.run(main())
+    # The webhook already acknowledged them, so unloading applies the queue; a failed DM does not stop the rest
+    assert sent == [200, 300]
+    assert cog.vote_queue.empty() and cog.dm_queue.empty()
+
+@patch("src.cogs.vote.VOTE_RETRY_SECONDS", 0)
+@patch("src.cogs.vote.VOTE_MAX_ATTEMPTS", 3)
+def test_failed_votes_are_retried_then_logged(capsys):
+    async def main():
+        cog = make_cog(apply_except_666)
+        cog.recent_votes.begin((666, "upvote"))
+        cog.vote_queue.put_nowait((666, "upvote"))
+        await asyncio.sleep(0.1)
+        await cog.cog_unload()
+        return cog
+
+    cog = asyncio.run(main())
+    assert cog.vote_attempts == {} and cog.retries == {}
+    assert "LOST vote upvote for User 666 after 3 attempts" in capsys.readouterr().out
+    assert cog.recent_votes.begin((666, "upvote")) is True # A redelivery from Top.gg is accepted again